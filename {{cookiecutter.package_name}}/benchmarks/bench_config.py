@@ -0,0 +1,76 @@
+"""
+Measure load_config() on a large config, uncached vs cached.
+
+Writes a config with ``--sections`` executor pools plus as many command
+priorities and pool assignments to a temporary directory, then times
+parsing + validation against validating the cached parsed config, and
+the cache hit after the file was touched but not changed.
+
+Usage: python -m benchmarks.bench_config [--sections 500] [--runs 50]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from {{cookiecutter.package_dir}} import settings
+
+
+def write_config(path: Path, sections: int) -> None:
+    lines = [
+        "[app]",
+        "[sentry]",
+        "[mqtt]",
+        'device_id = "bench"',
+        'creds = "dXNlcnxwYXNz"',
+        "[commands.priorities]",
+    ]
+    lines += [f"action{i} = {i % 10}" for i in range(sections)]
+    lines.append("[commands.action_pools]")
+    lines += [f'action{i} = "pool{i}"' for i in range(sections)]
+    for i in range(sections):
+        lines += [f"[pools.pool{i}]", "size = 2", "max_queued = 16", 'kind = "thread"']
+    path.write_text("\n".join(lines) + "\n")
+
+
+def best_of(runs: int, func) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sections", type=int, default=500)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        settings.CONFIG_FILE = Path(tmp) / "config.toml"
+        settings.CONFIG_CACHE = Path(tmp) / "config.cache"
+        write_config(settings.CONFIG_FILE, args.sections)
+        size = settings.CONFIG_FILE.stat().st_size
+
+        uncached = best_of(args.runs, lambda: settings.load_config(use_cache=False))
+        settings.load_config()
+        cached = best_of(args.runs, settings.load_config)
+
+        def touch_and_load():
+            os.utime(settings.CONFIG_FILE)
+            settings.load_config()
+
+        touched = best_of(args.runs, touch_and_load)
+
+    print(f"{args.sections} pools/priorities/assignments, {size / 1024:.0f} KiB")
+    print(f"  parse + validate  {uncached:8.2f} ms")
+    print(f"  cached            {cached:8.2f} ms  ({uncached / cached:.0f}x)")
+    print(f"  touched, cached   {touched:8.2f} ms  (content hash match)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Measure the per-process cost of gateway mode at 10, 100 and 1000 devices.
+
+Each size runs in a fresh interpreter: a GatewayApp with a fake broker
+connection, its command executor and the per-device heartbeat (every
+``--interval`` seconds), fed ``--rate`` commands per second spread over
+all devices for ``--seconds``. Reports the RSS added by the gateway and
+the CPU time it used per second of wall time.
+
+Usage: python -m benchmarks.bench_gateway [--devices 10 100 1000]
+    [--seconds 5] [--rate 200] [--interval 1]
+"""
+
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+
+import psutil
+
+MB = 1024 * 1024
+
+
+class FakeConnection:
+    """Stands in for aiomqtt.Client: counts publishes."""
+
+    def __init__(self):
+        self.published = 0
+
+    async def publish(self, topic, payload, qos=0, retain=False):
+        self.published += 1
+
+
+async def run_gateway(devices: int, seconds: float, rate: float, interval: float):
+    from {{cookiecutter.package_dir}}.gateway import GatewayApp  # noqa: PLC0415
+    from {{cookiecutter.package_dir}}.gateway import GatewayHeartbeat  # noqa: PLC0415
+    from {{cookiecutter.package_dir}}.settings import Settings  # noqa: PLC0415
+
+    process = psutil.Process()
+    base_rss = process.memory_info().rss
+
+    ids = [f"device-{i}" for i in range(devices)]
+    app = GatewayApp(Settings(app={}, sentry={}, mqtt={}, gateway={"devices": ids}))
+    await app.setup_mqtt()
+    connection = app._mqtt._client = FakeConnection()  # noqa: SLF001
+    app._mqtt.connected_event.set()  # noqa: SLF001
+
+    async def noop(data):
+        await asyncio.sleep(0)
+
+    app._command_handlers["noop"] = noop  # noqa: SLF001
+    heartbeat = GatewayHeartbeat(
+        mqtt=app._mqtt,  # noqa: SLF001
+        devices=app.devices,
+        interval=interval,
+    )
+    commands = app._commands  # noqa: SLF001
+    tasks = [
+        asyncio.create_task(commands.start()),
+        asyncio.create_task(heartbeat.start()),
+    ]
+    await commands.wait_started()
+
+    cpu_started = process.cpu_times()
+    started = time.monotonic()
+    sent = 0
+    while (elapsed := time.monotonic() - started) < seconds:
+        while sent < elapsed * rate:
+            topic = f"project/app/{ids[sent % devices]}/command"
+            await app._mqtt._handle_message(topic, b'{"action": "noop"}')  # noqa: SLF001
+            sent += 1
+        await asyncio.sleep(0.01)
+    elapsed = time.monotonic() - started
+    cpu = process.cpu_times()
+    cpu_seconds = (cpu.user - cpu_started.user) + (cpu.system - cpu_started.system)
+    rss = process.memory_info().rss
+
+    await commands.drain(1.0)
+    await heartbeat.stop()
+    await commands.stop()
+    await asyncio.gather(*tasks)
+    app._pools.shutdown()  # noqa: SLF001
+    return {
+        "devices": devices,
+        "rss_mb": (rss - base_rss) / MB,
+        "cpu_percent": cpu_seconds / elapsed * 100,
+        "commands": sent,
+        "published": connection.published,
+    }
+
+
+def bench(devices: int, args) -> dict:
+    proc = subprocess.run(  # noqa: S603
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.bench_gateway",
+            "--worker",
+            str(devices),
+            "--seconds",
+            str(args.seconds),
+            "--rate",
+            str(args.rate),
+            "--interval",
+            str(args.interval),
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(proc.stdout.splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--devices", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--rate", type=float, default=200.0, help="commands/s")
+    parser.add_argument("--interval", type=float, default=1.0, help="heartbeat")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        result = asyncio.run(
+            run_gateway(args.worker, args.seconds, args.rate, args.interval)
+        )
+        print(json.dumps(result))
+        return
+
+    print(
+        f"{args.rate:.0f} commands/s for {args.seconds:.0f}s,"
+        f" heartbeat every {args.interval:.0f}s per device"
+    )
+    for devices in args.devices:
+        result = bench(devices, args)
+        print(
+            f"  {devices:5} devices  +{result['rss_mb']:6.1f} MiB RSS"
+            f"  ({result['rss_mb'] * 1024 / devices:6.1f} KiB/device)"
+            f"  CPU {result['cpu_percent']:5.1f}%"
+            f"  {result['published']:7} publishes"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Measure the cold-start import cost of the console script.
+
+Runs ``python -X importtime -c "import <module>"`` in a fresh interpreter
+``--runs`` times and reports the best cumulative import time of the module,
+the slowest imports it pulls in, and the wall time of ``--help``. Exits
+with status 1 if the import time is over ``--budget`` milliseconds, so it
+can run in CI.
+
+Usage: python -m benchmarks.bench_import [--budget 100] [--runs 5] [--top 10]
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+import time
+
+MODULE = "{{cookiecutter.package_dir}}.cli"
+
+# import time: self [us] | cumulative | imported package
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_times(module: str) -> dict[str, int]:
+    """
+    Return the cumulative import time (us) of ``module`` and every module
+    it imported, leaving out what the interpreter loads at startup.
+    """
+    proc = subprocess.run(  # noqa: S603
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # Nested imports are listed before the module that imported them
+    times = {}
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        name, cumulative = match.group(4), int(match.group(2))
+        times[name] = cumulative
+        if len(match.group(3)) == 1:  # top level
+            if name == module:
+                return times
+            times = {}
+    msg = f"{module} not found in -X importtime output"
+    raise RuntimeError(msg)
+
+
+def help_seconds(module: str) -> float:
+    started = time.perf_counter()
+    subprocess.run(  # noqa: S603
+        [sys.executable, "-m", module, "--help"],
+        capture_output=True,
+        check=True,
+    )
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--budget", type=float, default=100.0, help="ms")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    # Best of N filters out a cold disk cache and scheduler noise
+    runs = [import_times(MODULE) for _ in range(args.runs)]
+    best = min(runs, key=lambda times: times[MODULE])
+    total_ms = best[MODULE] / 1000
+    help_ms = min(help_seconds(MODULE) for _ in range(args.runs)) * 1000
+
+    print(f"import {MODULE}: {total_ms:8.1f} ms  (budget {args.budget:.0f} ms)")
+    print(f"{MODULE} --help: {help_ms:8.1f} ms  (including interpreter start)")
+    print(f"slowest of {len(best) - 1} modules it imports (cumulative):")
+    top = sorted(best.items(), key=lambda item: item[1], reverse=True)
+    for name, us in top[1 : args.top + 1]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    if total_ms > args.budget:
+        print(f"OVER BUDGET by {total_ms - args.budget:.1f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Compare the stock asyncio event loop with uvloop.
+
+Feeds ``--messages`` MQTT messages through AsyncMqttClient's dispatch loop
+(with a fake broker connection) while a HeartbeatService publishes every
+``--interval`` seconds, then reports message throughput and how far the
+heartbeat intervals drift from the configured one.
+
+Usage: python -m benchmarks.bench_loops [--messages 200000] [--interval 0.01]
+"""
+
+import argparse
+import asyncio
+import itertools
+import statistics
+import time
+from types import SimpleNamespace
+
+from {{cookiecutter.package_dir}}.metrics import MetricsRegistry
+from {{cookiecutter.package_dir}}.mqtt.client import AsyncMqttClient
+from {{cookiecutter.package_dir}}.services.heartbeat import HeartbeatService
+
+
+class FakeConnection:
+    """Stands in for aiomqtt.Client: yields prepared messages."""
+
+    def __init__(self, count: int):
+        self.published: list[float] = []
+        payload = b'{"action": "noop", "value": 1}'
+        self._messages = [
+            SimpleNamespace(topic="bench/command", payload=payload)
+        ] * count
+
+    @property
+    async def messages(self):
+        for message in self._messages:
+            yield message
+
+    async def publish(self, topic, payload, qos=0, retain=False):
+        self.published.append(time.perf_counter())
+
+
+async def run_once(messages: int, interval: float) -> tuple[float, list[float]]:
+    metrics = MetricsRegistry()
+    mqtt = AsyncMqttClient(base_topic="bench", metrics=metrics)
+    connection = mqtt._client = FakeConnection(messages)  # noqa: SLF001
+    mqtt.connected_event.set()
+
+    async def handler(payload, topic):
+        await asyncio.sleep(0)
+
+    mqtt.add_message_handler("bench/command", handler)
+
+    heartbeat = HeartbeatService(mqtt=mqtt, interval=interval, metrics=None)
+    heartbeat_task = asyncio.create_task(heartbeat.run())
+    await asyncio.sleep(interval)
+
+    started = time.perf_counter()
+    await mqtt._message_loop()  # noqa: SLF001
+    elapsed = time.perf_counter() - started
+
+    await heartbeat.stop()
+    await heartbeat_task
+    intervals = [b - a for a, b in itertools.pairwise(connection.published)]
+    return messages / elapsed, [abs(i - interval) * 1000 for i in intervals]
+
+
+def bench(name: str, loop_factory, messages: int, interval: float) -> None:
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        rate, jitter = runner.run(run_once(messages, interval))
+    jitter.sort()
+    p99 = jitter[int(len(jitter) * 0.99)] if jitter else 0.0
+    print(
+        f"  {name:8} {rate:12,.0f} msg/s"
+        f"   heartbeat jitter p50 {statistics.median(jitter):6.2f} ms"
+        f"  p99 {p99:6.2f} ms  max {max(jitter, default=0):6.2f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=200_000)
+    parser.add_argument("--interval", type=float, default=0.01)
+    args = parser.parse_args()
+
+    print(f"{args.messages} messages, heartbeat every {args.interval * 1000:.0f} ms")
+    bench("asyncio", None, args.messages, args.interval)
+    try:
+        import uvloop  # noqa: PLC0415
+    except ImportError:
+        print("  uvloop   not installed (pip install .[uvloop])")
+    else:
+        bench("uvloop", uvloop.new_event_loop, args.messages, args.interval)
+
+
+if __name__ == "__main__":
+    main()
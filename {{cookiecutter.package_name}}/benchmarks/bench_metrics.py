@@ -0,0 +1,46 @@
+"""
+Measure the per-call recording cost of the metric primitives.
+
+Usage: python -m benchmarks.bench_metrics [--budget-ns 1000]
+"""
+
+import argparse
+import sys
+import timeit
+
+from {{cookiecutter.package_dir}}.metrics import MetricsRegistry
+
+NUMBER = 1_000_000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--budget-ns", type=float, default=1000.0)
+    parser.add_argument("--number", type=int, default=NUMBER)
+    args = parser.parse_args()
+
+    registry = MetricsRegistry()
+    counter = registry.counter("bench_counter")
+    gauge = registry.gauge("bench_gauge")
+    histogram = registry.histogram("bench_histogram")
+
+    cases = {
+        "Counter.inc": counter.inc,
+        "Gauge.set": lambda: gauge.set(42.0),
+        "Histogram.observe": lambda: histogram.observe(0.00123),
+    }
+
+    over_budget = False
+    for name, func in cases.items():
+        # Best of several repeats to filter out scheduler noise
+        seconds = min(timeit.repeat(func, number=args.number, repeat=5))
+        ns_per_call = seconds / args.number * 1e9
+        status = "ok" if ns_per_call < args.budget_ns else "OVER BUDGET"
+        over_budget |= ns_per_call >= args.budget_ns
+        print(f"{name:<20} {ns_per_call:8.1f} ns/call  {status}")
+
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+Compare startup restore time of the JSON stats file against the binary
+memory-mapped snapshot.
+
+Both paths restore the same history: ``--points`` samples spread over
+``--series`` metrics. The JSON path has to parse every point and fold it
+back into the ring buffers; the snapshot path maps the file and uses the
+buckets in place.
+
+Usage: python -m benchmarks.bench_snapshot [--points 100000] [--series 100]
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from {{cookiecutter.package_dir}}.snapshot import StatsSnapshot
+from {{cookiecutter.package_dir}}.timeseries import DEFAULT_RESOLUTIONS
+from {{cookiecutter.package_dir}}.timeseries import TimeSeries
+
+
+def restore_json(path: Path) -> dict[str, TimeSeries]:
+    data = json.loads(path.read_text())
+    history = {}
+    for name, points in data.items():
+        series = history[name] = TimeSeries(DEFAULT_RESOLUTIONS)
+        for ts, value in points:
+            series.add(value, ts)
+    return history
+
+
+def restore_snapshot(path: Path, capacity: int) -> dict[str, TimeSeries]:
+    snapshot = StatsSnapshot(path, DEFAULT_RESOLUTIONS, capacity=capacity)
+    snapshot.open()
+    history = {name: snapshot.series(name) for name in snapshot.names()}
+    snapshot.values()
+    return history
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--points", type=int, default=100_000)
+    parser.add_argument("--series", type=int, default=100)
+    args = parser.parse_args()
+
+    per_series = args.points // args.series
+    start = time.time() - per_series
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = Path(tmp) / "stats.json"
+        snap_path = Path(tmp) / "stats.snap"
+
+        # Write both formats with identical data
+        points = {}
+        snapshot = StatsSnapshot(snap_path, DEFAULT_RESOLUTIONS, capacity=args.series)
+        snapshot.open()
+        for i in range(args.series):
+            name = f"source.metric_{i}"
+            series = snapshot.series(name)
+            points[name] = [(start + t, float(t % 97)) for t in range(per_series)]
+            for ts, value in points[name]:
+                series.add(value, ts)
+            snapshot.set_value(name, points[name][-1][1])
+        snapshot.close()
+        json_path.write_text(json.dumps(points))
+
+        started = time.perf_counter()
+        restore_json(json_path)
+        json_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        restore_snapshot(snap_path, args.series)
+        snap_seconds = time.perf_counter() - started
+
+        print(f"{args.points} points in {args.series} series")
+        print(f"  JSON file      {json_path.stat().st_size / 1e6:8.1f} MB")
+        print(f"  snapshot file  {snap_path.stat().st_size / 1e6:8.1f} MB")
+        print(f"  JSON restore     {json_seconds * 1000:8.1f} ms")
+        print(f"  snapshot restore {snap_seconds * 1000:8.1f} ms")
+        print(f"  speedup          {json_seconds / snap_seconds:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Measure the cost of Sentry performance tracing on MQTT message dispatch.
+
+Feeds ``--messages`` messages through AsyncMqttClient's handler dispatch
+with tracing off, then with Sentry initialized (events go to a transport
+that discards them) at each of ``--rates``, and reports the time per
+message and the overhead over tracing off.
+
+Usage: python -m benchmarks.bench_tracing [--messages 50000]
+    [--rates 0.01 0.1 1.0]
+"""
+
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+
+from {{cookiecutter.package_dir}} import tracing
+from {{cookiecutter.package_dir}}.metrics import MetricsRegistry
+from {{cookiecutter.package_dir}}.mqtt.client import AsyncMqttClient
+
+
+async def dispatch(messages: int) -> float:
+    mqtt = AsyncMqttClient(base_topic="bench", metrics=MetricsRegistry())
+
+    async def handler(payload, topic):
+        pass
+
+    mqtt.add_message_handler("bench/command", handler)
+    payload = b'{"action": "noop", "value": 1}'
+    started = time.perf_counter()
+    for _ in range(messages):
+        await mqtt._handle_message("bench/command", payload)  # noqa: SLF001
+    return (time.perf_counter() - started) / messages * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=50_000)
+    parser.add_argument("--rates", type=float, nargs="+", default=[0.01, 0.1, 1.0])
+    args = parser.parse_args()
+
+    baseline = asyncio.run(dispatch(args.messages))
+    print(f"{args.messages} messages, one handler")
+    print(f"  tracing off   {baseline:7.2f} us/message")
+
+    try:
+        import sentry_sdk  # noqa: PLC0415
+    except ImportError:
+        print("  sentry-sdk not installed, nothing to compare")
+        return
+
+    class NullTransport(sentry_sdk.transport.Transport):
+        def capture_envelope(self, envelope):
+            pass
+
+    for rate in args.rates:
+        config = SimpleNamespace(
+            sentry=SimpleNamespace(
+                dsn="http://key@localhost/1",
+                environment="bench",
+                traces_sample_rate=rate,
+                sample_rules=[],
+            )
+        )
+        tracing.init_sentry(config, transport=NullTransport)
+        cost = asyncio.run(dispatch(args.messages))
+        print(
+            f"  rate {rate:<8} {cost:7.2f} us/message"
+            f"  (+{cost - baseline:.2f} us, {cost / baseline:.1f}x)"
+        )
+        sentry_sdk.flush()
+
+
+if __name__ == "__main__":
+    main()
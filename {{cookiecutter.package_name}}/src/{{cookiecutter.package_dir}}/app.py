@@ -1,38 +1,163 @@
 import asyncio
 import logging
+import time
+from contextlib import contextmanager
 
+from pydantic import ValidationError
+
+from .commands import CommandExecutor
+from .commands import CommandRejected
+from .logging_config import logging_stats
+from .metrics import REGISTRY
 from .mqtt import client
+from .mqtt.service import MqttService
+from .openmetrics import OpenMetricsRenderer
+from .pools import ExecutorPools
+from .profiler import SamplingProfiler
+from .result_cache import ResultCache
+from .services.config_watcher import ConfigWatcher
+from .services.health import HealthServer
+from .services.health import SystemdNotifier
 from .services.heartbeat import HeartbeatService
-from .settings import SETTINGS_DIR, Settings
+from .services.loop_monitor import LoopLagMonitor
+from .services.memory_monitor import MemoryMonitor
+from .services.metrics_server import MetricsServer
+from .services.supervisor import ServiceSupervisor
+from .settings import CONFIG_FILE
+from .settings import SETTINGS_DIR
+from .settings import Settings
+from .settings import load_config
 from .shutdown import ShutdownManager
 from .stats import StatsTracker
 
 logger = logging.getLogger("{{cookiecutter.package_name}}")
 
+# Device topics are <TOPIC_PREFIX>/<device_id>/<topic>
+TOPIC_PREFIX = "project/app"
+
+# Config the MQTT 'config' topic may not change: pointing the connection
+# elsewhere would hand the credentials to whoever can publish there
+REMOTE_LOCKED = {"mqtt": ("host", "port", "creds", "username", "password", "use_tls")}
+
+
+@contextmanager
+def _timed(timings: dict, name: str):
+    """Record the seconds the block took in ``timings[name]``."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = round(time.perf_counter() - started, 4)
+
+
+def _merge(base: dict, update: dict) -> dict:
+    """Return ``base`` with ``update`` merged in recursively."""
+    merged = dict(base)
+    for key, value in update.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def _param(data: dict, name: str, default, low, high):
+    """
+    Return command parameter ``name`` (or ``default``) converted to the
+    type of ``default``; raises ValueError with a message for the client
+    unless it lies within ``[low, high]``.
+    """
+    value = data.get(name, default)
+    try:
+        number = type(default)(value)
+    except (TypeError, ValueError):
+        number = None
+    # Also rejects NaN, and booleans passed as numbers
+    if number is None or isinstance(value, bool) or not low <= number <= high:
+        msg = f"'{name}' must be a number from {low} to {high}, got {value!r}"
+        raise ValueError(msg)
+    return number
+
 
 class MyApp:
     """Main application."""
 
+    # Maps topics to metric labels, see AsyncMqttClient
+    topic_label = None
+
     def __init__(self, config: Settings):
         self.config = config
         self._mqtt: client.AsyncMqttClient | None = None
-        self._tasks: set[asyncio.Task] = set()
         self._heartbeat: HeartbeatService | None = None
+        self._metrics_server: MetricsServer | None = None
+        self._loop_monitor: LoopLagMonitor | None = None
+        self._memory_monitor = MemoryMonitor(
+            interval=config.memory_monitor.interval,
+            window=config.memory_monitor.window,
+            threshold_mb=config.memory_monitor.threshold_mb,
+            trace_frames=config.memory_monitor.trace_frames,
+            on_alert=self.publish_memory_alert,
+        )
+        self._mqtt_service: MqttService | None = None
+        self._supervisor = ServiceSupervisor()
+        self._config_lock = asyncio.Lock()
+        self._tasks: set[asyncio.Task] = set()
+        self._startup: dict[str, float] = {}
+        self._started = False
+        self._notifier: SystemdNotifier | None = None
+
+        self._pools = ExecutorPools()
+        for name, pool in self.config.pools.items():
+            self._pools.add(name, **pool.model_dump())
+        # Fail at startup on pool assignments that don't exist
+        self._check_pools(self.config)
+        commands = self.config.commands
+        self._commands = CommandExecutor(
+            max_concurrent=commands.max_concurrent,
+            max_queued=commands.max_queued,
+            default_priority=commands.default_priority,
+            priorities=commands.priorities,
+            on_result=self.publish_command_result,
+            results=ResultCache(
+                max_entries=commands.result_cache_size,
+                ttl=commands.result_ttl,
+                path=SETTINGS_DIR / "command_results.json"
+                if commands.persist_results
+                else None,
+                executor=self._pools.get(self.config.app.io_pool),
+            ),
+        )
+        self._command_handlers = {
+            "foo": lambda data: self.run_blocking("foo", self.command_foo, data),
+            "bar": self.command_bar,
+            "profile": self.command_profile,
+            "memsnapshot": self.command_memsnapshot,
+        }
+        self._profiler = SamplingProfiler(SETTINGS_DIR / "profiles")
 
+        stats = self.config.stats
         self._stats = StatsTracker(
-            stats_file=SETTINGS_DIR / "stats.json", save_interval=10.0
+            stats_file=SETTINGS_DIR / "stats.json",
+            save_interval=stats.save_interval,
+            sample_interval=stats.sample_interval,
+            max_series=stats.max_series,
+            snapshot_file=SETTINGS_DIR / "stats.snap" if stats.snapshot else None,
+            executor=self._pools.get(self.config.app.io_pool),
         )
 
     async def setup_mqtt(self) -> None:
         """Initialize and configure MQTT client."""
         self._mqtt = client.AsyncMqttClient(
-            base_topic=f"project/app/{self.config.mqtt.device_id}",
+            base_topic=f"{TOPIC_PREFIX}/{self.config.mqtt.device_id}",
             hostname=self.config.mqtt.host,
             port=self.config.mqtt.port,
             identifier=self.config.mqtt.device_id,
             username=self.config.mqtt.username,
             password=self.config.mqtt.password,
             keep_alive=self.config.mqtt.keep_alive,
+            error_limit=self.config.mqtt.error_limit,
+            error_period=self.config.mqtt.error_period,
+            topic_label=self.topic_label,
         )
 
         # Setup MQTT topics
@@ -53,22 +178,74 @@ class MyApp:
         }
         self._mqtt.add_message_handlers(message_handlers)
 
-        await self._mqtt.connect()
-        await self._mqtt.connected_event.wait()
+        self._mqtt_service = MqttService(
+            self._mqtt, metrics_interval=self.config.mqtt.metrics_interval
+        )
+        self._supervisor.add("mqtt", self._mqtt_service)
+        self._supervisor.add("commands", self._commands, depends_on=("mqtt",))
 
     # --------------------------------------------------------------------------
     # MQTT message handlers
     # --------------------------------------------------------------------------
 
     async def handle_config(self, payload: dict, topic: str) -> None:
-        """Handle incoming MQTT commands."""
+        """
+        Handle config changes: ``payload`` holds the sections and fields to
+        change, e.g. {"heartbeat": {"interval": 5}}. They apply at runtime
+        only; the config file is not modified, and editing it later
+        overrides them.
+        """
+        if not isinstance(payload, dict):
+            logger.warning("Ignoring config from MQTT, expected an object")
+            return
+        # Not the payload itself, it may hold credentials
+        logger.info("Received config for %s", sorted(payload))
+        if not self.config.app.remote_config:
+            logger.warning("Ignoring config from MQTT, [app] remote_config is off")
+            return
+        locked = [
+            f"{section}.{name}"
+            for section, names in REMOTE_LOCKED.items()
+            if isinstance(payload.get(section), dict)
+            for name in names
+            if name in payload[section]
+        ]
+        if locked:
+            logger.warning("Rejected config from MQTT changing %s", locked)
+            await self._mqtt.send_message(
+                f"Rejected config: {', '.join(locked)} can't be changed over MQTT",
+                error=True,
+            )
+            return
+        try:
+            current = self.config.model_dump(exclude_unset=True)
+            config = Settings.model_validate(_merge(current, payload))
+        except ValidationError as e:
+            await self._mqtt.send_message(
+                f"Invalid config: {e.error_count()} errors",
+                extra={"errors": e.errors(include_url=False, include_input=False)},
+                error=True,
+            )
+            return
         try:
-            logger.info("Received config: %r", payload)
+            await self.apply_config(config, source="mqtt")
         except Exception:
-            logger.exception("Error processing config: %r", payload)
+            logger.exception("Error processing config for %s", sorted(payload))
 
     async def handle_command(self, data: dict, topic: str) -> None:
-        """Handle 'action' command."""
+        """
+        Handle 'action' command.
+
+        An optional "id" identifies the request: repeats of the same id get
+        the cached result of a successful run instead of running it again.
+        """
+        await self.dispatch_command(data, self._mqtt)
+
+    async def dispatch_command(self, data: dict, mqtt, scope: str | None = None):
+        """
+        Queue the command in ``data``; errors are reported through ``mqtt``
+        and ``scope`` namespaces the command (see CommandExecutor).
+        """
         action = data.get("action")
         if not action:
             logger.warning("No action specified in command data: %r", data)
@@ -76,31 +253,183 @@ class MyApp:
 
         logger.info("Received command with data: %r", data)
 
-        # We expect 'action' to be in the data
-        if action == "foo":
-            await self.run_command_async(
-                asyncio.to_thread(self.command_foo, data=data), name="foo_action"
-            )
-        elif action == "bar":
-            await self.command_bar(data)
-        else:
+        # 'cancel' takes the id or action of a queued or running command
+        if action == "cancel":
+            target = data.get("target", "")
+            cancelled = self._commands.cancel(target, scope)
+            if cancelled is None:
+                await mqtt.send_message(
+                    f"No pending command '{target}' to cancel", error=True
+                )
+            return
+
+        handler = self._command_handlers.get(action)
+        if handler is None:
             logger.warning("Unknown command action: %s", action)
+            return
+
+        try:
+            self._commands.submit(
+                action,
+                lambda: handler(data),
+                command_id=data.get("id"),
+                priority=data.get("priority"),
+                scope=scope,
+            )
+        except CommandRejected as e:
+            logger.warning("%s", e)
 
     # --------------------------------------------------------------------------
-    # Commands
+    # Config reload
     # --------------------------------------------------------------------------
 
-    async def run_command_async(self, couroutine, name: str) -> None:
-        """Run a command asynchronously."""
-        task = asyncio.create_task(couroutine, name=name)
+    def _check_pools(self, config: Settings) -> None:
+        """
+        Raise ValueError if ``config`` assigns commands or file I/O to
+        unknown pools, or to process pools: both run bound methods, which
+        can't be pickled.
+        """
+        commands = config.commands
+        names = {config.app.io_pool, commands.pool, *commands.action_pools.values()}
+        for name in sorted(names):
+            self._pools.get(name)
+            pool = config.pools.get(name)
+            if pool is not None and pool.kind == "process":
+                msg = (
+                    f"Executor pool '{name}' runs app methods and can't be a"
+                    " process pool"
+                )
+                raise ValueError(msg)
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
         self._tasks.add(task)
-
-        # Cleanup done tasks
         task.add_done_callback(self._tasks.discard)
-        task.add_done_callback(
-            lambda t: logger.info(
-                "Task completed: %r (name=%s)", t.result(), t.get_name()
+
+    async def apply_config(self, config: Settings, source: str) -> dict:
+        """
+        Switch to ``config``, applying each changed section in place where
+        possible (see the _apply_*_config methods). Sections without a
+        live path take effect on the next restart; until then
+        ``self.config`` keeps their old values, so it always describes
+        what is in effect.
+
+        Returns the applied and restart-requiring section names.
+        """
+        async with self._config_lock:
+            try:
+                self._check_pools(config)
+            except ValueError as e:
+                logger.warning("Rejected config from %s: %s", source, e)
+                await self._mqtt.send_message(f"Rejected config: {e}", error=True)
+                return {}
+
+            result = {"source": source, "applied": [], "restart_required": []}
+            kept = {}
+            for section in Settings.model_fields:
+                before, after = getattr(self.config, section), getattr(config, section)
+                if before == after:
+                    continue
+                # Each _apply_*_config changes nothing unless it can apply
+                # the whole section
+                apply = getattr(self, f"_apply_{section}_config", None)
+                if apply is not None and apply(before, after):
+                    result["applied"].append(section)
+                else:
+                    result["restart_required"].append(section)
+                    kept[section] = before
+            self.config = config.model_copy(update=kept)
+
+        if not result["applied"] and not result["restart_required"]:
+            logger.debug("Config from %s unchanged", source)
+            return result
+        logger.info("Applied config from %s: %s", source, result["applied"])
+        if result["restart_required"]:
+            logger.warning(
+                "Config sections %s take effect on restart",
+                result["restart_required"],
             )
+        await self._mqtt.send_message("Config reloaded", extra=result)
+        return result
+
+    def _apply_app_config(self, old, new) -> bool:
+        # Read from self.config when used
+        live = {"shutdown_timeout", "remote_config"}
+        return old.model_dump(exclude=live) == new.model_dump(exclude=live)
+
+    def _apply_mqtt_config(self, old, new) -> bool:
+        # Topics are built from these at startup
+        topics = ("device_id", "base_topic", "use_tls")
+        if any(getattr(old, name) != getattr(new, name) for name in topics):
+            return False
+        connection = ("host", "port", "username", "password", "keep_alive")
+        if any(getattr(old, name) != getattr(new, name) for name in connection):
+            # Not awaited: we may be running in the message loop it restarts
+            self._spawn(
+                self._mqtt.reconnect(
+                    hostname=new.host,
+                    port=new.port,
+                    username=new.username,
+                    password=new.password,
+                    keep_alive=new.keep_alive,
+                )
+            )
+        self._mqtt.set_error_limit(new.error_limit, new.error_period)
+        self._mqtt_service.metrics_interval = new.metrics_interval
+        return True
+
+    def _apply_heartbeat_config(self, old, new) -> bool:
+        if self._heartbeat is not None:
+            self._heartbeat.reconfigure(**new.model_dump(exclude={"metrics"}))
+            self._heartbeat.metrics = REGISTRY if new.metrics else None
+        return True
+
+    def _apply_commands_config(self, old, new) -> bool:
+        # pool and action_pools are looked up per call in run_blocking()
+        live = {"default_priority", "priorities", "pool", "action_pools"}
+        if old.model_dump(exclude=live) != new.model_dump(exclude=live):
+            return False
+        self._commands.default_priority = new.default_priority
+        self._commands.priorities = dict(new.priorities)
+        return True
+
+    def _apply_health_config(self, old, new) -> bool:
+        # max_tick_age is read from self.config by is_live()
+        live = {"max_tick_age"}
+        return old.model_dump(exclude=live) == new.model_dump(exclude=live)
+
+    def _apply_loop_monitor_config(self, old, new) -> bool:
+        if old.enabled != new.enabled:
+            return False
+        if self._loop_monitor is not None:
+            self._loop_monitor.interval = new.interval
+            self._loop_monitor.threshold = new.threshold
+        return True
+
+    def _apply_memory_monitor_config(self, old, new) -> bool:
+        if old.enabled != new.enabled:
+            return False
+        monitor = self._memory_monitor
+        monitor.interval = new.interval
+        monitor.window = new.window
+        monitor.threshold_mb = new.threshold_mb
+        monitor.trace_frames = new.trace_frames
+        return True
+
+    # --------------------------------------------------------------------------
+    # Commands
+    # --------------------------------------------------------------------------
+
+    async def run_blocking(self, action: str, func, *args):
+        """Run a blocking command function in the action's executor pool."""
+        commands = self.config.commands
+        pool = self._pools.get(commands.action_pools.get(action, commands.pool))
+        return await pool.run(func, *args)
+
+    async def publish_command_result(self, result: dict) -> None:
+        """Publish the outcome of a command to the 'command/result' topic."""
+        await self._mqtt.publish_json(
+            self._mqtt.build_topic("command/result"), result, qos=1
         )
 
     async def command_bar(self, data: dict) -> None:
@@ -111,6 +440,54 @@ class MyApp:
         """Handle 'foo' command."""
         logger.info("Executing 'foo' command with data: %r", data)
 
+    async def command_profile(self, data: dict) -> dict:
+        """
+        Handle 'profile' command: sample all threads for "seconds" (default
+        10, 0.1 to 300), write a collapsed-stack file under SETTINGS_DIR
+        and publish the "top" frames (default 10, at most 100) on the
+        'message' topic.
+        """
+        try:
+            seconds = _param(data, "seconds", 10.0, 0.1, 300.0)
+            top = _param(data, "top", 10, 1, 100)
+        except ValueError as e:
+            await self._mqtt.send_message(f"Invalid profile command: {e}", error=True)
+            raise
+        result = await self._profiler.profile(seconds)
+        summary = {
+            "file": str(result.path),
+            "samples": result.samples,
+            "top": result.top_frames(top),
+        }
+        await self._mqtt.send_message(
+            f"Profiled {seconds:.0f}s, {result.samples} samples", extra=summary
+        )
+        return summary
+
+    async def command_memsnapshot(self, data: dict) -> list[dict]:
+        """
+        Handle 'memsnapshot' command: trace allocations for "seconds"
+        (default 30, 0.1 to 600) and publish the "top" source lines that
+        grew the most (default 10, at most 100) on the 'message' topic.
+        """
+        try:
+            seconds = _param(data, "seconds", 30.0, 0.1, 600.0)
+            limit = _param(data, "top", 10, 1, 100)
+        except ValueError as e:
+            await self._mqtt.send_message(
+                f"Invalid memsnapshot command: {e}", error=True
+            )
+            raise
+        top = await self._memory_monitor.diff_snapshots(seconds, limit=limit)
+        await self._mqtt.send_message(
+            f"Top allocations over {seconds:.0f}s", extra={"top": top}
+        )
+        return top
+
+    async def publish_memory_alert(self, alert: dict) -> None:
+        """Report RSS growth past the threshold on the 'message' topic."""
+        await self._mqtt.send_message("Memory growth", extra=alert, error=True)
+
     # --------------------------------------------------------------------------
     # Stats
     # --------------------------------------------------------------------------
@@ -122,60 +499,182 @@ class MyApp:
 
     def restore_stats(self) -> None:
         """Restore sensor stats from saved data."""
-        # saved_stats = self._stats.all().get("sensors", {})
+        saved_stats = self._stats.all().get("foo", {})
         # self._monitor.restore_stats(saved_stats)
-        logger.debug("TODO: Implement restore_stats")
+        logger.debug("Restored stats: %r", saved_stats)
 
     async def setup_stats(self) -> None:
         """Initialize and configure stats tracker."""
         self._stats.register_source("foo", self.get_stats)
-        await self._stats.start()
-        # logger.debug("TODO: Implement setup_stats")
+        self._stats.register_source("services", self._supervisor.status)
+        self._stats.register_source("logging", logging_stats)
+        self._stats.register_source("startup", lambda: dict(self._startup))
+        self._supervisor.add("stats", self._stats)
+
+    # --------------------------------------------------------------------------
+    # Health
+    # --------------------------------------------------------------------------
+
+    def is_live(self) -> bool:
+        """False once a service failed or the event loop stopped progressing."""
+        if (
+            self._loop_monitor is not None
+            and self._loop_monitor.tick_age() > self.config.health.max_tick_age
+        ):
+            return False
+        return all(s["state"] != "failed" for s in self._supervisor.status().values())
+
+    def health(self) -> dict:
+        """
+        Liveness and readiness from in-memory state, served by HealthServer.
+
+        Ready means started and connected to the broker; live only needs the
+        process itself to be working, so it stays true while offline.
+        """
+        connected = self._mqtt is not None and self._mqtt.connected_event.is_set()
+        last_heartbeat = self._heartbeat.last_sent if self._heartbeat else None
+        health = {
+            "live": self.is_live(),
+            "ready": self._started and connected,
+            "mqtt_connected": connected,
+            "heartbeat_age": round(time.time() - last_heartbeat, 3)
+            if last_heartbeat is not None
+            else None,
+            "services": {
+                name: s["state"] for name, s in self._supervisor.status().items()
+            },
+        }
+        if self._loop_monitor is not None:
+            health["loop"] = {
+                "lag_ms": round(self._loop_monitor.last_lag * 1000, 3),
+                "tick_age": round(self._loop_monitor.tick_age(), 3),
+            }
+        return health
 
     # --------------------------------------------------------------------------
     # App lifecycle management
     # --------------------------------------------------------------------------
 
     async def start_background_tasks(self) -> None:
-        """Start all background tasks."""
+        """Register all background services with the supervisor."""
         # self._monitor = BreakBeamMonitor(
         #     mqtt=self._mqtt,
         #     sensor_config=self.config.sensor,
         #     sound=self.config.app.sound,
         # )
-        # self._tasks.add(
-        #     asyncio.create_task(
-        #         self._monitor.start(),
-        #         name="monitor",
-        #     )
-        # )
-
-        # Start heartbeat service (should be last to start)
-        self._heartbeat = HeartbeatService(mqtt=self._mqtt)
-        self._tasks.add(
-            asyncio.create_task(
-                self._heartbeat.run(),
-                name="heartbeat",
-            )
+        # self._supervisor.add("monitor", self._monitor, depends_on=("mqtt",))
+
+        heartbeat = self.config.heartbeat
+        self._heartbeat = HeartbeatService(
+            mqtt=self._mqtt,
+            interval=heartbeat.interval,
+            metrics=REGISTRY if heartbeat.metrics else None,
+            adaptive=heartbeat.adaptive,
+            min_interval=heartbeat.min_interval,
+            max_interval=heartbeat.max_interval,
+            stretch_factor=heartbeat.stretch_factor,
+            slow_publish=heartbeat.slow_publish,
         )
+        self._supervisor.add("heartbeat", self._heartbeat, depends_on=("mqtt",))
 
         # self._heartbeat.register_source("health", get_health_info)
 
-    async def shutdown_services(self) -> None:
-        """Shutdown all services gracefully."""
+        if self.config.loop_monitor.enabled:
+            self._loop_monitor = LoopLagMonitor(
+                interval=self.config.loop_monitor.interval,
+                threshold=self.config.loop_monitor.threshold,
+            )
+            self._supervisor.add("loop_monitor", self._loop_monitor)
+            self._heartbeat.register_source("loop", self._loop_monitor.stats)
+            self._stats.register_source("loop", self._loop_monitor.stats)
+
+        if self.config.memory_monitor.enabled:
+            self._supervisor.add("memory_monitor", self._memory_monitor)
+            self._heartbeat.register_source("memory", self._memory_monitor.stats)
+            self._stats.register_source("memory", self._memory_monitor.stats)
+
+        if self.config.app.config_poll_interval > 0:
+            self._supervisor.add(
+                "config_watcher",
+                ConfigWatcher(
+                    CONFIG_FILE,
+                    loader=load_config,
+                    on_change=lambda config: self.apply_config(config, source="file"),
+                    interval=self.config.app.config_poll_interval,
+                ),
+            )
+
+        health = self.config.health
+        # No UNIX sockets on Windows
+        if health.enabled and hasattr(asyncio, "start_unix_server"):
+            self._supervisor.add(
+                "health",
+                HealthServer(
+                    socket_path=health.socket or SETTINGS_DIR / "health.sock",
+                    source=self.health,
+                ),
+            )
+        if health.systemd_notify:
+            notifier = SystemdNotifier(live=self.is_live)
+            # Only when started by systemd
+            if notifier.address is not None:
+                self._notifier = notifier
+                self._supervisor.add("systemd", notifier)
+
+        if self.config.metrics.enabled:
+            self._metrics_server = MetricsServer(
+                renderer=OpenMetricsRenderer(
+                    REGISTRY,
+                    self._stats.all,
+                    namespace="{{cookiecutter.package_dir}}",
+                    cache_ttl=self.config.metrics.cache_ttl,
+                ),
+                host=self.config.metrics.host,
+                port=self.config.metrics.port,
+                socket_path=self.config.metrics.socket,
+                path=self.config.metrics.path,
+            )
+            self._supervisor.add("metrics_server", self._metrics_server)
+
+    async def shutdown_services(self) -> dict:
+        """
+        Drain and stop everything within ``config.app.shutdown_timeout``.
+
+        Incoming messages are ignored from the start, in-flight handlers and
+        commands get to finish, then local services stop (the stats tracker
+        saves one last time) and MQTT disconnects last. Whatever is still
+        running at the deadline is cancelled in that same order.
+
+        Returns what was dropped.
+        """
         logger.info("-" * 40)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.config.app.shutdown_timeout
 
-        if self._mqtt:
-            await self._mqtt.disconnect()
+        def remaining() -> float:
+            return max(deadline - loop.time(), 0)
 
-        if self._heartbeat:
-            await self._heartbeat.stop()
+        dropped = {"messages": 0, "handlers": 0, "commands": [], "services": []}
 
-        # if self._monitor:
-        #     await self._monitor.stop()
+        # 1. Stop intake and let in-flight handlers and commands finish
+        if self._mqtt:
+            self._mqtt.stop_accepting()
+            if not await self._mqtt.drain(remaining()):
+                dropped["handlers"] = self._mqtt.inflight
+        dropped["commands"] = await self._commands.drain(remaining())
+
+        # 2. Stop local services, flushing stats, then MQTT
+        local = [name for name in self._supervisor.status() if name != "mqtt"]
+        dropped["services"] += await self._supervisor.stop(remaining(), names=local)
+        dropped["services"] += await self._supervisor.stop(remaining())
+        if self._mqtt:
+            dropped["messages"] = self._mqtt.dropped
 
-        if self._stats:
-            await self._stats.stop()
+        if any(dropped.values()):
+            logger.warning("Shutdown deadline dropped: %r", dropped)
+        else:
+            logger.info("Drained cleanly with %.1fs to spare", remaining())
+        return dropped
 
     async def run(self):
         """Run the main application loop."""
@@ -183,10 +682,7 @@ class MyApp:
         shutdown.install()
 
         try:
-            await self.setup_mqtt()
-            await self.start_background_tasks()
-            await self.setup_stats()
-            self.restore_stats()
+            await self.startup()
             await shutdown.wait()
             await self.shutdown_services()
         except Exception:
@@ -195,27 +691,61 @@ class MyApp:
         finally:
             await self.cleanup()
 
-    async def cleanup(self) -> None:
-        """Cleanup resources."""
+    async def startup(self) -> None:
+        """
+        Bring up every service without waiting for the broker, then log how
+        long each phase took. The MQTT connection is timed separately, as it
+        completes in the background (or not at all while offline).
+        """
+        started = time.perf_counter()
+        timings = self._startup
+        with _timed(timings, "setup_mqtt"):
+            await self.setup_mqtt()
+        with _timed(timings, "setup_stats"):
+            await self.setup_stats()
+        with _timed(timings, "register_services"):
+            await self.start_background_tasks()
+        with _timed(timings, "start_services"):
+            await self._supervisor.start()
+        with _timed(timings, "restore_stats"):
+            self.restore_stats()
+        timings["total"] = round(time.perf_counter() - started, 4)
+
+        for phase, seconds in timings.items():
+            REGISTRY.gauge(
+                "startup_phase_seconds", "Duration of a startup phase", phase=phase
+            ).set(seconds)
         logger.info(
-            "Waiting for %d running tasks to finish...",
-            len(self._tasks),
+            "Started in %.3fs (%s)",
+            timings["total"],
+            ", ".join(
+                f"{phase} {seconds:.3f}s"
+                for phase, seconds in timings.items()
+                if phase != "total"
+            ),
         )
-        for task in self._tasks:
-            logger.debug("Running task: '%s'", task.get_name())
+        self._spawn(self._time_connection(started))
 
-        try:
-            results = await asyncio.wait_for(
-                asyncio.gather(*self._tasks, return_exceptions=True),
-                timeout=5,
-            )
-            for task, result in zip(self._tasks, results, strict=True):
-                if isinstance(result, Exception):
-                    logger.error(
-                        "Task '%s' raised an exception: %s",
-                        task.get_name(),
-                        result,
-                    )
-            logger.info("All tasks complete. Shutting down cleanly.")
-        except TimeoutError:
-            logger.warning("Tasks did not complete within timeout")
+        self._started = True
+        if self._notifier is not None:
+            self._notifier.ready()
+
+    async def _time_connection(self, started: float) -> None:
+        await self._mqtt.connected_event.wait()
+        seconds = self._startup["mqtt_connected"] = round(
+            time.perf_counter() - started, 4
+        )
+        REGISTRY.gauge(
+            "startup_phase_seconds",
+            "Duration of a startup phase",
+            phase="mqtt_connected",
+        ).set(seconds)
+        logger.info("MQTT connected %.3fs after startup began", seconds)
+
+    async def cleanup(self) -> None:
+        """Stop whatever is still running, e.g. after an error in run()."""
+        for task in self._tasks:
+            task.cancel()
+        await self._supervisor.stop(self.config.app.shutdown_timeout)
+        self._pools.shutdown(wait=False)
+        logger.info("All tasks complete. Shutting down cleanly.")
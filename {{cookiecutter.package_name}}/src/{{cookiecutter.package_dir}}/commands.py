@@ -0,0 +1,483 @@
+import asyncio
+import itertools
+import logging
+import time
+import uuid
+from collections.abc import Awaitable
+from collections.abc import Callable
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+from typing import NoReturn
+
+from .metrics import REGISTRY
+from .metrics import MetricsRegistry
+from .result_cache import ResultCache
+from .services.baseasync import BaseServiceAsync
+from .tracing import trace
+
+logger = logging.getLogger(__name__)
+
+ResultCallback = Callable[[dict], Awaitable[None]]
+
+
+class CommandRejected(Exception):  # noqa: N818
+    """
+    Raised by CommandExecutor.submit() when the queue is full or the
+    priority is not an integer.
+    """
+
+
+@dataclass(eq=False)
+class Command:
+    """A submitted command; ``future`` resolves to its result payload."""
+
+    id: str
+    action: str
+    priority: int
+    factory: Callable[[], Awaitable[Any]] = field(repr=False)
+    submitted: float = field(default_factory=time.perf_counter, repr=False)
+    future: asyncio.Future = field(
+        default_factory=lambda: asyncio.get_running_loop().create_future(),
+        repr=False,
+    )
+    task: asyncio.Task | None = field(default=None, repr=False)
+    state: str = "queued"
+    scope: str | None = None
+    # Further ids submitted for the same pending action, answered alongside
+    aliases: list[str] = field(default_factory=list, repr=False)
+
+
+def _scoped(scope: str | None, key: str) -> str:
+    return f"{scope}/{key}" if scope else key
+
+
+class CommandExecutor(BaseServiceAsync):
+    """
+    Runs commands with a concurrency limit, in priority order.
+
+    - At most one command per action is queued or running; submitting the
+      same action again returns the existing command (single-flight), and
+      its result is also reported (and cached) under the new id
+    - Lower ``priority`` values run first, FIFO within a priority
+    - Submissions beyond ``max_queued`` waiting commands are rejected
+    - Queued and running commands can be cancelled by id or action
+    - With a ``results`` cache, a command id acts as idempotency key: a
+      repeat of a successful command returns its cached result, a repeat
+      of a pending one attaches to it; failed commands run again
+    - Every outcome is passed to ``on_result`` as a JSON-friendly dict
+    - An optional ``scope`` (e.g. a device id) namespaces ids and actions,
+      so the same action in different scopes runs independently; it is
+      included in the result as "scope"
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        *,
+        max_concurrent: int = 4,
+        max_queued: int = 100,
+        default_priority: int = 5,
+        priorities: dict[str, int] | None = None,
+        on_result: ResultCallback | None = None,
+        results: ResultCache | None = None,
+        metrics: MetricsRegistry | None = None,
+    ):
+        """
+        :param max_concurrent: commands running at the same time
+        :param max_queued: commands waiting to run before rejecting
+        :param default_priority: priority of actions not in ``priorities``
+        :param priorities: per-action priority, lower runs first
+        :param on_result: ``async on_result(payload)`` called for every
+            finished, failed, cancelled or rejected command
+        :param results: cache of finished results keyed by command id
+        """
+        super().__init__()
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.default_priority = default_priority
+        self.priorities = dict(priorities or {})
+        self.on_result = on_result
+        self.results = results
+        self._queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._seq = itertools.count()
+        # Queued or running, by (scoped) id and action
+        self._commands: dict[str, Command] = {}
+        self._by_action: dict[str, Command] = {}
+        self._aliases: dict[str, Command] = {}
+        self._idle = asyncio.Event()
+        self._idle.set()
+        # on_result calls in flight, referenced until done
+        self._publishing: set[asyncio.Task] = set()
+        # Loop time by which drain() and cleanup() must be done, once draining
+        self._deadline: float | None = None
+
+        self._metrics = metrics or REGISTRY
+        self._m_queue_depth = self._metrics.gauge(
+            "command_queue_depth", "Commands waiting to run"
+        )
+        self._m_queue_wait = self._metrics.histogram(
+            "command_queue_wait_seconds", "Time commands spent queued"
+        )
+        self._m_cache_hits = self._metrics.counter(
+            "command_cache_hits", "Repeated commands answered from the cache"
+        )
+        self._action_metrics: dict[str, dict] = {}
+
+    def _get_metrics(self, action: str) -> dict:
+        """Return the per-action metrics, creating them on first use."""
+        metrics = self._action_metrics.get(action)
+        if metrics is None:
+            m = self._metrics
+            metrics = self._action_metrics[action] = {
+                "executed": m.counter(
+                    "commands_executed", "Commands run", action=action
+                ),
+                "errors": m.counter("command_errors", "Commands failed", action=action),
+                "rejected": m.counter(
+                    "commands_rejected", "Commands rejected", action=action
+                ),
+                "cancelled": m.counter(
+                    "commands_cancelled", "Commands cancelled", action=action
+                ),
+                "deduplicated": m.counter(
+                    "commands_deduplicated",
+                    "Submissions joined to a pending command",
+                    action=action,
+                ),
+                "duration": m.histogram(
+                    "command_seconds", "Command run time", action=action
+                ),
+            }
+        return metrics
+
+    # --------------------------------------------------------------------------
+    # Submission
+    # --------------------------------------------------------------------------
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for c in self._commands.values() if c.state == "queued")
+
+    @property
+    def running(self) -> int:
+        return sum(1 for c in self._commands.values() if c.state == "running")
+
+    def get(self, key: str, scope: str | None = None) -> Command | None:
+        """Return a queued or running command by id or action."""
+        key = _scoped(scope, key)
+        return (
+            self._commands.get(key)
+            or self._aliases.get(key)
+            or self._by_action.get(key)
+        )
+
+    def submit(
+        self,
+        action: str,
+        factory: Callable[[], Awaitable[Any]],
+        *,
+        command_id: str | None = None,
+        priority: int | None = None,
+        scope: str | None = None,
+    ) -> Command:
+        """
+        Queue ``factory()`` to run as command ``action``.
+
+        Returns the queued command, the already pending command for the
+        same id or action, or a finished command holding the cached result
+        for ``command_id``. Raises CommandRejected when the queue is full or
+        ``priority`` is not an integer.
+        """
+        metrics = self._get_metrics(action)
+        try:
+            priority = self._priority(action, priority)
+        except (TypeError, ValueError):
+            msg = f"Invalid priority {priority!r}, rejected '{action}'"
+            self._reject(command_id, action, scope, msg)
+
+        if command_id is not None:
+            cached = self._from_cache(action, command_id, scope)
+            if cached is not None:
+                return cached
+        pending = self._by_action.get(_scoped(scope, action))
+        if command_id is not None:
+            key = _scoped(scope, command_id)
+            pending = self._commands.get(key) or self._aliases.get(key) or pending
+        if pending is not None:
+            metrics["deduplicated"].inc()
+            if command_id not in (None, pending.id, *pending.aliases):
+                pending.aliases.append(command_id)
+                self._aliases[_scoped(scope, command_id)] = pending
+            logger.info(
+                "Command '%s' already %s (id=%s)", action, pending.state, pending.id
+            )
+            return pending
+
+        if self.queued >= self.max_queued:
+            msg = f"Command queue full ({self.max_queued}), rejected '{action}'"
+            self._reject(command_id, action, scope, msg)
+
+        command = Command(
+            id=command_id or uuid.uuid4().hex[:12],
+            action=action,
+            priority=priority,
+            factory=factory,
+            scope=scope,
+        )
+        self._queue.put_nowait((priority, next(self._seq), command))
+        self._commands[_scoped(scope, command.id)] = command
+        self._by_action[_scoped(scope, action)] = command
+        self._idle.clear()
+        self._m_queue_depth.set(self.queued)
+        logger.debug("Queued command %r", command)
+        return command
+
+    def _priority(self, action: str, priority: Any) -> int:
+        """Return the priority to queue ``action`` with, as an int."""
+        if priority is None:
+            return self.priorities.get(action, self.default_priority)
+        # Comes straight from the payload; the heap can only order ints
+        if isinstance(priority, bool) or not isinstance(priority, int | str):
+            msg = f"Priority must be an integer, not {type(priority).__name__}"
+            raise TypeError(msg)
+        return int(priority)
+
+    def _reject(
+        self, command_id: str | None, action: str, scope: str | None, msg: str
+    ) -> NoReturn:
+        """Report a rejected submission and raise CommandRejected."""
+        self._get_metrics(action)["rejected"].inc()
+        self._publish_result(_result(command_id, action, scope, "rejected", error=msg))
+        raise CommandRejected(msg)
+
+    def _from_cache(
+        self, action: str, command_id: str, scope: str | None
+    ) -> Command | None:
+        """Return a finished command for a cached ``command_id``."""
+        if self.results is None:
+            return None
+        result = self.results.get(_scoped(scope, command_id))
+        if result is None:
+            return None
+        if result.get("action") != action:
+            logger.warning(
+                "Command id %s reused for '%s', was '%s'",
+                command_id,
+                action,
+                result.get("action"),
+            )
+            return None
+
+        self._m_cache_hits.inc()
+        logger.info("Command '%s' answered from cache (id=%s)", action, command_id)
+        result = {**result, "cached": True}
+        command = Command(
+            id=command_id,
+            action=action,
+            priority=0,
+            factory=None,
+            state=result["status"],
+            scope=scope,
+        )
+        command.future.set_result(result)
+        self._publish_result(result)
+        return command
+
+    def cancel(self, key: str, scope: str | None = None) -> Command | None:
+        """Cancel a queued or running command by id or action."""
+        command = self.get(key, scope)
+        if command is None:
+            return None
+        self._cancel(command)
+        return command
+
+    def _cancel(self, command: Command) -> None:
+        if command.state == "running" and command.task is not None:
+            command.task.cancel()
+        elif command.state == "queued":
+            # Left in the heap and skipped by the workers
+            self._finish(command, "cancelled")
+
+    def cancel_all(self) -> list[Command]:
+        """Cancel every queued and running command."""
+        commands = list(self._commands.values())
+        for command in commands:
+            self._cancel(command)
+        return commands
+
+    async def drain(
+        self,
+        timeout: float,  # noqa: ASYNC109
+        grace: float = 1.0,
+    ) -> list[str]:
+        """
+        Wait for all commands to finish, then cancel the rest. Returns the
+        ids of cancelled commands.
+
+        :param timeout: total seconds allowed; cleanup() honours the same
+            deadline when it flushes the last results
+        :param grace: part of ``timeout`` (at most half) left for cancelled
+            commands to unwind
+        """
+        loop = asyncio.get_running_loop()
+        self._deadline = loop.time() + timeout
+        grace = min(grace, timeout / 2)
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout - grace)
+        except TimeoutError:
+            cancelled = [command.id for command in self.cancel_all()]
+            # Give the cancelled tasks a chance to unwind
+            running = [command.future for command in self._commands.values()]
+            if running:
+                await asyncio.wait(running, timeout=self._remaining(grace))
+            return cancelled
+        return []
+
+    def _remaining(self, limit: float) -> float:
+        """Seconds left before the drain deadline, at most ``limit``."""
+        if self._deadline is None:
+            return limit
+        return min(max(self._deadline - asyncio.get_running_loop().time(), 0), limit)
+
+    # --------------------------------------------------------------------------
+    # Execution
+    # --------------------------------------------------------------------------
+
+    def _finish(self, command: Command, status: str, **extra) -> dict:
+        """Record the outcome of a command and release its slot."""
+        command.state = status
+        self._commands.pop(_scoped(command.scope, command.id), None)
+        for alias in command.aliases:
+            self._aliases.pop(_scoped(command.scope, alias), None)
+        action_key = _scoped(command.scope, command.action)
+        if self._by_action.get(action_key) is command:
+            del self._by_action[action_key]
+        if not self._commands:
+            self._idle.set()
+        self._m_queue_depth.set(self.queued)
+
+        if status == "cancelled":
+            self._get_metrics(command.action)["cancelled"].inc()
+        results = [
+            _result(command_id, command.action, command.scope, status, **extra)
+            for command_id in (command.id, *command.aliases)
+        ]
+        if not command.future.done():
+            command.future.set_result(results[0])
+            for result in results:
+                self._publish_result(result)
+        # Errors may be transient, so a retry with the same id runs again
+        if self.results is not None and status == "ok":
+            for result in results:
+                self.results.put(_scoped(command.scope, result["id"]), result)
+        return results[0]
+
+    def _publish_result(self, result: dict) -> None:
+        if self.on_result is None:
+            return
+        task = asyncio.ensure_future(self.on_result(result))
+        self._publishing.add(task)
+        task.add_done_callback(self._publishing.discard)
+        task.add_done_callback(_log_callback_error)
+
+    async def _execute(self, command: Command) -> None:
+        # The command task inherits the transaction, so its own spans nest
+        with trace("command", f"command {command.action}"):
+            await self._run(command)
+
+    async def _run(self, command: Command) -> None:
+        metrics = self._get_metrics(command.action)
+        started = time.perf_counter()
+        self._m_queue_wait.observe(started - command.submitted)
+        command.state = "running"
+        command.task = asyncio.create_task(
+            command.factory(), name=f"command:{command.action}:{command.id}"
+        )
+        try:
+            await asyncio.wait({command.task})
+        except asyncio.CancelledError:
+            # The worker itself is being cancelled, take the command with it
+            command.task.cancel()
+            self._finish(command, "cancelled")
+            raise
+
+        duration = time.perf_counter() - started
+        if command.task.cancelled():
+            logger.info("Command '%s' cancelled (id=%s)", command.action, command.id)
+            self._finish(command, "cancelled", duration=duration)
+            return
+
+        metrics["executed"].inc()
+        metrics["duration"].observe(duration)
+        if (error := command.task.exception()) is not None:
+            metrics["errors"].inc()
+            logger.error(
+                "Command '%s' failed (id=%s): %s", command.action, command.id, error
+            )
+            self._finish(command, "error", error=str(error), duration=duration)
+        else:
+            logger.info(
+                "Command '%s' completed in %.3fs (id=%s)",
+                command.action,
+                duration,
+                command.id,
+            )
+            self._finish(command, "ok", result=command.task.result(), duration=duration)
+
+    async def _worker(self) -> None:
+        while True:
+            _, _, command = await self._queue.get()
+            if command.state != "queued":
+                continue
+            await self._execute(command)
+
+    # --------------------------------------------------------------------------
+    # Service
+    # --------------------------------------------------------------------------
+
+    async def setup(self):
+        if self.results is not None:
+            await self.results.load()
+
+    async def run(self):
+        logger.info(
+            "%s started with %d workers", self.__class__.__name__, self.max_concurrent
+        )
+        workers = [
+            asyncio.create_task(self._worker(), name=f"command_worker_{i}")
+            for i in range(self.max_concurrent)
+        ]
+        try:
+            await self._shutdown_event.wait()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def cleanup(self):
+        for command in self.cancel_all():
+            logger.warning("Dropped command '%s' (id=%s)", command.action, command.id)
+        if self._publishing:
+            # Let the last results go out, without hanging on a dead broker
+            _, pending = await asyncio.wait(
+                set(self._publishing), timeout=self._remaining(1.0)
+            )
+            for task in pending:
+                task.cancel()
+        if self.results is not None:
+            await self.results.save()
+
+
+def _result(
+    command_id: str | None, action: str, scope: str | None, status: str, **extra
+) -> dict:
+    result = {"id": command_id, "action": action, "status": status}
+    if scope:
+        result["scope"] = scope
+    result.update(extra)
+    return result
+
+
+def _log_callback_error(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Error publishing command result: %s", task.exception())
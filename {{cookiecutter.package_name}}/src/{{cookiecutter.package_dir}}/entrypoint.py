@@ -1,9 +1,12 @@
 import asyncio
+import functools
 import logging
 import os
 import sys
 
 from .app import MyApp
+from .gateway import GatewayApp
+from .workers import LeaderApp
 
 logger = logging.getLogger(__name__)
 
@@ -15,16 +18,53 @@ def setup_windows_event_loop() -> None:
         logger.debug("Set Windows Selector event loop policy")
 
 
-async def main(config) -> None:
+def get_loop_factory(use_uvloop: bool):
+    """Return uvloop's loop factory if requested and available, else None."""
+    if not use_uvloop:
+        return None
+    if sys.platform.lower() == "win32":
+        logger.warning("uvloop is not supported on Windows, using asyncio")
+        return None
+    try:
+        import uvloop  # noqa: PLC0415
+    except ImportError:
+        logger.warning("uvloop requested but not installed, using asyncio")
+        return None
+    logger.info("Using uvloop %s", uvloop.__version__)
+    return uvloop.new_event_loop
+
+
+def create_app(config, log_level: str = "INFO") -> MyApp:
+    """Return the app for the mode ``config`` selects."""
+    if config.workers.count > 0:
+        if config.gateway.devices:
+            msg = "Worker processes can't be combined with gateway mode"
+            raise ValueError(msg)
+        if config.commands.persist_results:
+            # Each worker has its own cache, so one file can't hold them
+            msg = "Worker processes can't be combined with persist_results"
+            raise ValueError(msg)
+        return LeaderApp(config, log_level=log_level)
+    if config.gateway.devices:
+        return GatewayApp(config)
+    return MyApp(config)
+
+
+async def main(config, app_factory=create_app) -> None:
     """Main entry point."""
-    app = MyApp(config)
+    app = app_factory(config)
     await app.run()
 
 
-def run(config):
+def run(config, *, log_level: str = "INFO", app_factory=None):
     """Run the application."""
+    if app_factory is None:
+        app_factory = functools.partial(create_app, log_level=log_level)
     setup_windows_event_loop()
-    asyncio.run(main(config))
+    with asyncio.Runner(
+        loop_factory=get_loop_factory(use_uvloop=config.app.uvloop)
+    ) as runner:
+        runner.run(main(config, app_factory))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,234 @@
+"""
+Gateway mode: many device identities served by one process.
+
+Every device gets its own ``<prefix>/<device_id>/...`` topics (command,
+command/result, heartbeat, status, message) but they all share the one
+MQTT connection, the command executor and the executor pools of the
+process. Commands are run in the device's scope, so the same action or
+command id on two devices never dedupes, cancels or answers from cache
+across devices.
+
+The gateway's own ``[mqtt] device_id`` keeps the config topic, the
+aggregate heartbeat and the last will; a broker only allows one will per
+connection, so device statuses are set to "offline" on a clean shutdown
+and are otherwise covered by the gateway's status.
+"""
+
+import logging
+import time
+from dataclasses import dataclass
+from dataclasses import field
+
+from .app import TOPIC_PREFIX
+from .app import MyApp
+from .services.baseasync import BaseServiceAsync
+
+logger = logging.getLogger(__name__)
+
+
+class DeviceMqtt:
+    """
+    The MQTT client as seen by one device: the same publishing interface
+    as AsyncMqttClient, on the device's topics, over the shared client.
+    """
+
+    __slots__ = ("_client", "base_topic")
+
+    def __init__(self, client, base_topic: str):
+        self._client = client
+        self.base_topic = base_topic.rstrip("/")
+
+    @property
+    def connected_event(self):
+        return self._client.connected_event
+
+    def build_topic(self, topic: str) -> str:
+        return f"{self.base_topic}/{topic.lstrip('/')}"
+
+    async def publish_json(self, topic, payload=None, qos=0, retain=False):
+        await self._client.publish_json(topic, payload, qos=qos, retain=retain)
+
+    async def send_status(self, state: str):
+        await self.publish_json(
+            self.build_topic("status"), {"state": state}, qos=1, retain=True
+        )
+
+    async def send_message(self, message, extra=None, error=False):
+        payload = {"message": message}
+        if extra:
+            payload.update(extra)
+        if error:
+            payload["is_error"] = True
+        await self.publish_json(self.build_topic("message"), payload, qos=2)
+
+
+@dataclass(slots=True)
+class Device:
+    """One identity served by the gateway and its own counters."""
+
+    device_id: str
+    mqtt: DeviceMqtt
+    commands: int = 0
+    results: dict[str, int] = field(default_factory=dict)
+
+    def count_result(self, status: str) -> None:
+        self.results[status] = self.results.get(status, 0) + 1
+
+    def stats(self) -> dict:
+        return {"commands": self.commands, "results": dict(self.results)}
+
+
+class GatewayHeartbeat(BaseServiceAsync):
+    """
+    Publishes a retained heartbeat for every device from a single task.
+
+    Publishes are spread evenly across ``interval`` instead of bursting all
+    devices at once, so a thousand devices cost one task and a steady
+    trickle of small messages.
+    """
+
+    def __init__(self, *, mqtt, devices: dict[str, Device], interval: float = 30.0):
+        super().__init__()
+        self._mqtt = mqtt
+        self.devices = devices
+        self.interval = interval
+
+    async def announce(self, state: str) -> None:
+        """Publish the retained status of every device."""
+        for device in self.devices.values():
+            await device.mqtt.send_status(state)
+
+    async def setup(self):
+        pass
+
+    async def cleanup(self):
+        if self._mqtt.connected_event.is_set():
+            try:
+                await self.announce("offline")
+            except Exception:
+                logger.exception("Error publishing device statuses")
+
+    async def run(self):
+        logger.info(
+            "%s started for %d devices (every %.0fs)",
+            self.__class__.__name__,
+            len(self.devices),
+            self.interval,
+        )
+        while not self.is_shutdown():
+            started = time.monotonic()
+            devices = list(self.devices.values())
+            if not devices:
+                await self.wait_or_timeout(self.interval)
+                continue
+            step = self.interval / len(devices)
+            for i, device in enumerate(devices):
+                if self._mqtt.connected_event.is_set():
+                    try:
+                        await device.mqtt.publish_json(
+                            device.mqtt.build_topic("heartbeat"),
+                            {"timestamp": time.time(), **device.stats()},
+                            qos=0,
+                            retain=True,
+                        )
+                    except Exception:
+                        logger.exception("Error in heartbeat of %s", device.device_id)
+                delay = started + (i + 1) * step - time.monotonic()
+                if delay > 0 and await self.wait_or_timeout(delay):
+                    break
+                if self.is_shutdown():
+                    break
+        logger.info("%s stopped", self.__class__.__name__)
+
+
+class GatewayApp(MyApp):
+    """MyApp serving every device in ``config.gateway.devices``."""
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.devices: dict[str, Device] = {}
+        self._device_heartbeat: GatewayHeartbeat | None = None
+
+    @staticmethod
+    def topic_label(topic: str) -> str:
+        """Collapse the device segment so metrics don't grow per device."""
+        prefix, sep, rest = topic.partition(f"{TOPIC_PREFIX}/")
+        if prefix or not sep:
+            return topic
+        _, sep, tail = rest.partition("/")
+        return f"{TOPIC_PREFIX}/+/{tail}" if sep else topic
+
+    def device_for(self, topic: str) -> Device | None:
+        """Return the device whose topics ``topic`` belongs to."""
+        prefix = f"{TOPIC_PREFIX}/"
+        if not topic.startswith(prefix):
+            return None
+        device_id = topic[len(prefix) :].partition("/")[0]
+        return self.devices.get(device_id)
+
+    async def setup_mqtt(self) -> None:
+        await super().setup_mqtt()
+
+        subscriptions = []
+        handlers = {}
+        for device_id in dict.fromkeys(self.config.gateway.devices):
+            mqtt = DeviceMqtt(self._mqtt, f"{TOPIC_PREFIX}/{device_id}")
+            self.devices[device_id] = Device(device_id, mqtt)
+            command_topic = mqtt.build_topic("command")
+            subscriptions.append((command_topic, 1))
+            handlers[command_topic] = self.handle_device_command
+        await self._mqtt.add_subscriptions(subscriptions)
+        self._mqtt.add_message_handlers(handlers)
+        logger.info("Gateway serving %d devices", len(self.devices))
+
+    async def handle_device_command(self, data: dict, topic: str) -> None:
+        """Handle a command sent to one of the devices."""
+        device = self.device_for(topic)
+        if device is None:
+            logger.warning("No device for topic: %s", topic)
+            return
+        device.commands += 1
+        await self.dispatch_command(
+            {**data, "device_id": device.device_id},
+            device.mqtt,
+            scope=device.device_id,
+        )
+
+    async def publish_command_result(self, result: dict) -> None:
+        """Publish a result on the topic of the device that sent the command."""
+        device = self.devices.get(result.get("scope"))
+        if device is None:
+            await super().publish_command_result(result)
+            return
+        device.count_result(result["status"])
+        await device.mqtt.publish_json(
+            device.mqtt.build_topic("command/result"), result, qos=1
+        )
+
+    def gateway_stats(self) -> dict:
+        """Totals over all devices."""
+        results: dict[str, int] = {}
+        for device in self.devices.values():
+            for status, count in device.results.items():
+                results[status] = results.get(status, 0) + count
+        return {
+            "devices": len(self.devices),
+            "commands": sum(device.commands for device in self.devices.values()),
+            "results": results,
+        }
+
+    async def start_background_tasks(self) -> None:
+        await super().start_background_tasks()
+
+        self._device_heartbeat = GatewayHeartbeat(
+            mqtt=self._mqtt,
+            devices=self.devices,
+            interval=self.config.gateway.heartbeat_interval,
+        )
+        # Device statuses are retained, so (re)announce them on every connect
+        self._mqtt.on_post_connect = lambda: self._device_heartbeat.announce("online")
+        self._supervisor.add(
+            "device_heartbeat", self._device_heartbeat, depends_on=("mqtt",)
+        )
+        self._heartbeat.register_source("gateway", self.gateway_stats)
+        self._stats.register_source("gateway", self.gateway_stats)
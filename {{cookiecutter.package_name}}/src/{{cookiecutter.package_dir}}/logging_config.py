@@ -1,16 +1,200 @@
+"""
+Logging setup.
+
+The root logger gets a single QueueHandler, so a log call on the event loop
+only merges the message and enqueues the record. A listener thread does
+the formatting, Rich rendering and file I/O (including rollover). The
+queue is bounded; when it is full, records are dropped according to the
+overflow policy and counted.
+
+Hot-path messages can opt into rate limiting with
+``extra={"rate_limit": key}``; see RateLimitFilter.
+"""
+
+import atexit
 import logging
 import logging.handlers
+import queue
+import time
+from collections.abc import Callable
+from contextlib import suppress
 from pathlib import Path
 
 from rich.logging import RichHandler
 
+from .metrics import REGISTRY
+from .metrics import MetricsRegistry
+from .ratelimit import RateLimiter
+
+OVERFLOW_POLICIES = ("drop_new", "drop_oldest", "block")
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler for a bounded queue with an overflow policy.
+
+    - ``drop_new``: discard the record being logged
+    - ``drop_oldest``: discard the oldest queued record to make room
+    - ``block``: wait for room (stalls the caller, e.g. the event loop)
+    """
+
+    def __init__(
+        self,
+        log_queue: queue.Queue,
+        overflow: str = "drop_oldest",
+        metrics: MetricsRegistry | None = None,
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            msg = f"Unknown overflow policy '{overflow}', expected {OVERFLOW_POLICIES}"
+            raise ValueError(msg)
+        super().__init__(log_queue)
+        self.overflow = overflow
+        self.dropped: dict[str, int] = {}
+        self._metrics = metrics or REGISTRY
+
+    def _count_drop(self, record: logging.LogRecord) -> None:
+        self.dropped[record.levelname] = self.dropped.get(record.levelname, 0) + 1
+        self._metrics.counter(
+            "log_records_dropped",
+            "Log records dropped because the queue was full",
+            level=record.levelname,
+        ).inc()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Merge the arguments into the message so later changes to them don't
+        show up in the log, but leave formatting to the listener. Unlike the
+        base class, exc_info is kept for Rich tracebacks.
+        """
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.overflow == "block":
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if self.overflow == "drop_new":
+                self._count_drop(record)
+                return
+            with suppress(queue.Empty):
+                self._count_drop(self.queue.get_nowait())
+            try:
+                self.queue.put_nowait(record)
+            except queue.Full:
+                self._count_drop(record)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Rate-limits records that carry a ``rate_limit`` key.
+
+    At most ``limit`` records per key are let through every ``period``
+    seconds; the first one after a suppressed burst is suffixed with
+    "(suppressed N similar)". A burst that ends without a later record is
+    reported by summaries() instead, which the log listener polls. Records
+    without the key pass untouched.
+    """
+
+    def __init__(self, limit: int = 5, period: float = 60.0):
+        super().__init__()
+        self.limiter = RateLimiter(limit, period)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = getattr(record, "rate_limit", None)
+        if key is None:
+            return True
+        suppressed = self.limiter.hit(key, record)
+        if suppressed is None:
+            return False
+        if suppressed:
+            record.msg = f"{record.msg} (suppressed {suppressed} similar)"
+        return True
+
+    def summaries(self) -> list[logging.LogRecord]:
+        """Return a summary record for every ended, unreported burst."""
+        records = []
+        for suppressed, record in self.limiter.flush().values():
+            summary = logging.makeLogRecord(record.__dict__)
+            summary.msg = f"Suppressed {suppressed} similar: {record.getMessage()}"
+            summary.args = None
+            summary.exc_info = summary.exc_text = None
+            records.append(summary)
+        return records
+
+
+class _LogListener(logging.handlers.QueueListener):
+    """Also handles the records of ``summaries()`` every ``flush_interval``."""
 
-def setup_logger(
+    def __init__(
+        self,
+        log_queue: queue.Queue,
+        *handlers: logging.Handler,
+        summaries: Callable[[], list[logging.LogRecord]] | None = None,
+        flush_interval: float = 1.0,
+        respect_handler_level: bool = False,
+    ):
+        super().__init__(
+            log_queue, *handlers, respect_handler_level=respect_handler_level
+        )
+        self.summaries = summaries
+        self.flush_interval = flush_interval
+        self._next_flush = time.monotonic() + flush_interval
+
+    def dequeue(self, block: bool) -> logging.LogRecord:
+        # Wake up at least every flush_interval, even while nothing is logged
+        while True:
+            self._flush()
+            try:
+                return self.queue.get(block, timeout=self.flush_interval)
+            except queue.Empty:
+                if not block:
+                    raise
+
+    def _flush(self) -> None:
+        now = time.monotonic()
+        if self.summaries is None or now < self._next_flush:
+            return
+        self._next_flush = now + self.flush_interval
+        for record in self.summaries():
+            self.handle(record)
+
+    def enqueue_sentinel(self) -> None:
+        # put_nowait() would fail on a full queue; wait for the thread instead
+        self.queue.put(self._sentinel)
+
+
+_handler: BoundedQueueHandler | None = None
+_listener: _LogListener | None = None
+
+
+def setup_logger(  # noqa: PLR0913
     name: str,
     log_file: Path,
     console_level: str = "INFO",
     file_level: str = "DEBUG",
+    *,
+    queue_size: int = 10_000,
+    overflow: str = "drop_oldest",
+    rate_limit: int = 5,
+    rate_period: float = 60.0,
 ) -> None:
+    """
+    Log to the console (Rich) and a rotating ``log_file`` from a listener
+    thread.
+
+    :param queue_size: records buffered for the listener thread
+    :param overflow: what to do when the queue is full, see
+        BoundedQueueHandler
+    :param rate_limit: records per ``rate_period`` seconds allowed for each
+        ``rate_limit`` key, see RateLimitFilter
+    """
+    global _handler, _listener  # noqa: PLW0603
+
     # Ensure the log directory exists
     if not log_file.parent.exists():
         log_file.parent.mkdir(parents=True, exist_ok=True)
@@ -21,6 +205,7 @@ def setup_logger(
     logger.setLevel(logging.DEBUG)
 
     # Remove any existing handlers
+    stop_logging()
     for handler in logger.handlers[:]:
         logger.removeHandler(handler)
 
@@ -35,7 +220,6 @@ def setup_logger(
     )
     console_formatter = logging.Formatter("%(message)s", datefmt=datefmt)
     console_handler.setFormatter(console_formatter)
-    logger.addHandler(console_handler)
 
     # Rotating file handler
     file_handler = logging.handlers.RotatingFileHandler(
@@ -49,7 +233,20 @@ def setup_logger(
         datefmt=datefmt,
     )
     file_handler.setFormatter(file_formatter)
-    logger.addHandler(file_handler)
+
+    # Both run in the listener thread, the root logger only enqueues
+    rate_filter = RateLimitFilter(rate_limit, rate_period)
+    _handler = BoundedQueueHandler(queue.Queue(maxsize=queue_size), overflow)
+    _handler.addFilter(rate_filter)
+    _listener = _LogListener(
+        _handler.queue,
+        console_handler,
+        file_handler,
+        summaries=rate_filter.summaries,
+        respect_handler_level=True,
+    )
+    _listener.start()
+    logger.addHandler(_handler)
 
     # Set up package logger
     package_logger = logging.getLogger(name)
@@ -60,3 +257,41 @@ def setup_logger(
     logging.getLogger("matplotlib").setLevel(logging.WARNING)
     logging.getLogger("asyncio").setLevel(logging.WARNING)
     logging.getLogger("pygame").setLevel(logging.ERROR)
+
+
+def logging_stats() -> dict:
+    """Return the queue depth and dropped record counts by level."""
+    if _handler is None:
+        return {}
+    return {"queued": _handler.queue.qsize(), "dropped": dict(_handler.dropped)}
+
+
+def stop_logging() -> None:
+    """
+    Write out all queued records and stop the listener thread.
+
+    The handlers are then attached to the root logger directly, so anything
+    logged later (e.g. during interpreter exit) is still written.
+    """
+    global _handler, _listener  # noqa: PLW0603
+    if _listener is None:
+        return
+    handler, listener = _handler, _listener
+    _handler = _listener = None
+    listener.stop()
+
+    root = logging.getLogger()
+    root.removeHandler(handler)
+    for target in listener.handlers:
+        root.addHandler(target)
+    logger = logging.getLogger(__name__)
+    if handler.dropped:
+        logger.warning("Dropped log records: %r", handler.dropped)
+    for rate_filter in handler.filters:
+        if isinstance(rate_filter, RateLimitFilter) and (
+            pending := rate_filter.limiter.pending()
+        ):
+            logger.warning("Suppressed log records by key: %r", pending)
+
+
+atexit.register(stop_logging)
@@ -0,0 +1,253 @@
+import math
+import threading
+from array import array
+
+
+def format_key(name: str, labels: tuple[tuple[str, str], ...]) -> str:
+    """Return ``name`` or ``name{key="value",...}`` for labelled metrics."""
+    if not labels:
+        return name
+    pairs = ",".join(f'{key}="{value}"' for key, value in labels)
+    return name + "{" + pairs + "}"
+
+
+class Counter:
+    """Monotonically increasing value."""
+
+    __slots__ = ("description", "labels", "name", "value")
+
+    kind = "counter"
+
+    def __init__(self, name: str, description: str = "", labels=()):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.value = 0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def snapshot(self, reset: bool = False) -> float:
+        value = self.value
+        if reset:
+            self.value = 0
+        return value
+
+
+class Gauge:
+    """Value that can go up and down."""
+
+    __slots__ = ("description", "labels", "name", "value")
+
+    kind = "gauge"
+
+    def __init__(self, name: str, description: str = "", labels=()):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.value = 0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        self.value -= amount
+
+    def snapshot(self, reset: bool = False) -> float:
+        # Gauges describe current state, so there is nothing to reset
+        return self.value
+
+
+class Histogram:
+    """
+    Log-bucketed histogram in the spirit of HdrHistogram.
+
+    Each power of two is split into ``2**precision`` linear sub-buckets, so
+    the relative error of a reported percentile is bounded by
+    ``1 / 2**precision`` over the whole range. Buckets are a preallocated
+    array; recording a value does not allocate.
+    """
+
+    __slots__ = (
+        "_counts",
+        "_max_exp",
+        "_min_exp",
+        "_sub",
+        "count",
+        "description",
+        "labels",
+        "max",
+        "min",
+        "name",
+        "sum",
+    )
+
+    kind = "histogram"
+
+    def __init__(  # noqa: PLR0913
+        self,
+        name: str,
+        description: str = "",
+        labels=(),
+        *,
+        lowest: float = 1e-6,
+        highest: float = 1e6,
+        precision: int = 3,
+    ):
+        """
+        :param lowest: smallest distinguishable value, anything below lands
+            in the first bucket
+        :param highest: largest distinguishable value, anything above lands
+            in the last bucket
+        :param precision: log2 of the number of sub-buckets per power of two
+        """
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self._sub = 1 << precision
+        self._min_exp = math.frexp(lowest)[1]
+        self._max_exp = math.frexp(highest)[1]
+        size = (self._max_exp - self._min_exp + 1) * self._sub
+        self._counts = array("Q", [0]) * size
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def observe(self, value: float) -> None:
+        """Record a single value."""
+        self.count += 1
+        self.sum += value
+        if value < self.min:  # noqa: PLR1730
+            self.min = value
+        if value > self.max:  # noqa: PLR1730
+            self.max = value
+
+        mantissa, exp = math.frexp(value)
+        if exp < self._min_exp or value <= 0:
+            index = 0
+        elif exp > self._max_exp:
+            index = len(self._counts) - 1
+        else:
+            index = (exp - self._min_exp) * self._sub + int(
+                (mantissa - 0.5) * 2 * self._sub
+            )
+        self._counts[index] += 1
+
+    def _bucket_value(self, index: int) -> float:
+        """Midpoint of bucket ``index``."""
+        exp, sub = divmod(index, self._sub)
+        lower = math.ldexp(0.5 + sub / (2 * self._sub), exp + self._min_exp)
+        upper = math.ldexp(0.5 + (sub + 1) / (2 * self._sub), exp + self._min_exp)
+        return (lower + upper) / 2
+
+    def percentile(self, q: float) -> float:
+        """Return the value at percentile ``q`` (0-100)."""
+        if self.count == 0:
+            return 0.0
+        rank = max(1, math.ceil(self.count * q / 100))
+        seen = 0
+        for index, count in enumerate(self._counts):
+            seen += count
+            if seen >= rank:
+                if index == 0:
+                    return self.min
+                if index == len(self._counts) - 1:
+                    return self.max
+                return min(max(self._bucket_value(index), self.min), self.max)
+        return self.max
+
+    def reset(self) -> None:
+        for index in range(len(self._counts)):
+            self._counts[index] = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def snapshot(self, reset: bool = False) -> dict:
+        if self.count:
+            data = {
+                "count": self.count,
+                "sum": self.sum,
+                "min": self.min,
+                "max": self.max,
+                "mean": self.sum / self.count,
+                "p50": self.percentile(50),
+                "p90": self.percentile(90),
+                "p99": self.percentile(99),
+            }
+        else:
+            data = {"count": 0, "sum": 0.0}
+        if reset:
+            self.reset()
+        return data
+
+
+class MetricsRegistry:
+    """
+    Get-or-create store of metric primitives.
+
+    Look metrics up once (e.g. in ``__init__``) and keep the returned object;
+    recording into it is then a plain attribute update.
+    """
+
+    def __init__(self):
+        self._metrics: dict[tuple, Counter | Gauge | Histogram] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name: str, description: str, labels: dict, **kwargs):
+        label_items = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        key = (name, label_items)
+        metric = self._metrics.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(key)
+                if metric is None:
+                    metric = cls(name, description, label_items, **kwargs)
+                    self._metrics[key] = metric
+        if not isinstance(metric, cls):
+            msg = f"Metric '{name}' already registered as a {metric.kind}"
+            raise TypeError(msg)
+        return metric
+
+    def counter(self, name: str, description: str = "", **labels) -> Counter:
+        return self._get(Counter, name, description, labels)
+
+    def gauge(self, name: str, description: str = "", **labels) -> Gauge:
+        return self._get(Gauge, name, description, labels)
+
+    def histogram(
+        self, name: str, description: str = "", *, buckets=None, **labels
+    ) -> Histogram:
+        """
+        Get or create a histogram.
+
+        Args:
+            buckets: optional dict of ``lowest``/``highest``/``precision``
+                used when the histogram is first created
+        """
+        return self._get(Histogram, name, description, labels, **(buckets or {}))
+
+    def collect(self) -> list[Counter | Gauge | Histogram]:
+        """Return all registered metrics."""
+        return list(self._metrics.values())
+
+    def snapshot(self, reset: bool = False) -> dict:
+        """
+        Return current values keyed by metric name (and labels).
+
+        Args:
+            reset: zero counters and histograms after reading them
+        """
+        return {
+            format_key(metric.name, metric.labels): metric.snapshot(reset=reset)
+            for metric in self.collect()
+        }
+
+
+# Default registry shared by the whole process
+REGISTRY = MetricsRegistry()
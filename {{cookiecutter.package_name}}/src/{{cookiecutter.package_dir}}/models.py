@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Literal
 
 from pydantic import BaseModel, field_validator
 
@@ -6,6 +7,16 @@ from pydantic import BaseModel, field_validator
 class AppConfig(BaseModel):
     foo: str = None
     log_path: Path | None = None
+    # Seconds allowed to drain and stop on shutdown before cancelling
+    shutdown_timeout: float = 20.0
+    # Executor pool for stats and other file I/O
+    io_pool: str = "io"
+    # Use uvloop when installed (pip install .[uvloop])
+    uvloop: bool = False
+    # Seconds between config file change checks, 0 disables hot reload
+    config_poll_interval: float = 2.0
+    # Accept config changes on the MQTT 'config' topic
+    remote_config: bool = False
 
     @field_validator(
         "log_path",
@@ -14,8 +25,172 @@ class AppConfig(BaseModel):
     def expand_user_paths(cls, v):  # noqa: N805
         return Path(v).expanduser() if v else None
 
+
+class HeartbeatConfig(BaseModel):
+    """Heartbeat publishing."""
+
+    interval: float = 10.0
+    adaptive: bool = False
+    min_interval: float = 1.0
+    max_interval: float = 60.0
+    stretch_factor: float = 1.5
+    slow_publish: float = 0.5
+    # Include the metrics registry snapshot in every heartbeat
+    metrics: bool = False
+
+
+class StatsConfig(BaseModel):
+    """Stats collection, history and persistence."""
+
+    save_interval: float = 10.0
+    sample_interval: float = 1.0
+    max_series: int = 256
+    # Keep history in a memory-mapped file so it survives restarts
+    snapshot: bool = False
+
+
+class CommandsConfig(BaseModel):
+    """Command execution limits and priorities."""
+
+    max_concurrent: int = 4
+    max_queued: int = 100
+    # Lower runs first
+    default_priority: int = 5
+    priorities: dict[str, int] = {}
+    # Executor pool for blocking command work, per action in action_pools
+    pool: str = "commands"
+    action_pools: dict[str, str] = {}
+    # Results of commands sent with an "id" are cached for repeats
+    result_cache_size: int = 1000
+    result_ttl: float = 3600.0
+    persist_results: bool = False
+
+
+class PoolConfig(BaseModel):
+    """A named executor pool for blocking work."""
+
+    size: int = 4
+    max_queued: int = 64
+    kind: Literal["thread", "process"] = "thread"
+
+
+class GatewayConfig(BaseModel):
+    """Host several device identities in one process."""
+
+    # Device ids served over the shared connection; empty = single device
+    devices: list[str] = []
+    # Seconds between each device's heartbeat, spread across the interval
+    heartbeat_interval: float = 30.0
+
+
+class WorkersConfig(BaseModel):
+    """Spread command handling over worker processes."""
+
+    # Worker processes consuming the command topic, 0 = handle in-process
+    count: int = 0
+    # Shared subscription group ($share/<group>/...), default: mqtt device_id
+    group: str = ""
+    # Seconds between stats reports from each worker to the leader
+    report_interval: float = 5.0
+    # Restart backoff for crashed workers: doubles up to max_restart_delay
+    restart_delay: float = 1.0
+    max_restart_delay: float = 60.0
+
+    @field_validator("group")
+    def check_group(cls, v):  # noqa: N805
+        if any(c in v for c in "/+#"):
+            msg = f"Shared subscription group may not contain '/', '+' or '#': {v}"
+            raise ValueError(msg)
+        return v
+
+
+class LoopMonitorConfig(BaseModel):
+    """Event loop lag monitoring."""
+
+    enabled: bool = True
+    interval: float = 0.25
+    # Lag in seconds above which the blocking stack is logged
+    threshold: float = 0.5
+
+
+class MemoryMonitorConfig(BaseModel):
+    """RSS growth watchdog and tracemalloc snapshots."""
+
+    enabled: bool = True
+    interval: float = 60.0
+    # Alert when RSS grows by threshold_mb within window seconds
+    window: float = 3600.0
+    threshold_mb: float = 50.0
+    # Frames kept per allocation while a 'memsnapshot' command traces
+    trace_frames: int = 1
+
+
+class HealthConfig(BaseModel):
+    """Local health endpoint and systemd notifications."""
+
+    enabled: bool = True
+    # UNIX socket serving the health JSON, default <settings dir>/health.sock
+    socket: Path | None = None
+    # Send READY/WATCHDOG/STOPPING when run by systemd (Type=notify)
+    systemd_notify: bool = True
+    # Not live when the loop monitor hasn't ticked for this many seconds
+    max_tick_age: float = 5.0
+
+    @field_validator(
+        "socket",
+        mode="before",
+    )
+    def expand_user_paths(cls, v):  # noqa: N805
+        return Path(v).expanduser() if v else None
+
+
+class MetricsConfig(BaseModel):
+    """OpenMetrics (Prometheus) exposition endpoint."""
+
+    enabled: bool = False
+    host: str = "127.0.0.1"
+    port: int = 9464
+    socket: Path | None = None
+    path: str = "/metrics"
+    cache_ttl: float = 5.0
+
+    @field_validator(
+        "socket",
+        mode="before",
+    )
+    def expand_user_paths(cls, v):  # noqa: N805
+        return Path(v).expanduser() if v else None
 {%- if cookiecutter.use_sentry == "y" %}
+
+
+def _check_rate(v: float) -> float:
+    if not 0 <= v <= 1:
+        msg = f"Sample rate must be between 0 and 1: {v}"
+        raise ValueError(msg)
+    return v
+
+
+class SentrySampleRule(BaseModel):
+    # Glob matched against the transaction name: "mqtt <topic>",
+    # "command <action>" or "stats save"
+    match: str
+    rate: float
+
+    @field_validator("rate")
+    def check_rate(cls, v):  # noqa: N805
+        return _check_rate(v)
+
+
 class SentryConfig(BaseModel):
     dsn: str | None = None
     environment: str = "production"
+    # Fraction of transactions traced when no rule matches; 0 with no rules
+    # above 0 turns performance tracing off entirely
+    traces_sample_rate: float = 0.1
+    # The first matching rule sets the rate, see SentrySampleRule
+    sample_rules: list[SentrySampleRule] = []
+
+    @field_validator("traces_sample_rate")
+    def check_rate(cls, v):  # noqa: N805
+        return _check_rate(v)
 {%- endif %}
@@ -1,14 +1,28 @@
 import asyncio
 import json
 import logging
+import time
 from collections import defaultdict
 from collections.abc import Callable
 from contextlib import AsyncExitStack, suppress
 
 import aiomqtt
 
+from {{cookiecutter.package_dir}}.metrics import REGISTRY
+from {{cookiecutter.package_dir}}.metrics import Counter
+from {{cookiecutter.package_dir}}.metrics import Histogram
+from {{cookiecutter.package_dir}}.metrics import MetricsRegistry
+from {{cookiecutter.package_dir}}.ratelimit import RateLimiter
+from {{cookiecutter.package_dir}}.tracing import trace
+
 logger = logging.getLogger(__name__)
 
+# Payload size histogram range, 1 byte to 256 MB (the MQTT maximum)
+_BYTES_BUCKETS = {"lowest": 1, "highest": 2**28, "precision": 2}
+
+# Topics per SUBSCRIBE packet when (re)subscribing
+_SUBSCRIBE_BATCH = 100
+
 
 class AsyncMqttClient:
     """
@@ -41,7 +55,22 @@ class AsyncMqttClient:
         password=None,
         keep_alive=60,
         reconnect_interval=5,
+        error_limit: int = 5,
+        error_period: float = 60.0,
+        topic_label: Callable[[str], str] | None = None,
+        announce: bool = True,
+        metrics: MetricsRegistry | None = None,
     ):
+        """
+        :param error_limit: handler errors per topic filter and handler that
+            are echoed to the 'message' topic every ``error_period`` seconds;
+            the rest are only counted
+        :param topic_label: maps a topic to the label used for per-topic
+            metrics, e.g. to collapse per-device topics into one series
+        :param announce: publish "online"/"offline" on 'status' and set the
+            LWT; off for extra connections of the same identity, e.g. worker
+            processes
+        """
         self.hostname = hostname
         self.port = port
         self.identifier = identifier
@@ -49,6 +78,7 @@ class AsyncMqttClient:
         self.password = password
         self.keep_alive = keep_alive
         self.reconnect_interval = reconnect_interval
+        self.announce = announce
 
         self.subscriptions = []
         self.message_handlers = defaultdict(
@@ -67,6 +97,47 @@ class AsyncMqttClient:
         self.shutdown_event = asyncio.Event()
         self.on_post_connect = None
 
+        # Drain support: in-flight handlers/publishes and intake switch
+        self._accepting = True
+        self._inflight = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+        self._error_limiter = RateLimiter(error_limit, error_period)
+        self._topic_label = topic_label or str
+
+        metrics = self._metrics = metrics or REGISTRY
+        # Per topic filter / handler metrics, created on first use
+        self._handler_metrics: dict[tuple, tuple[Counter, Counter, Histogram]] = {}
+        self._payload_bytes: dict[tuple[str, str], Histogram] = {}
+        self._m_received = metrics.counter(
+            "mqtt_messages_received", "Messages received"
+        )
+        self._m_invalid = metrics.counter(
+            "mqtt_messages_invalid", "Messages dropped for invalid JSON"
+        )
+        self._m_unhandled = metrics.counter(
+            "mqtt_messages_unhandled", "Messages without a handler"
+        )
+        self._m_handle_time = metrics.histogram(
+            "mqtt_handle_seconds", "Time spent handling one message"
+        )
+        self._m_published = metrics.counter(
+            "mqtt_messages_published", "Messages published"
+        )
+        self._m_publish_errors = metrics.counter(
+            "mqtt_publish_errors", "Failed publishes"
+        )
+        self._m_publish_time = metrics.histogram(
+            "mqtt_publish_seconds", "Time spent publishing one message"
+        )
+        self._m_dropped = metrics.counter(
+            "mqtt_messages_dropped", "Messages ignored while draining"
+        )
+        self._m_errors_suppressed = metrics.counter(
+            "mqtt_error_messages_suppressed", "Handler error echoes rate-limited"
+        )
+
     def build_topic(self, topic: str) -> str:
         return f"{self.base_topic}/{topic.lstrip('/')}"
 
@@ -85,6 +156,7 @@ class AsyncMqttClient:
             return
 
         self.shutdown_event.clear()
+        self._accepting = True
         self._reconnect_task = asyncio.create_task(self._reconnect_loop())
 
     async def disconnect(self):
@@ -99,7 +171,7 @@ class AsyncMqttClient:
                 await self._reconnect_task
 
         # Send offline status if connected
-        if self.connected_event.is_set():
+        if self.announce and self.connected_event.is_set():
             try:
                 await self.send_status("offline")
             except Exception as e:  # noqa: BLE001
@@ -108,6 +180,76 @@ class AsyncMqttClient:
         await self._cleanup_connection()
         logger.info("Disconnected from MQTT broker")
 
+    async def reconnect(self, **params) -> None:
+        """
+        Change connection parameters and reconnect with them.
+
+        Accepts ``hostname``, ``port``, ``username``, ``password`` and
+        ``keep_alive``. Subscriptions and handlers are kept. Must not be
+        awaited from a message handler, as it cancels the message loop.
+        """
+        allowed = {"hostname", "port", "username", "password", "keep_alive"}
+        unknown = params.keys() - allowed
+        if unknown:
+            msg = f"Unknown connection parameters: {sorted(unknown)}"
+            raise ValueError(msg)
+        for name, value in params.items():
+            setattr(self, name, value)
+
+        logger.info("Reconnecting to %s:%s", self.hostname, self.port)
+        if self._reconnect_task and not self._reconnect_task.done():
+            self._reconnect_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._reconnect_task
+        await self._cleanup_connection()
+        self.shutdown_event.clear()
+        self._reconnect_task = asyncio.create_task(self._reconnect_loop())
+
+    def set_error_limit(self, limit: int, period: float) -> None:
+        """Change how many handler errors are echoed per period."""
+        self._error_limiter = RateLimiter(limit, period)
+
+    # --------------------------------------------------------------------------
+    # Drain
+    # --------------------------------------------------------------------------
+
+    def _begin(self) -> None:
+        self._inflight += 1
+        self._idle.clear()
+
+    def _end(self) -> None:
+        self._inflight -= 1
+        if self._inflight == 0:
+            self._idle.set()
+
+    @property
+    def inflight(self) -> int:
+        """Number of message handlers and publishes currently running."""
+        return self._inflight
+
+    @property
+    def dropped(self) -> int:
+        """Number of messages ignored since stop_accepting()."""
+        return int(self._m_dropped.value)
+
+    def stop_accepting(self) -> None:
+        """Ignore incoming messages from now on; publishing still works."""
+        if self._accepting:
+            logger.info("No longer accepting incoming messages")
+        self._accepting = False
+
+    async def drain(self, timeout: float) -> bool:  # noqa: ASYNC109
+        """
+        Wait for in-flight handlers and publishes to finish.
+
+        Returns True if everything finished within ``timeout`` seconds.
+        """
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except TimeoutError:
+            return False
+        return True
+
     async def _reconnect_loop(self):
         """Main reconnection loop that handles connection failures."""
         while not self.shutdown_event.is_set():
@@ -160,7 +302,7 @@ class AsyncMqttClient:
                 password=self.password,
                 keepalive=self.keep_alive,
                 identifier=self.identifier,
-                will=aiomqtt.Will(**self._get_lwt()),
+                will=aiomqtt.Will(**self._get_lwt()) if self.announce else None,
                 # logger=logger,
             )
 
@@ -168,12 +310,17 @@ class AsyncMqttClient:
             self.connected_event.set()
             logger.info("Connected to MQTT broker: %s:%s", self.hostname, self.port)
 
-            # Resubscribe to all stored subscriptions
+            # Resubscribe to all stored subscriptions, many per packet
+            logger.info("Subscribing to %d topics", len(self.subscriptions))
             for topic, qos in self.subscriptions:
-                logger.info("Subscribing to: %s (QoS %d)", topic, qos)
-                await self._client.subscribe(topic, qos=qos)
+                logger.debug("Subscribing to: %s (QoS %d)", topic, qos)
+            for i in range(0, len(self.subscriptions), _SUBSCRIBE_BATCH):
+                await self._client.subscribe(
+                    self.subscriptions[i : i + _SUBSCRIBE_BATCH]
+                )
 
-            await self.send_status("online")
+            if self.announce:
+                await self.send_status("online")
 
             self._listener_task = asyncio.create_task(self._message_loop())
 
@@ -216,7 +363,18 @@ class AsyncMqttClient:
             async for msg in self._client.messages:
                 if self.shutdown_event.is_set():
                     break
-                await self._handle_message(msg.topic, msg.payload.decode())
+                if not self._accepting:
+                    self._m_dropped.inc()
+                    continue
+                self._begin()
+                try:
+                    topic = str(msg.topic)
+                    self._payload_histogram("mqtt_received_bytes", topic).observe(
+                        len(msg.payload)
+                    )
+                    await self._handle_message(topic, msg.payload.decode())
+                finally:
+                    self._end()
         except asyncio.CancelledError:
             pass
         except aiomqtt.MqttError as e:
@@ -228,10 +386,13 @@ class AsyncMqttClient:
             raise
 
     async def _handle_message(self, topic, payload_raw):
+        started = time.perf_counter()
+        self._m_received.inc()
         try:
             payload = json.loads(payload_raw) if payload_raw else {}
         except json.JSONDecodeError as e:
-            logger.warning("Invalid JSON: %s", e)
+            self._m_invalid.inc()
+            logger.warning("Invalid JSON: %s", e, extra={"rate_limit": "invalid_json"})
             return
 
         # logger.debug("Handle message: topic=%s | payload=%s", topic, payload)
@@ -239,16 +400,118 @@ class AsyncMqttClient:
         handlers = self.message_handlers.get(str(topic), [])
         if handlers:
             # Execute all handlers for this topic
-            for handler in handlers:
-                try:
-                    await handler(payload, topic=str(topic))
-                except Exception as e:
-                    logger.exception(
-                        "Error in handler %s for topic: %s", handler.__name__, topic
+            with trace("mqtt.dispatch", f"mqtt {self._topic_label(str(topic))}"):
+                for handler in handlers:
+                    calls, errors, latency = self._get_handler_metrics(
+                        str(topic), handler
                     )
-                    await self.send_message(str(e), error=True)
+                    handler_started = time.perf_counter()
+                    try:
+                        await handler(payload, topic=str(topic))
+                    except Exception as e:
+                        errors.inc()
+                        key = f"{topic}:{_handler_name(handler)}"
+                        logger.exception(
+                            "Error in handler %s for topic: %s",
+                            handler.__name__,
+                            topic,
+                            extra={"rate_limit": f"handler_error:{key}"},
+                        )
+                        await self._echo_error(key, str(e))
+                    finally:
+                        calls.inc()
+                        latency.observe(time.perf_counter() - handler_started)
         else:
-            logger.warning("Unhandled topic: %s", topic)
+            self._m_unhandled.inc()
+            logger.warning(
+                "Unhandled topic: %s", topic, extra={"rate_limit": "unhandled_topic"}
+            )
+
+        self._m_handle_time.observe(time.perf_counter() - started)
+
+    async def _echo_error(self, key: str, message: str) -> None:
+        """Publish a handler error, at most ``error_limit`` per period and key."""
+        suppressed = self._error_limiter.hit(key, message)
+        if suppressed is None:
+            self._m_errors_suppressed.inc()
+            return
+        extra = {"suppressed": suppressed} if suppressed else None
+        await self.send_message(message, extra=extra, error=True)
+
+    async def publish_error_summaries(self) -> None:
+        """
+        Report handler errors suppressed in windows that have ended, which
+        no later echo reported. Called periodically by MqttService.
+        """
+        for suppressed, message in self._error_limiter.flush().values():
+            await self.send_message(
+                f"Suppressed {suppressed} similar: {message}",
+                extra={"suppressed": suppressed},
+                error=True,
+            )
+
+    # --------------------------------------------------------------------------
+    # Instrumentation
+    # --------------------------------------------------------------------------
+
+    def _get_handler_metrics(
+        self, topic: str, handler: Callable
+    ) -> tuple[Counter, Counter, Histogram]:
+        """Return (calls, errors, latency) metrics of a handler for a topic filter."""
+        key = (self._topic_label(topic), handler)
+        metrics = self._handler_metrics.get(key)
+        if metrics is None:
+            labels = {"topic": key[0], "handler": _handler_name(handler)}
+            metrics = self._handler_metrics[key] = (
+                self._metrics.counter(
+                    "mqtt_handler_calls", "Message handler invocations", **labels
+                ),
+                self._metrics.counter(
+                    "mqtt_handler_errors",
+                    "Exceptions raised by message handlers",
+                    **labels,
+                ),
+                self._metrics.histogram(
+                    "mqtt_handler_seconds", "Message handler run time", **labels
+                ),
+            )
+        return metrics
+
+    def _payload_histogram(self, name: str, topic: str) -> Histogram:
+        """Return the payload size histogram ``name`` of a topic."""
+        key = (name, self._topic_label(topic))
+        histogram = self._payload_bytes.get(key)
+        if histogram is None:
+            histogram = self._payload_bytes[key] = self._metrics.histogram(
+                name, "MQTT payload size in bytes", buckets=_BYTES_BUCKETS, topic=key[1]
+            )
+        return histogram
+
+    def handler_stats(self) -> dict:
+        """
+        Return per-topic traffic and per-handler call statistics.
+
+        ``{"handlers": {topic: {handler: {calls, errors, seconds}}},
+        "received_bytes": {topic: {...}}, "published_bytes": {topic: {...}}}``
+        where ``seconds`` and the byte entries are histogram snapshots
+        (count, min, max, mean, p50, p90, p99).
+        """
+        handlers: dict[str, dict] = {}
+        for (topic, handler), (calls, errors, latency) in self._handler_metrics.items():
+            handlers.setdefault(topic, {})[_handler_name(handler)] = {
+                "calls": calls.value,
+                "errors": errors.value,
+                "seconds": latency.snapshot(),
+            }
+        stats = {"handlers": handlers, "received_bytes": {}, "published_bytes": {}}
+        for (name, topic), histogram in self._payload_bytes.items():
+            direction = name.removeprefix("mqtt_")
+            stats[direction][topic] = histogram.snapshot()
+        return stats
+
+    async def publish_metrics(self) -> None:
+        """Publish handler_stats() on the 'metrics' sub-topic."""
+        await self.publish_json(self.build_topic("metrics"), self.handler_stats())
 
     # --------------------------------------------------------------------------
     # Subscriptions
@@ -357,16 +620,27 @@ class AsyncMqttClient:
             logger.error("Cannot publish topic: '%s' - %s", topic, msg)
             return
 
+        started = time.perf_counter()
+        self._begin()
         try:
             payload_bytes = json.dumps(payload or {}).encode()
+            self._payload_histogram("mqtt_published_bytes", topic).observe(
+                len(payload_bytes)
+            )
             await self._client.publish(topic, payload_bytes, qos=qos, retain=retain)
         except aiomqtt.MqttError as e:
+            self._m_publish_errors.inc()
             logger.error("MQTT publish error for topic %s: %s", topic, e)  # noqa: TRY400
             self.connected_event.clear()
             raise
         except Exception as e:
+            self._m_publish_errors.inc()
             logger.error("Unexpected error publishing to topic %s: %s", topic, e)  # noqa: TRY400
             raise
+        finally:
+            self._end()
+        self._m_published.inc()
+        self._m_publish_time.observe(time.perf_counter() - started)
 
     async def send_status(self, state: str):
         """Send status message."""
@@ -385,3 +659,7 @@ class AsyncMqttClient:
 
     def get_subscriptions(self) -> list[tuple[str, int]]:
         return self.subscriptions.copy()
+
+
+def _handler_name(handler: Callable) -> str:
+    return getattr(handler, "__qualname__", None) or repr(handler)
@@ -21,6 +21,13 @@ class MQTTConfig(BaseModel):
 
     use_tls: bool = True
 
+    # Seconds between handler stats on the 'metrics' sub-topic, 0 disables
+    metrics_interval: float = 0
+
+    # Handler errors echoed to the 'message' topic per handler and period
+    error_limit: int = 5
+    error_period: float = 60.0
+
     @model_validator(mode="before")
     @classmethod
     def decode_creds(cls, values):
@@ -28,6 +35,6 @@ class MQTTConfig(BaseModel):
         if creds is not None:
             decoded_creds = base64.b64decode(creds).decode()
             username, password = decoded_creds.split("|")
-            values["username"] = username
-            values["password"] = password
+            # A copy: the caller's dict may be cached, see load_config()
+            values = {**values, "username": username, "password": password}
         return values
@@ -0,0 +1,46 @@
+import logging
+
+from {{cookiecutter.package_dir}}.services.baseasync import BaseServiceAsync
+
+from .client import AsyncMqttClient
+
+logger = logging.getLogger(__name__)
+
+
+class MqttService(BaseServiceAsync):
+    """
+    Runs an AsyncMqttClient as a supervised service.
+
+    The service counts as started as soon as the client's reconnect loop is
+    running, without waiting for the broker: startup must not stall while
+    the broker is unreachable. Services that publish check
+    ``client.connected_event`` (or wait for it) themselves.
+    """
+
+    def __init__(self, client: AsyncMqttClient, *, metrics_interval: float = 0):
+        """
+        :param client: the MQTT client
+        :param metrics_interval: seconds between publishes of the client's
+            handler stats on the 'metrics' sub-topic, 0 to disable
+        """
+        super().__init__()
+        self.client = client
+        self.metrics_interval = metrics_interval
+
+    async def setup(self):
+        await self.client.connect()
+
+    async def run(self):
+        # metrics_interval is read every time, a config reload may change it
+        while not await self.wait_or_timeout(self.metrics_interval or 1.0):
+            if not self.client.connected_event.is_set():
+                continue
+            try:
+                await self.client.publish_error_summaries()
+                if self.metrics_interval:
+                    await self.client.publish_metrics()
+            except Exception:
+                logger.exception("Error publishing MQTT metrics")
+
+    async def cleanup(self):
+        await self.client.disconnect()
@@ -0,0 +1,176 @@
+import re
+import time
+from collections.abc import Callable
+
+from .metrics import Counter
+from .metrics import Gauge
+from .metrics import Histogram
+from .metrics import MetricsRegistry
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+_INVALID_NAME_CHARS = re.compile(r"[^a-zA-Z0-9_:]")
+
+
+def sanitize_name(name: str) -> str:
+    """Turn an arbitrary key into a valid metric name."""
+    name = _INVALID_NAME_CHARS.sub("_", name)
+    if name[:1].isdigit():
+        name = f"_{name}"
+    return name
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def _labels(labels: tuple[tuple[str, str], ...], extra: str = "") -> str:
+    pairs = [f'{sanitize_name(k)}="{_escape(v)}"' for k, v in labels]
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(pairs) + "}"
+
+
+def _number(value: float) -> str:
+    if value != value:  # noqa: PLR0124
+        return "NaN"
+    if value in (float("inf"), float("-inf")):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _flatten(data: dict, prefix: str = ""):
+    """Yield ``(name, value)`` for every numeric leaf of a nested dict."""
+    for key, value in data.items():
+        name = f"{prefix}_{key}" if prefix else str(key)
+        if isinstance(value, dict):
+            yield from _flatten(value, name)
+        elif isinstance(value, int | float) and not isinstance(value, bool):
+            yield name, value
+
+
+class OpenMetricsRenderer:
+    """
+    Render a metrics registry and collected stats as OpenMetrics text.
+
+    The rendered document is cached for ``cache_ttl`` seconds, and inside a
+    render each metric family is only re-formatted when its value changed
+    since the previous render. Stats are read from the last collected
+    snapshot, so a scrape never runs the stats sources themselves.
+    """
+
+    def __init__(
+        self,
+        registry: MetricsRegistry,
+        stats: Callable[[], dict] | None = None,
+        *,
+        namespace: str = "",
+        cache_ttl: float = 5.0,
+    ):
+        """
+        :param registry: metric primitives to expose
+        :param stats: returns the last collected stats (e.g. ``StatsTracker.all``)
+        :param namespace: prefix for metric names derived from stats
+        :param cache_ttl: seconds a rendered document is reused
+        """
+        self.registry = registry
+        self.stats = stats
+        self.namespace = namespace
+        self.cache_ttl = cache_ttl
+        self._document = ""
+        self._rendered_at = 0.0
+        self._families: dict[str, tuple[object, str]] = {}
+        self._seen: set[str] = set()
+
+    def _family(self, name: str, state: object, build: Callable[[], str]) -> str:
+        """Return cached text for a metric family unless ``state`` changed."""
+        self._seen.add(name)
+        cached = self._families.get(name)
+        if cached is not None and cached[0] == state:
+            return cached[1]
+        text = build()
+        self._families[name] = (state, text)
+        return text
+
+    @staticmethod
+    def _header(name: str, kind: str, description: str) -> list[str]:
+        lines = [f"# TYPE {name} {kind}"]
+        if description:
+            lines.append(f"# HELP {name} {_escape(description)}")
+        return lines
+
+    def _render_registry(self) -> list[str]:
+        # Group labelled metrics of the same name into one family
+        families: dict[str, list[Counter | Gauge | Histogram]] = {}
+        for metric in self.registry.collect():
+            families.setdefault(sanitize_name(metric.name), []).append(metric)
+
+        chunks = []
+        for name, metrics in families.items():
+            first = metrics[0]
+            if isinstance(first, Histogram):
+                state = tuple((m.labels, m.count, m.sum) for m in metrics)
+            else:
+                state = tuple((m.labels, m.value) for m in metrics)
+            chunks.append(
+                self._family(name, state, lambda n=name, m=metrics: self._format(n, m))
+            )
+        return chunks
+
+    def _format(self, name: str, metrics: list) -> str:
+        first = metrics[0]
+        if isinstance(first, Histogram):
+            lines = self._header(name, "summary", first.description)
+            for m in metrics:
+                for q in (50, 90, 99):
+                    value = m.percentile(q)
+                    labels = _labels(m.labels, f'quantile="{q / 100}"')
+                    lines.append(f"{name}{labels} {_number(value)}")
+                lines.append(f"{name}_count{_labels(m.labels)} {m.count}")
+                lines.append(f"{name}_sum{_labels(m.labels)} {_number(m.sum)}")
+        elif isinstance(first, Counter):
+            lines = self._header(name, "counter", first.description)
+            lines.extend(
+                f"{name}_total{_labels(m.labels)} {_number(m.value)}" for m in metrics
+            )
+        else:
+            lines = self._header(name, "gauge", first.description)
+            lines.extend(
+                f"{name}{_labels(m.labels)} {_number(m.value)}" for m in metrics
+            )
+        return "\n".join(lines)
+
+    def _render_stats(self) -> list[str]:
+        if self.stats is None:
+            return []
+        stats = {k: v for k, v in self.stats().items() if k != "metrics"}
+        chunks = []
+        for key, value in _flatten(stats, self.namespace):
+            name = sanitize_name(key)
+            chunks.append(
+                self._family(
+                    name,
+                    value,
+                    lambda n=name, v=value: f"# TYPE {n} gauge\n{n} {_number(v)}",
+                )
+            )
+        return chunks
+
+    def render(self) -> str:
+        """Return the exposition document, re-rendering when the cache expired."""
+        now = time.monotonic()
+        if self._document and now - self._rendered_at < self.cache_ttl:
+            return self._document
+
+        self._seen.clear()
+        chunks = self._render_registry() + self._render_stats()
+        chunks.append("# EOF\n")
+
+        # Forget families that no longer exist
+        for name in self._families.keys() - self._seen:
+            del self._families[name]
+        self._document = "\n".join(chunks)
+        self._rendered_at = now
+        return self._document
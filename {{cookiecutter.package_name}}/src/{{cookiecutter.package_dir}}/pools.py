@@ -0,0 +1,167 @@
+"""
+Named executor pools for blocking work.
+
+Each pool wraps its own ThreadPoolExecutor or ProcessPoolExecutor, so a
+burst of blocking commands cannot starve e.g. stats file I/O the way it
+does when everything shares the loop's default executor.
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import Callable
+from concurrent.futures import Executor
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from typing import Any
+
+from .metrics import REGISTRY
+from .metrics import MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+KINDS = ("thread", "process")
+
+
+class PoolFull(RuntimeError):  # noqa: N818
+    """Raised by ExecutorPool.run() when the pool queue is full."""
+
+
+def _timed_call(func: Callable, args: tuple, kwargs: dict) -> tuple:
+    """
+    Run ``func`` in the worker and report when it started and finished.
+
+    time.monotonic() is system-wide, so the timestamps are comparable with
+    the loop's even when called in a worker process.
+    """
+    started = time.monotonic()
+    try:
+        result, error = func(*args, **kwargs), None
+    except Exception as e:  # noqa: BLE001
+        result, error = None, e
+    return started, time.monotonic(), result, error
+
+
+class ExecutorPool:
+    """
+    A bounded thread or process pool with queue-wait and run-time metrics.
+
+    Process pools need picklable, module-level callables and arguments.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        size: int = 4,
+        max_queued: int = 64,
+        kind: str = "thread",
+        metrics: MetricsRegistry | None = None,
+    ):
+        """
+        :param name: pool name, used for metric labels and thread names
+        :param size: number of worker threads/processes
+        :param max_queued: calls waiting for a worker before rejecting
+        :param kind: ``"thread"`` or ``"process"``
+        """
+        if kind not in KINDS:
+            msg = f"Unknown pool kind '{kind}' for pool '{name}', expected {KINDS}"
+            raise ValueError(msg)
+        self.name = name
+        self.size = size
+        self.max_queued = max_queued
+        self.kind = kind
+        self._pending = 0  # submitted and not finished
+        self._executor: Executor = (
+            ProcessPoolExecutor(max_workers=size)
+            if kind == "process"
+            else ThreadPoolExecutor(max_workers=size, thread_name_prefix=f"pool-{name}")
+        )
+
+        metrics = metrics or REGISTRY
+        self._m_wait = metrics.histogram(
+            "pool_queue_wait_seconds", "Time calls waited for a worker", pool=name
+        )
+        self._m_run = metrics.histogram(
+            "pool_run_seconds", "Time calls ran in a worker", pool=name
+        )
+        self._m_queued = metrics.gauge(
+            "pool_queued", "Calls waiting for a worker", pool=name
+        )
+        self._m_rejected = metrics.counter(
+            "pool_rejected", "Calls rejected because the queue was full", pool=name
+        )
+
+    @property
+    def queued(self) -> int:
+        """Number of calls waiting for a free worker."""
+        return max(self._pending - self.size, 0)
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Run ``func(*args, **kwargs)`` in the pool and return its result."""
+        if self._pending >= self.size + self.max_queued:
+            self._m_rejected.inc()
+            msg = f"Executor pool '{self.name}' is full ({self.max_queued} queued)"
+            raise PoolFull(msg)
+
+        loop = asyncio.get_running_loop()
+        submitted = time.monotonic()
+        self._pending += 1
+        self._m_queued.set(self.queued)
+
+        def release(_: Future) -> None:
+            # A cancelled caller does not stop a running call, so its slot is
+            # only freed once the call itself is done (in the pool's thread)
+            with suppress(RuntimeError):  # loop already closed
+                loop.call_soon_threadsafe(self._release)
+
+        future = self._executor.submit(_timed_call, func, args, kwargs)
+        future.add_done_callback(release)
+        started, finished, result, error = await asyncio.wrap_future(future)
+
+        self._m_wait.observe(max(started - submitted, 0))
+        self._m_run.observe(finished - started)
+        if error is not None:
+            raise error
+        return result
+
+    def _release(self) -> None:
+        self._pending -= 1
+        self._m_queued.set(self.queued)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the workers; calls not yet started are cancelled."""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+class ExecutorPools:
+    """Registry of named ExecutorPools."""
+
+    def __init__(self, metrics: MetricsRegistry | None = None):
+        self._pools: dict[str, ExecutorPool] = {}
+        self._metrics = metrics or REGISTRY
+
+    def add(self, name: str, **options) -> ExecutorPool:
+        """Create pool ``name``; see ExecutorPool for ``options``."""
+        if name in self._pools:
+            msg = f"Executor pool '{name}' already exists"
+            raise ValueError(msg)
+        pool = self._pools[name] = ExecutorPool(name, metrics=self._metrics, **options)
+        logger.debug("Created %s pool '%s' with %d workers", pool.kind, name, pool.size)
+        return pool
+
+    def get(self, name: str) -> ExecutorPool:
+        try:
+            return self._pools[name]
+        except KeyError:
+            msg = f"Unknown executor pool '{name}', configured: {list(self._pools)}"
+            raise ValueError(msg) from None
+
+    def names(self) -> list[str]:
+        return list(self._pools)
+
+    def shutdown(self, wait: bool = True) -> None:
+        for pool in self._pools.values():
+            pool.shutdown(wait=wait)
@@ -0,0 +1,150 @@
+"""
+Low-overhead sampling profiler for the whole process.
+
+A background thread walks ``sys._current_frames()`` every ``interval``
+seconds and counts the stacks it sees. Nothing is installed into the
+interpreter (no ``sys.setprofile``), so the profiled code runs at full
+speed and the cost is one stack walk per thread per sample.
+
+The result is written in the collapsed-stack format understood by
+``flamegraph.pl``, speedscope and similar tools::
+
+    MainThread;app.py:run;client.py:_message_loop;app.py:handle_command 42
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+class ProfilerBusy(RuntimeError):  # noqa: N818
+    """Raised when a profiling run is already in progress."""
+
+
+@dataclass(frozen=True)
+class ProfileResult:
+    path: Path
+    seconds: float
+    samples: int
+    stacks: Counter
+
+    def top_frames(self, limit: int = 10) -> list[dict]:
+        """Return the frames most often on top of the stack (self time)."""
+        leaves: Counter = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        total = sum(leaves.values()) or 1
+        return [
+            {"frame": frame, "samples": count, "percent": round(100 * count / total, 1)}
+            for frame, count in leaves.most_common(limit)
+        ]
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{Path(code.co_filename).name}:{code.co_name}"
+
+
+class SamplingProfiler:
+    """Samples the stacks of all threads; one run at a time."""
+
+    def __init__(self, output_dir: Path, interval: float = 0.005):
+        """
+        :param output_dir: directory the collapsed-stack files are written to
+        :param interval: seconds between samples
+        """
+        self.output_dir = Path(output_dir)
+        self.interval = interval
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def _sample(self, seconds: float) -> tuple[Counter, int]:
+        stacks: Counter = Counter()
+        samples = 0
+        me = threading.get_ident()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, top in sys._current_frames().items():  # noqa: SLF001
+                if ident == me:
+                    continue
+                labels = []
+                frame = top
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.append(names.get(ident, str(ident)))
+                stacks[";".join(reversed(labels))] += 1
+            samples += 1
+            time.sleep(self.interval)
+        return stacks, samples
+
+    def _write(self, stacks: Counter) -> Path:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        stem = time.strftime("profile-%Y%m%d-%H%M%S")
+        path = self.output_dir / f"{stem}.folded"
+        attempt = 0
+        while True:
+            try:
+                # Never overwrite an earlier profile from the same second
+                f = path.open("x")
+                break
+            except FileExistsError:
+                attempt += 1
+                path = self.output_dir / f"{stem}-{attempt}.folded"
+        with f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+    def run(self, seconds: float) -> ProfileResult:
+        """Profile for ``seconds`` in the calling thread."""
+        if not self._lock.acquire(blocking=False):
+            msg = "A profiling run is already in progress"
+            raise ProfilerBusy(msg)
+        try:
+            logger.info("Profiling for %.1fs", seconds)
+            stacks, samples = self._sample(seconds)
+            path = self._write(stacks)
+            logger.info("Wrote profile with %d samples to %s", samples, path)
+            return ProfileResult(
+                path=path, seconds=seconds, samples=samples, stacks=stacks
+            )
+        finally:
+            self._lock.release()
+
+    async def profile(self, seconds: float) -> ProfileResult:
+        """Profile for ``seconds`` from a dedicated thread without blocking the loop."""
+        if self.running:
+            msg = "A profiling run is already in progress"
+            raise ProfilerBusy(msg)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def resolve(result, error):
+            if future.done():  # the caller was cancelled
+                return
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+        def target():
+            try:
+                result, error = self.run(seconds), None
+            except Exception as e:  # noqa: BLE001
+                result, error = None, e
+            loop.call_soon_threadsafe(resolve, result, error)
+
+        threading.Thread(target=target, name="profiler", daemon=True).start()
+        return await future
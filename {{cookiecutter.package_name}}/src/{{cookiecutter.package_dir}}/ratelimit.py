@@ -0,0 +1,101 @@
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass(slots=True)
+class _Window:
+    start: float
+    count: int = 1
+    suppressed: int = 0
+    sample: Any = None
+
+
+class RateLimiter:
+    """
+    Allows ``limit`` events per key in each ``period``-second window.
+
+    hit() returns None for an event that should be suppressed. Otherwise it
+    returns how many events of that key were suppressed since the last
+    allowed one, which the first event of a new window reports, so a
+    sustained flood yields one "suppressed N similar" summary per period.
+    A flood that stops is only reported by flush(), which the owner calls
+    periodically.
+    """
+
+    def __init__(
+        self,
+        limit: int = 5,
+        period: float = 60.0,
+        *,
+        max_keys: int = 1000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        :param limit: events allowed per key and window
+        :param period: window length in seconds
+        :param max_keys: keys tracked at most; expired windows are pruned,
+            then the oldest are evicted
+        """
+        self.limit = limit
+        self.period = period
+        self.max_keys = max_keys
+        self._clock = clock
+        self._windows: dict[str, _Window] = {}
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, sample: Any = None) -> int | None:
+        """
+        Record an event for ``key``; None if it should be suppressed.
+
+        :param sample: kept for flush() when the event is suppressed, e.g.
+            the log record
+        """
+        with self._lock:
+            now = self._clock()
+            window = self._windows.get(key)
+            if window is None or now - window.start >= self.period:
+                suppressed = window.suppressed if window else 0
+                self._windows.pop(key, None)
+                if len(self._windows) >= self.max_keys:
+                    self._prune(now)
+                self._windows[key] = _Window(now)
+                return suppressed
+            if window.count < self.limit:
+                window.count += 1
+                return 0
+            window.suppressed += 1
+            window.sample = sample
+            return None
+
+    def pending(self) -> dict[str, int]:
+        """Return the keys with suppressed events not reported yet."""
+        with self._lock:
+            return {k: w.suppressed for k, w in self._windows.items() if w.suppressed}
+
+    def flush(self) -> dict[str, tuple[int, Any]]:
+        """
+        Close the ended windows that suppressed events and return their
+        ``(suppressed, last sample)`` by key. These are not reported by
+        hit() any more.
+        """
+        with self._lock:
+            now = self._clock()
+            ended = {
+                k: w
+                for k, w in self._windows.items()
+                if w.suppressed and now - w.start >= self.period
+            }
+            for key in ended:
+                del self._windows[key]
+        return {k: (w.suppressed, w.sample) for k, w in ended.items()}
+
+    def _prune(self, now: float) -> None:
+        for key in [
+            k for k, w in self._windows.items() if now - w.start >= self.period
+        ]:
+            del self._windows[key]
+        while len(self._windows) >= self.max_keys:
+            del self._windows[next(iter(self._windows))]
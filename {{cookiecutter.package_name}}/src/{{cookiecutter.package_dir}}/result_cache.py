@@ -0,0 +1,124 @@
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from contextlib import suppress
+from pathlib import Path
+
+from .pools import ExecutorPool
+
+logger = logging.getLogger(__name__)
+
+
+class ResultCache:
+    """
+    Bounded TTL cache of command results keyed by request id.
+
+    Entries expire ``ttl`` seconds after they were stored; when full, the
+    oldest entry is evicted. Expiry uses wall-clock time so a persisted
+    cache stays meaningful across restarts.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 1000,
+        ttl: float = 3600.0,
+        path: str | Path | None = None,
+        executor: ExecutorPool | None = None,
+    ):
+        """
+        :param max_entries: maximum number of cached results
+        :param ttl: seconds a result stays cached
+        :param path: optional JSON file the cache is loaded from and saved to
+        :param executor: pool used for file I/O (defaults to the loop's
+            default executor)
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = Path(path) if path else None
+        self.executor = executor
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def get(self, key: str) -> dict | None:
+        """Return the cached result for ``key``, or None if absent or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, result = entry
+        if expires <= time.time():
+            del self._entries[key]
+            return None
+        return result
+
+    def put(self, key: str, result: dict) -> None:
+        """Cache ``result`` under ``key``, evicting the oldest entries if full."""
+        self._entries.pop(key, None)
+        self._entries[key] = (time.time() + self.ttl, result)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def expire(self) -> int:
+        """Drop expired entries. Returns the number dropped."""
+        now = time.time()
+        expired = [key for key, (expires, _) in self._entries.items() if expires <= now]
+        for key in expired:
+            del self._entries[key]
+        return len(expired)
+
+    # --------------------------------------------------------------------------
+    # Persistence
+    # --------------------------------------------------------------------------
+
+    async def _run_io(self, func, *args):
+        if self.executor is not None:
+            return await self.executor.run(func, *args)
+        return await asyncio.to_thread(func, *args)
+
+    async def load(self) -> None:
+        """Load unexpired entries from ``path``."""
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            data = json.loads(await self._run_io(self.path.read_text))
+            for key, (expires, result) in data.items():
+                self._entries[key] = (expires, result)
+            self.expire()
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            logger.info("Loaded %d cached command results", len(self._entries))
+        except Exception:
+            logger.exception("Failed to load command results from %s", self.path)
+
+    async def save(self) -> None:
+        """Write unexpired entries to ``path``."""
+        if self.path is None:
+            return
+        self.expire()
+        try:
+            content = json.dumps(dict(self._entries), default=str)
+            await self._run_io(self._write, content)
+        except Exception:
+            logger.exception("Failed to save command results to %s", self.path)
+
+    def _write(self, content: str) -> None:
+        """Replace ``path`` atomically, so a crash never leaves it torn."""
+        fd, name = tempfile.mkstemp(dir=self.path.parent, prefix=self.path.name)
+        tmp = Path(name)
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(content)
+            tmp.replace(self.path)
+        except BaseException:
+            with suppress(OSError):
+                tmp.unlink()
+            raise
@@ -12,19 +12,23 @@ class BaseServiceAsync(ABC):
 
     def __init__(self):
         self._shutdown_event = asyncio.Event()
+        self._started_event = asyncio.Event()
 
     async def start(self):
         """
         Entrypoint: calls optional setup(), then run(), then optional cleanup().
         """
+        self._started_event.clear()
         try:
             await self.setup()
+            self._started_event.set()
             await self.run()
         except Exception:
             logger.exception("Error in service run loop: %s", self.__class__.__name__)
             raise
         finally:
             await self.cleanup()
+            self._started_event.clear()
 
     async def stop(self):
         """
@@ -36,6 +40,18 @@ class BaseServiceAsync(ABC):
     def is_shutdown(self) -> bool:
         return self._shutdown_event.is_set()
 
+    def is_started(self) -> bool:
+        """
+        True once setup() completed and run() is executing.
+        """
+        return self._started_event.is_set()
+
+    async def wait_started(self):
+        """
+        Wait until setup() completed.
+        """
+        await self._started_event.wait()
+
     async def wait_or_timeout(self, timeout: float):  # noqa: ASYNC109
         """
         Wait for shutdown event or timeout.
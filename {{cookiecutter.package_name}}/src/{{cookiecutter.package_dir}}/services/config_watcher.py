@@ -0,0 +1,83 @@
+import asyncio
+import logging
+from collections.abc import Awaitable
+from collections.abc import Callable
+from pathlib import Path
+
+from .baseasync import BaseServiceAsync
+
+logger = logging.getLogger(__name__)
+
+
+class ConfigWatcher(BaseServiceAsync):
+    """
+    Polls a config file and calls ``on_change`` with the reloaded config.
+
+    Polling the file's mtime and size is cheap and works everywhere
+    (including on filesystems without inotify). The file is reloaded with
+    ``loader`` in a thread; a file that fails to load is logged and the
+    current config stays in effect until the next change.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        loader: Callable[[], object],
+        on_change: Callable[[object], Awaitable[None]],
+        interval: float = 2.0,
+    ):
+        """
+        :param path: file to watch
+        :param loader: blocking function returning the parsed config
+        :param on_change: coroutine called with each newly loaded config
+        :param interval: seconds between checks
+        """
+        super().__init__()
+        self.path = Path(path)
+        self.loader = loader
+        self.on_change = on_change
+        self.interval = interval
+        self._stat: tuple[int, int] | None = None
+
+    def _read_stat(self) -> tuple[int, int] | None:
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    async def check(self) -> bool:
+        """Reload if the file changed since the last check. Returns True if so."""
+        stat = self._read_stat()
+        if stat is None or stat == self._stat:
+            return False
+        self._stat = stat
+        logger.info("Config file %s changed, reloading", self.path)
+        try:
+            config = await asyncio.to_thread(self.loader)
+        except Exception:
+            logger.exception("Failed to reload %s, keeping current config", self.path)
+            return False
+        try:
+            await self.on_change(config)
+        except Exception:
+            logger.exception("Failed to apply config from %s", self.path)
+        return True
+
+    async def setup(self):
+        # The config in use was loaded at startup; only react to later edits
+        self._stat = self._read_stat()
+
+    async def cleanup(self):
+        pass
+
+    async def run(self):
+        logger.info(
+            "%s watching %s every %.1fs",
+            self.__class__.__name__,
+            self.path,
+            self.interval,
+        )
+        while not await self.wait_or_timeout(self.interval):
+            await self.check()
@@ -0,0 +1,151 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+from collections.abc import Callable
+from contextlib import suppress
+from pathlib import Path
+
+from .baseasync import BaseServiceAsync
+
+logger = logging.getLogger(__name__)
+
+
+class HealthServer(BaseServiceAsync):
+    """
+    Local health endpoint on a UNIX socket.
+
+    Every connection gets one line of JSON from ``source()`` and is closed;
+    nothing is read from the client, so a check is just a connect, e.g.
+    ``nc -U health.sock`` or read_health(). The answer is built from
+    in-memory state only and does not depend on the broker.
+    """
+
+    def __init__(self, *, socket_path: Path, source: Callable[[], dict]):
+        """
+        :param socket_path: UNIX socket to bind
+        :param source: returns the health document
+        """
+        super().__init__()
+        self.socket_path = Path(socket_path)
+        self.source = source
+        self._server: asyncio.Server | None = None
+
+    async def setup(self):
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        with suppress(FileNotFoundError):
+            self.socket_path.unlink()
+        self._server = await asyncio.start_unix_server(
+            self._handle_client, path=self.socket_path
+        )
+        logger.info("Serving health on unix:%s", self.socket_path)
+
+    async def cleanup(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        with suppress(FileNotFoundError):
+            self.socket_path.unlink()
+
+    async def run(self):
+        await self._shutdown_event.wait()
+
+    async def _handle_client(self, reader, writer):
+        try:
+            writer.write(json.dumps(self.source()).encode() + b"\n")
+            await writer.drain()
+        except Exception:
+            logger.exception("Error serving health request")
+        finally:
+            writer.close()
+            with suppress(Exception):
+                await writer.wait_closed()
+
+
+def read_health(socket_path: Path, timeout: float = 1.0) -> dict:
+    """Read the health document from a HealthServer socket (blocking)."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(str(socket_path))
+        data = b""
+        while chunk := sock.recv(65536):
+            data += chunk
+    return json.loads(data)
+
+
+class SystemdNotifier(BaseServiceAsync):
+    """
+    sd_notify(3) READY/WATCHDOG/STOPPING messages for a systemd unit with
+    ``Type=notify`` and optionally ``WatchdogSec=``.
+
+    Watchdog pings are sent every half ``WATCHDOG_USEC``, but only while
+    ``live()`` is true, so systemd restarts the process when the loop stops
+    making progress instead of only when it dies. Does nothing when not
+    started by systemd (no ``NOTIFY_SOCKET``).
+    """
+
+    def __init__(self, *, live: Callable[[], bool], environ=os.environ):
+        """
+        :param live: returns False to withhold the next watchdog ping
+        """
+        super().__init__()
+        self.live = live
+        self.address = environ.get("NOTIFY_SOCKET") or None
+        usec = environ.get("WATCHDOG_USEC")
+        self.watchdog_interval = int(usec) / 1e6 / 2 if usec else None
+        self.missed = 0
+        self._sock: socket.socket | None = None
+
+    def notify(self, state: str) -> bool:
+        """Send ``state`` (e.g. "READY=1"); returns False if it wasn't sent."""
+        if self._sock is None:
+            return False
+        address = self.address
+        if address.startswith("@"):
+            # Abstract namespace socket
+            address = "\0" + address[1:]
+        try:
+            self._sock.sendto(state.encode(), address)
+        except OSError as e:
+            logger.warning("sd_notify %s failed: %s", state, e)
+            return False
+        return True
+
+    def ready(self) -> None:
+        """Tell systemd that startup is complete."""
+        if self.notify("READY=1"):
+            logger.info("Notified systemd: ready")
+
+    async def setup(self):
+        if self.address is None:
+            logger.debug("NOTIFY_SOCKET not set, not notifying systemd")
+            return
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.settimeout(0)
+
+    async def cleanup(self):
+        if self._sock is not None:
+            self.notify("STOPPING=1")
+            self._sock.close()
+            self._sock = None
+
+    async def run(self):
+        if self._sock is None or self.watchdog_interval is None:
+            await self._shutdown_event.wait()
+            return
+        logger.info(
+            "%s pinging the watchdog every %.1fs",
+            self.__class__.__name__,
+            self.watchdog_interval,
+        )
+        while not await self.wait_or_timeout(self.watchdog_interval):
+            if self.live():
+                self.missed = 0
+                self.notify("WATCHDOG=1")
+            else:
+                self.missed += 1
+                logger.warning(
+                    "Not live, withholding watchdog ping (%d missed)", self.missed
+                )
@@ -1,31 +1,121 @@
+import asyncio
 import logging
 import time
 from collections.abc import Callable
+from contextlib import suppress
 from typing import Any
 
+from {{cookiecutter.package_dir}}.metrics import REGISTRY
+from {{cookiecutter.package_dir}}.metrics import MetricsRegistry
+
 from .baseasync import BaseServiceAsync
 
 logger = logging.getLogger(__name__)
 
 
+def _changed(old: Any, new: Any, threshold: float) -> bool:
+    """Return True if ``new`` differs from ``old`` by more than ``threshold``."""
+    if isinstance(old, dict) and isinstance(new, dict):
+        if old.keys() != new.keys():
+            return True
+        return any(_changed(old[k], new[k], threshold) for k in new)
+    numeric = (int, float)
+    if (
+        isinstance(old, numeric)
+        and isinstance(new, numeric)
+        and not isinstance(old, bool)
+        and not isinstance(new, bool)
+    ):
+        return abs(new - old) > threshold
+    return old != new
+
+
 class HeartbeatService(BaseServiceAsync):
-    """Service to publish heartbeat messages via MQTT with support for multiple payload sources."""
+    """
+    Service to publish heartbeat messages via MQTT with support for multiple payload sources.
+
+    In adaptive mode, sources are polled every ``min_interval`` and the
+    heartbeat is published immediately when a watched source changes
+    significantly. While nothing changes the interval stretches towards
+    ``max_interval``, and slow publishes back it off as well.
+    """
 
-    def __init__(self, *, mqtt, interval=10):
+    def __init__(  # noqa: PLR0913
+        self,
+        *,
+        mqtt,
+        interval=10,
+        metrics: MetricsRegistry | None = REGISTRY,
+        adaptive: bool = False,
+        min_interval: float = 1.0,
+        max_interval: float = 60.0,
+        stretch_factor: float = 1.5,
+        slow_publish: float = 0.5,
+    ):
+        """
+        :param interval: seconds between heartbeats (the starting interval in
+            adaptive mode)
+        :param adaptive: publish on change and stretch the interval when idle
+        :param min_interval: lower bound of the interval, and source polling
+            period in adaptive mode
+        :param max_interval: upper bound of the interval in adaptive mode
+        :param stretch_factor: interval multiplier applied after every
+            heartbeat without changes
+        :param slow_publish: publish latency (seconds) above which the broker
+            is considered struggling and the interval is doubled
+        """
         super().__init__()
         self._mqtt = mqtt
         self.interval = interval
+        self.metrics = metrics
+        self.adaptive = adaptive
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.stretch_factor = stretch_factor
+        self.slow_publish = slow_publish
         self._sources: dict[str, Callable[[], Any]] = {}
+        self._watchers: dict[str, Callable[[Any, Any], bool]] = {}
+        self._last_sent: dict[str, Any] = {}
+        self._wakeup = asyncio.Event()
+        self._notified = False
+        self._current_interval = float(interval)
+        self._backing_off = False
+        # Wall clock time of the last successful publish
+        self.last_sent: float | None = None
 
-    def register_source(self, name: str, source_func: Callable[[], Any]) -> None:
+        registry = metrics or REGISTRY
+        self._m_interval = registry.gauge(
+            "heartbeat_interval_seconds", "Current heartbeat interval"
+        )
+        self._m_publish_time = registry.histogram(
+            "heartbeat_publish_seconds", "Heartbeat publish latency"
+        )
+
+    def register_source(
+        self,
+        name: str,
+        source_func: Callable[[], Any],
+        *,
+        threshold: float | None = None,
+        on_change: Callable[[Any, Any], bool] | None = None,
+    ) -> None:
         """
         Register a payload source function.
 
         Args:
             name: Unique name for this source
             source_func: Function that returns data to include in payload
+            threshold: in adaptive mode, publish immediately when any numeric
+                value of this source moves by more than ``threshold`` (or any
+                other value changes) since the last heartbeat
+            on_change: in adaptive mode, ``on_change(old, new)`` returning
+                True triggers an immediate heartbeat; overrides ``threshold``
         """
         self._sources[name] = source_func
+        if on_change is not None:
+            self._watchers[name] = on_change
+        elif threshold is not None:
+            self._watchers[name] = lambda old, new: _changed(old, new, threshold)
         logger.debug(
             "Registered heartbeat source: '%s' => '%s'", name, source_func.__name__
         )
@@ -34,6 +124,8 @@ class HeartbeatService(BaseServiceAsync):
         """Remove a registered source. Returns True if source was found and removed."""
         if name in self._sources:
             del self._sources[name]
+            self._watchers.pop(name, None)
+            self._last_sent.pop(name, None)
             logger.debug("Unregistered heartbeat source: '%s'", name)
             return True
         return False
@@ -42,6 +134,47 @@ class HeartbeatService(BaseServiceAsync):
         """Return list of registered source names."""
         return list(self._sources.keys())
 
+    @property
+    def current_interval(self) -> float:
+        """Interval currently used between heartbeats."""
+        return self._current_interval
+
+    def reconfigure(self, **options) -> None:
+        """
+        Change interval settings in place, e.g. after a config reload.
+
+        Accepts the keyword arguments of __init__ except ``mqtt`` and
+        ``metrics``. The interval restarts from ``interval`` and the
+        pending sleep is cut short.
+        """
+        allowed = {
+            "interval",
+            "adaptive",
+            "min_interval",
+            "max_interval",
+            "stretch_factor",
+            "slow_publish",
+        }
+        unknown = options.keys() - allowed
+        if unknown:
+            msg = f"Unknown heartbeat options: {sorted(unknown)}"
+            raise ValueError(msg)
+        for name, value in options.items():
+            setattr(self, name, value)
+        self._current_interval = float(self.interval)
+        self._backing_off = False
+        self._m_interval.set(self._current_interval)
+        self._wakeup.set()
+
+    def notify(self) -> None:
+        """Request a heartbeat as soon as possible (adaptive mode)."""
+        self._notified = True
+        self._wakeup.set()
+
+    async def stop(self):
+        await super().stop()
+        self._wakeup.set()
+
     async def _execute_source(
         self, name: str, source_func: Callable
     ) -> tuple[str, Any, bool]:
@@ -62,8 +195,52 @@ class HeartbeatService(BaseServiceAsync):
             if success and data is not None:
                 payload[source_name] = data
 
+        if self.metrics is not None:
+            payload["metrics"] = self.metrics.snapshot()
+
         return {"timestamp": int(time.time() * 1000), **payload}
 
+    def _significant_change(self, payload: dict) -> bool:
+        """Check watched sources against the last published heartbeat."""
+        for name, watcher in self._watchers.items():
+            if name not in payload or name not in self._last_sent:
+                continue
+            try:
+                if watcher(self._last_sent[name], payload[name]):
+                    logger.debug("Heartbeat source '%s' changed", name)
+                    return True
+            except Exception:
+                logger.exception("Error in heartbeat change check '%s'", name)
+        return False
+
+    def _next_interval(self, changed: bool, latency: float) -> float:
+        """Adapt the interval after a heartbeat was published."""
+        if latency > self.slow_publish:
+            interval = self._current_interval * 2
+            self._backing_off = True
+            logger.debug("Slow heartbeat publish (%.3fs), backing off", latency)
+        elif changed:
+            interval = self.interval
+            self._backing_off = False
+        else:
+            interval = self._current_interval * self.stretch_factor
+            self._backing_off = False
+        return min(max(interval, self.min_interval), self.max_interval)
+
+    async def _sleep(self, last_publish: float) -> None:
+        """Sleep until the next heartbeat (or source poll) is due."""
+        remaining = self._current_interval - (time.monotonic() - last_publish)
+        if self.adaptive:
+            timeout = min(self.min_interval, remaining)
+            fallback = self.min_interval
+        else:
+            timeout = remaining
+            fallback = self.interval
+        if timeout <= 0:
+            timeout = fallback
+        with suppress(TimeoutError):
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+
     async def setup(self):
         pass
 
@@ -72,26 +249,51 @@ class HeartbeatService(BaseServiceAsync):
 
     async def run(self):
         logger.info(
-            "%s started with %d registered sources",
+            "%s started with %d registered sources (%s)",
             self.__class__.__name__,
             len(self._sources),
+            "adaptive" if self.adaptive else f"every {self.interval}s",
         )
 
         topic = self._mqtt.build_topic("heartbeat")
+        last_publish = float("-inf")
+        self._m_interval.set(self._current_interval)
 
         while not self.is_shutdown():
             if self._mqtt.connected_event.is_set():
                 try:
                     payload = await self._compile_payload()
-                    if payload:  # Only publish if we have data
+                    elapsed = time.monotonic() - last_publish
+                    changed = False
+                    if self.adaptive and not self._backing_off:
+                        changed = self._notified or self._significant_change(payload)
+                    if elapsed >= self._current_interval or (
+                        changed and elapsed >= self.min_interval
+                    ):
+                        started = time.monotonic()
                         await self._mqtt.publish_json(
                             topic, payload, qos=0, retain=True
                         )
-                    else:
-                        logger.debug("No payload data to publish")
+                        last_publish = time.monotonic()
+                        self.last_sent = time.time()
+                        latency = last_publish - started
+                        self._m_publish_time.observe(latency)
+                        self._notified = False
+                        self._last_sent = {
+                            name: payload[name]
+                            for name in self._watchers
+                            if name in payload
+                        }
+                        if self.adaptive:
+                            self._current_interval = self._next_interval(
+                                changed, latency
+                            )
+                            self._m_interval.set(self._current_interval)
                 except Exception:
                     logger.exception("Error in heartbeat publishing")
 
-            await self.wait_or_timeout(self.interval)
+            self._wakeup.clear()
+            if not self.is_shutdown():
+                await self._sleep(last_publish)
 
         logger.info("%s stopped", self.__class__.__name__)
@@ -0,0 +1,138 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+
+from {{cookiecutter.package_dir}}.metrics import REGISTRY
+from {{cookiecutter.package_dir}}.metrics import MetricsRegistry
+
+from .baseasync import BaseServiceAsync
+
+logger = logging.getLogger(__name__)
+
+
+class LoopLagMonitor(BaseServiceAsync):
+    """
+    Measures event loop scheduling delay and attributes stalls.
+
+    A probe sleeps ``interval`` seconds and records how late it wakes up.
+    A watchdog thread checks that the probe keeps ticking; when the loop
+    has been stuck for more than ``threshold`` seconds it captures the
+    stack of the loop thread, i.e. the synchronous code that is blocking
+    it, and logs it together with the name of the running task.
+    """
+
+    def __init__(
+        self,
+        *,
+        interval: float = 0.25,
+        threshold: float = 0.5,
+        metrics: MetricsRegistry | None = None,
+    ):
+        """
+        :param interval: seconds between lag probes
+        :param threshold: lag (seconds) above which a stall is reported
+        """
+        super().__init__()
+        self.interval = interval
+        self.threshold = threshold
+        self.last_stall: dict | None = None
+        self.last_lag = 0.0
+        self._last_tick = time.monotonic()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id: int | None = None
+        self._watchdog: threading.Thread | None = None
+        self._watchdog_stop = threading.Event()
+
+        metrics = metrics or REGISTRY
+        self._m_lag = metrics.histogram(
+            "loop_lag_seconds", "Event loop scheduling delay"
+        )
+        self._m_stalls = metrics.counter(
+            "loop_stalls", "Times the loop was blocked longer than the threshold"
+        )
+
+    def tick_age(self) -> float:
+        """Seconds since the probe last woke up; grows while the loop is stuck."""
+        return time.monotonic() - self._last_tick
+
+    def stats(self) -> dict:
+        """Return lag percentiles (ms) and the stall count."""
+        lag = self._m_lag
+        return {
+            "lag_p50_ms": round(lag.percentile(50) * 1000, 3),
+            "lag_p99_ms": round(lag.percentile(99) * 1000, 3),
+            "lag_max_ms": round(lag.max * 1000, 3) if lag.count else 0.0,
+            "stalls": int(self._m_stalls.value),
+        }
+
+    # --------------------------------------------------------------------------
+    # Watchdog thread
+    # --------------------------------------------------------------------------
+
+    def _capture(self, stalled: float) -> None:
+        """Log where the loop thread is stuck. Runs in the watchdog thread."""
+        frame = sys._current_frames().get(self._loop_thread_id)  # noqa: SLF001
+        stack = "".join(traceback.format_stack(frame)) if frame else ""
+        task = asyncio.current_task(self._loop)
+        self.last_stall = {
+            "seconds": round(stalled, 3),
+            "task": task.get_name() if task else None,
+            "stack": stack,
+        }
+        self._m_stalls.inc()
+        logger.warning(
+            "Event loop blocked for %.3fs in task %s:\n%s",
+            stalled,
+            self.last_stall["task"],
+            stack,
+        )
+
+    def _watch(self) -> None:
+        reported_tick = None
+        while not self._watchdog_stop.wait(self.threshold / 2):
+            # Read every time, interval and threshold can be changed live
+            limit = self.interval + self.threshold
+            tick = self._last_tick
+            stalled = time.monotonic() - tick
+            # Report each stall once, while it is still happening
+            if stalled > limit and tick != reported_tick:
+                reported_tick = tick
+                self._capture(stalled - self.interval)
+
+    # --------------------------------------------------------------------------
+    # Service
+    # --------------------------------------------------------------------------
+
+    async def setup(self):
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._watchdog_stop.clear()
+        self._watchdog = threading.Thread(
+            target=self._watch, name="loop-watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    async def run(self):
+        logger.info(
+            "%s started (every %.2fs, threshold %.2fs)",
+            self.__class__.__name__,
+            self.interval,
+            self.threshold,
+        )
+        while not self.is_shutdown():
+            started = time.monotonic()
+            if await self.wait_or_timeout(self.interval):
+                break
+            self._last_tick = now = time.monotonic()
+            self.last_lag = max(now - started - self.interval, 0.0)
+            self._m_lag.observe(self.last_lag)
+
+    async def cleanup(self):
+        self._watchdog_stop.set()
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1.0)
+            self._watchdog = None
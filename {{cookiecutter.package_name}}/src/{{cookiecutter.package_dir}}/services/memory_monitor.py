@@ -0,0 +1,212 @@
+import asyncio
+import logging
+import time
+import tracemalloc
+from collections import deque
+from collections.abc import Awaitable
+from collections.abc import Callable
+from pathlib import Path
+
+import psutil
+
+from {{cookiecutter.package_dir}}.metrics import REGISTRY
+from {{cookiecutter.package_dir}}.metrics import MetricsRegistry
+
+from .baseasync import BaseServiceAsync
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+
+class MemoryMonitor(BaseServiceAsync):
+    """
+    Tracks RSS (and tracemalloc totals while tracing) and alerts on growth.
+
+    Every ``interval`` seconds the RSS is compared with the lowest RSS seen
+    in the last ``window`` seconds; growth above ``threshold_mb`` logs a
+    warning and calls ``on_alert``. Further alerts need another
+    ``threshold_mb`` of growth on top of the last one.
+
+    tracemalloc is only enabled for the duration of diff_snapshots(), so
+    normally there is no allocation tracing overhead at all.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        *,
+        interval: float = 60.0,
+        window: float = 3600.0,
+        threshold_mb: float = 50.0,
+        trace_frames: int = 1,
+        on_alert: Callable[[dict], Awaitable[None]] | None = None,
+        metrics: MetricsRegistry | None = None,
+    ):
+        """
+        :param interval: seconds between samples
+        :param window: seconds of history growth is measured over
+        :param threshold_mb: RSS growth (MiB) within ``window`` that alerts
+        :param trace_frames: frames tracemalloc keeps per allocation
+        :param on_alert: coroutine called with the alert details
+        """
+        super().__init__()
+        self.interval = interval
+        self.window = window
+        self.threshold_mb = threshold_mb
+        self.trace_frames = trace_frames
+        self.on_alert = on_alert
+        self.last_alert: dict | None = None
+        self._process = psutil.Process()
+        self._samples: deque[tuple[float, int]] = deque()
+        self._alerted_rss: int | None = None
+        self._snapshotting = False
+
+        metrics = metrics or REGISTRY
+        self._m_rss = metrics.gauge("process_rss_bytes", "Resident set size")
+        self._m_traced = metrics.gauge(
+            "tracemalloc_traced_bytes", "Memory traced by tracemalloc"
+        )
+        self._m_alerts = metrics.counter(
+            "memory_growth_alerts", "Times RSS grew past the threshold"
+        )
+
+    def stats(self) -> dict:
+        """Return the current RSS, its growth within the window and traced MiB."""
+        if not self._samples:
+            return {
+                "rss_mb": 0.0,
+                "growth_mb": 0.0,
+                "tracing": tracemalloc.is_tracing(),
+            }
+        rss = self._samples[-1][1]
+        stats = {
+            "rss_mb": round(rss / MB, 1),
+            "growth_mb": round(self.growth() / MB, 1),
+            "tracing": tracemalloc.is_tracing(),
+        }
+        if tracemalloc.is_tracing():
+            stats["traced_mb"] = round(tracemalloc.get_traced_memory()[0] / MB, 1)
+        return stats
+
+    def growth(self) -> int:
+        """RSS growth in bytes since the lowest sample within the window."""
+        if not self._samples:
+            return 0
+        return self._samples[-1][1] - min(rss for _, rss in self._samples)
+
+    # --------------------------------------------------------------------------
+    # Sampling
+    # --------------------------------------------------------------------------
+
+    async def sample(self) -> None:
+        """Take one RSS sample and alert if growth passes the threshold."""
+        now = time.monotonic()
+        rss = self._process.memory_info().rss
+        self._samples.append((now, rss))
+        while self._samples[0][0] < now - self.window:
+            self._samples.popleft()
+        self._m_rss.set(rss)
+        if tracemalloc.is_tracing():
+            self._m_traced.set(tracemalloc.get_traced_memory()[0])
+
+        growth = self.growth()
+        threshold = self.threshold_mb * MB
+        if growth < threshold:
+            self._alerted_rss = None
+            return
+        if self._alerted_rss is not None and rss - self._alerted_rss < threshold:
+            return
+
+        self._alerted_rss = rss
+        self._m_alerts.inc()
+        self.last_alert = {
+            "rss_mb": round(rss / MB, 1),
+            "growth_mb": round(growth / MB, 1),
+            "window_seconds": self.window,
+        }
+        logger.warning(
+            "RSS grew by %.1f MiB to %.1f MiB within %.0fs",
+            growth / MB,
+            rss / MB,
+            self.window,
+        )
+        if self.on_alert is not None:
+            try:
+                await self.on_alert(self.last_alert)
+            except Exception:
+                logger.exception("Memory alert callback failed")
+
+    # --------------------------------------------------------------------------
+    # tracemalloc snapshots
+    # --------------------------------------------------------------------------
+
+    @staticmethod
+    def _take_snapshot() -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),  # noqa: FBT003
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),  # noqa: FBT003
+            )
+        )
+
+    async def diff_snapshots(self, seconds: float, limit: int = 10) -> list[dict]:
+        """
+        Trace allocations for ``seconds`` and return the ``limit`` source
+        lines whose allocated size grew the most.
+
+        Tracing is started for the call (if it is not already on) and
+        stopped afterwards.
+        """
+        if self._snapshotting:
+            msg = "A memory snapshot is already in progress"
+            raise RuntimeError(msg)
+        self._snapshotting = True
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start(self.trace_frames)
+        try:
+            first = await asyncio.to_thread(self._take_snapshot)
+            await asyncio.sleep(seconds)
+            second = await asyncio.to_thread(self._take_snapshot)
+            diff = await asyncio.to_thread(second.compare_to, first, "lineno")
+        finally:
+            if started:
+                tracemalloc.stop()
+            self._snapshotting = False
+
+        top = []
+        for stat in diff[:limit]:
+            frame = stat.traceback[0]
+            top.append(
+                {
+                    "line": f"{Path(frame.filename).name}:{frame.lineno}",
+                    "size_diff_kb": round(stat.size_diff / 1024, 1),
+                    "size_kb": round(stat.size / 1024, 1),
+                    "count_diff": stat.count_diff,
+                }
+            )
+        return top
+
+    # --------------------------------------------------------------------------
+    # Service
+    # --------------------------------------------------------------------------
+
+    async def setup(self):
+        self._samples.clear()
+        self._alerted_rss = None
+
+    async def cleanup(self):
+        pass
+
+    async def run(self):
+        logger.info(
+            "%s started (every %.0fs, alert on %.0f MiB growth within %.0fs)",
+            self.__class__.__name__,
+            self.interval,
+            self.threshold_mb,
+            self.window,
+        )
+        while not self.is_shutdown():
+            await self.sample()
+            if await self.wait_or_timeout(self.interval):
+                break
@@ -0,0 +1,127 @@
+import asyncio
+import logging
+from contextlib import suppress
+from pathlib import Path
+
+from {{cookiecutter.package_dir}}.openmetrics import CONTENT_TYPE
+from {{cookiecutter.package_dir}}.openmetrics import OpenMetricsRenderer
+
+from .baseasync import BaseServiceAsync
+
+logger = logging.getLogger(__name__)
+
+MAX_REQUEST_BYTES = 8192
+
+
+class MetricsServer(BaseServiceAsync):
+    """
+    Minimal HTTP endpoint serving ``GET /metrics`` in OpenMetrics format.
+
+    Intended for a Prometheus running on the same host or gateway, so it
+    binds to a local address or a UNIX socket and speaks just enough HTTP
+    for a scrape.
+    """
+
+    def __init__(
+        self,
+        *,
+        renderer: OpenMetricsRenderer,
+        host: str = "127.0.0.1",
+        port: int = 9464,
+        socket_path: Path | None = None,
+        path: str = "/metrics",
+    ):
+        """
+        :param renderer: produces the exposition document
+        :param host: address to bind when ``socket_path`` is not set
+        :param port: port to bind when ``socket_path`` is not set
+        :param socket_path: UNIX socket to bind instead of TCP
+        :param path: URL path the metrics are served on
+        """
+        super().__init__()
+        self.renderer = renderer
+        self.host = host
+        self.port = port
+        self.socket_path = Path(socket_path) if socket_path else None
+        self.path = path
+        self._server: asyncio.Server | None = None
+
+    async def setup(self):
+        if self.socket_path:
+            with suppress(FileNotFoundError):
+                self.socket_path.unlink()
+            self._server = await asyncio.start_unix_server(
+                self._handle_client, path=self.socket_path
+            )
+            logger.info("Serving metrics on unix:%s", self.socket_path)
+        else:
+            self._server = await asyncio.start_server(
+                self._handle_client, self.host, self.port
+            )
+            logger.info(
+                "Serving metrics on http://%s:%d%s", self.host, self.port, self.path
+            )
+
+    async def cleanup(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self.socket_path:
+            with suppress(FileNotFoundError):
+                self.socket_path.unlink()
+
+    async def run(self):
+        await self._shutdown_event.wait()
+
+    async def _handle_client(self, reader, writer):
+        try:
+            request = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout=5.0)
+            if len(request) > MAX_REQUEST_BYTES:
+                await self._respond(writer, 431, "Request Header Fields Too Large")
+                return
+
+            method, target, *_ = request.split(b"\r\n", 1)[0].decode().split(" ")
+            if method not in ("GET", "HEAD"):
+                await self._respond(writer, 405, "Method Not Allowed")
+            elif target.split("?", 1)[0] != self.path:
+                await self._respond(writer, 404, "Not Found")
+            else:
+                body = self.renderer.render().encode()
+                await self._respond(
+                    writer,
+                    200,
+                    "OK",
+                    body=b"" if method == "HEAD" else body,
+                    content_type=CONTENT_TYPE,
+                    length=len(body),
+                )
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, TimeoutError):
+            pass
+        except ValueError:
+            await self._respond(writer, 400, "Bad Request")
+        except Exception:
+            logger.exception("Error serving metrics request")
+        finally:
+            writer.close()
+            with suppress(Exception):
+                await writer.wait_closed()
+
+    @staticmethod
+    async def _respond(  # noqa: PLR0913
+        writer,
+        status: int,
+        reason: str,
+        *,
+        body: bytes = b"",
+        content_type: str = "text/plain; charset=utf-8",
+        length: int | None = None,
+    ):
+        headers = (
+            f"HTTP/1.1 {status} {reason}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body) if length is None else length}\r\n"
+            "Connection: close\r\n\r\n"
+        )
+        writer.write(headers.encode() + body)
+        await writer.drain()
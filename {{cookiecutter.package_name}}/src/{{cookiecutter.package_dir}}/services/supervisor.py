@@ -0,0 +1,311 @@
+import asyncio
+import logging
+import time
+from contextlib import suppress
+from dataclasses import dataclass
+from dataclasses import field
+
+from {{cookiecutter.package_dir}}.metrics import REGISTRY
+from {{cookiecutter.package_dir}}.metrics import MetricsRegistry
+
+from .baseasync import BaseServiceAsync
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RestartPolicy:
+    """When and how fast a crashed service is restarted."""
+
+    max_restarts: int = 5
+    backoff_initial: float = 1.0
+    backoff_max: float = 60.0
+    backoff_factor: float = 2.0
+    # A service that ran this long before crashing gets its restart count reset
+    reset_after: float = 300.0
+
+    def backoff(self, restarts: int) -> float:
+        """Delay before restart number ``restarts`` (1-based)."""
+        delay = self.backoff_initial * self.backoff_factor ** (restarts - 1)
+        return min(delay, self.backoff_max)
+
+
+NO_RESTART = RestartPolicy(max_restarts=0)
+
+
+@dataclass
+class _Supervised:
+    name: str
+    service: BaseServiceAsync
+    depends_on: tuple[str, ...]
+    restart: RestartPolicy
+    start_timeout: float
+    state: str = "stopped"
+    restarts: int = 0
+    startup_seconds: float | None = None
+    shutdown_seconds: float | None = None
+    task: asyncio.Task | None = field(default=None, repr=False)
+    # Set when a start attempt crashes, so startup need not wait it out
+    crashed: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+
+class ServiceSupervisor:
+    """
+    Start, watch and stop BaseServiceAsync instances from a dependency graph.
+
+    Services are started in dependency order, with every service whose
+    dependencies are running started concurrently, and stopped in reverse
+    order the same way. A service that crashes is restarted according to its
+    RestartPolicy.
+    """
+
+    def __init__(self, metrics: MetricsRegistry | None = None):
+        self._services: dict[str, _Supervised] = {}
+        self._metrics = metrics or REGISTRY
+
+    def add(
+        self,
+        name: str,
+        service: BaseServiceAsync,
+        *,
+        depends_on: tuple[str, ...] = (),
+        restart: RestartPolicy | None = None,
+        start_timeout: float = 30.0,
+    ) -> None:
+        """
+        Register a service.
+
+        Args:
+            name: Unique service name
+            service: The service instance
+            depends_on: Names of services that must be started first
+                (and are stopped after this one)
+            restart: Restart policy; defaults to ``RestartPolicy()``
+            start_timeout: Seconds to wait for setup() before moving on
+        """
+        if name in self._services:
+            msg = f"Service '{name}' already registered"
+            raise ValueError(msg)
+        self._services[name] = _Supervised(
+            name=name,
+            service=service,
+            depends_on=tuple(depends_on),
+            restart=restart or RestartPolicy(),
+            start_timeout=start_timeout,
+        )
+
+    def get(self, name: str) -> BaseServiceAsync | None:
+        supervised = self._services.get(name)
+        return supervised.service if supervised else None
+
+    def levels(self) -> list[list[str]]:
+        """Group services into start order; each group only depends on earlier ones."""
+        remaining = {name: set(s.depends_on) for name, s in self._services.items()}
+        for name, deps in remaining.items():
+            unknown = deps - remaining.keys()
+            if unknown:
+                msg = (
+                    f"Service '{name}' depends on unknown service(s): {sorted(unknown)}"
+                )
+                raise ValueError(msg)
+
+        levels = []
+        done: set[str] = set()
+        while remaining:
+            level = [name for name, deps in remaining.items() if deps <= done]
+            if not level:
+                msg = f"Dependency cycle between services: {sorted(remaining)}"
+                raise ValueError(msg)
+            levels.append(level)
+            done.update(level)
+            for name in level:
+                del remaining[name]
+        return levels
+
+    # --------------------------------------------------------------------------
+    # Start
+    # --------------------------------------------------------------------------
+
+    async def start(self) -> None:
+        """Start all services in dependency order."""
+        started = time.perf_counter()
+        for level in self.levels():
+            await asyncio.gather(*(self._start_one(name) for name in level))
+        logger.info(
+            "Started %d services in %.3fs",
+            len(self._services),
+            time.perf_counter() - started,
+        )
+
+    async def _start_one(self, name: str) -> None:
+        supervised = self._services[name]
+        service = supervised.service
+        supervised.state = "starting"
+        supervised.crashed.clear()
+        started = time.perf_counter()
+        supervised.task = asyncio.create_task(
+            self._supervise(supervised), name=f"service:{name}"
+        )
+
+        waiter = asyncio.create_task(service.wait_started())
+        crashed = asyncio.create_task(supervised.crashed.wait())
+        done, _ = await asyncio.wait(
+            {waiter, crashed, supervised.task},
+            timeout=supervised.start_timeout,
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+        waiter.cancel()
+        crashed.cancel()
+        if waiter in done:
+            supervised.startup_seconds = time.perf_counter() - started
+            self._metrics.histogram(
+                "service_start_seconds", "Service startup time", service=name
+            ).observe(supervised.startup_seconds)
+            logger.info(
+                "Service '%s' started in %.3fs", name, supervised.startup_seconds
+            )
+        elif crashed in done:
+            logger.warning(
+                "Service '%s' failed to start (%s), continuing", name, supervised.state
+            )
+        elif not done:
+            logger.warning(
+                "Service '%s' not started after %.1fs, continuing",
+                name,
+                supervised.start_timeout,
+            )
+
+    async def _supervise(self, supervised: _Supervised) -> None:
+        """Run a service, restarting it after crashes as its policy allows."""
+        service = supervised.service
+        restarts = self._metrics.counter(
+            "service_restarts", "Service restarts", service=supervised.name
+        )
+        while True:
+            supervised.state = "running"
+            run_started = time.monotonic()
+            try:
+                await service.start()
+            except asyncio.CancelledError:
+                supervised.state = "cancelled"
+                raise
+            except Exception:  # noqa: BLE001
+                # Already logged by BaseServiceAsync.start()
+                crashed = True
+            else:
+                crashed = False
+            if not crashed or service.is_shutdown():
+                break
+
+            if time.monotonic() - run_started >= supervised.restart.reset_after:
+                supervised.restarts = 0
+            if supervised.restarts >= supervised.restart.max_restarts:
+                supervised.state = "failed"
+                supervised.crashed.set()
+                logger.error(
+                    "Service '%s' failed after %d restarts, giving up",
+                    supervised.name,
+                    supervised.restarts,
+                )
+                return
+
+            supervised.restarts += 1
+            restarts.inc()
+            delay = supervised.restart.backoff(supervised.restarts)
+            supervised.state = "backoff"
+            supervised.crashed.set()
+            logger.warning(
+                "Restarting service '%s' in %.1fs (restart %d/%d)",
+                supervised.name,
+                delay,
+                supervised.restarts,
+                supervised.restart.max_restarts,
+            )
+            if await service.wait_or_timeout(delay):
+                break
+
+        supervised.state = "stopped"
+
+    # --------------------------------------------------------------------------
+    # Stop
+    # --------------------------------------------------------------------------
+
+    async def stop(
+        self,
+        timeout: float = 10.0,  # noqa: ASYNC109
+        names: list[str] | None = None,
+    ) -> list[str]:
+        """
+        Stop services in reverse dependency order.
+
+        Args:
+            timeout: Total seconds allowed; services still running when it
+                expires are cancelled
+            names: Only stop these services (default: all)
+
+        Returns:
+            Names of the services that had to be cancelled.
+        """
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        deadline = loop.time() + timeout
+        cancelled = []
+        for level in reversed(self.levels()):
+            selected = [n for n in level if names is None or n in names]
+            results = await asyncio.gather(
+                *(self._stop_one(n, max(deadline - loop.time(), 0)) for n in selected)
+            )
+            cancelled.extend(
+                n for n, ok in zip(selected, results, strict=True) if not ok
+            )
+        logger.info(
+            "Stopped %s in %.3fs",
+            ", ".join(names) if names is not None else "all services",
+            time.perf_counter() - started,
+        )
+        return cancelled
+
+    async def _stop_one(self, name: str, timeout: float) -> bool:  # noqa: ASYNC109
+        """Stop one service; returns False if it had to be cancelled."""
+        supervised = self._services[name]
+        if supervised.task is None:
+            return True
+
+        started = time.perf_counter()
+        supervised.state = "stopping"
+        await supervised.service.stop()
+        done, _ = await asyncio.wait({supervised.task}, timeout=timeout)
+        if not done:
+            logger.warning("Service '%s' did not stop in time, cancelling", name)
+            supervised.task.cancel()
+            with suppress(asyncio.CancelledError):
+                await supervised.task
+        elif not supervised.task.cancelled() and supervised.task.exception():
+            logger.error(
+                "Service '%s' stopped with error: %s", name, supervised.task.exception()
+            )
+
+        supervised.task = None
+        supervised.state = "stopped" if done else "cancelled"
+        supervised.shutdown_seconds = time.perf_counter() - started
+        self._metrics.histogram(
+            "service_stop_seconds", "Service shutdown time", service=name
+        ).observe(supervised.shutdown_seconds)
+        logger.info("Service '%s' stopped in %.3fs", name, supervised.shutdown_seconds)
+        return bool(done)
+
+    # --------------------------------------------------------------------------
+    # Status
+    # --------------------------------------------------------------------------
+
+    def status(self) -> dict:
+        """Return state, restart count and timings of every service."""
+        return {
+            name: {
+                "state": s.state,
+                "restarts": s.restarts,
+                "startup_seconds": s.startup_seconds,
+                "shutdown_seconds": s.shutdown_seconds,
+            }
+            for name, s in self._services.items()
+        }
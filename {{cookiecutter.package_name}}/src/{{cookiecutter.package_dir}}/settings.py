@@ -1,13 +1,30 @@
+import hashlib
+import json
 import logging
+import os
 import shutil
+import tempfile
+import tomllib
+from contextlib import suppress
 from importlib import resources
 from pathlib import Path
 
-import toml
 from pydantic import BaseModel
 from pydantic import ValidationError
+from pydantic import field_validator
 
+from . import __version__
 from .models import AppConfig
+from .models import CommandsConfig
+from .models import GatewayConfig
+from .models import HealthConfig
+from .models import HeartbeatConfig
+from .models import LoopMonitorConfig
+from .models import MemoryMonitorConfig
+from .models import MetricsConfig
+from .models import PoolConfig
+from .models import StatsConfig
+from .models import WorkersConfig
 from .mqtt.models import MQTTConfig
 
 {%- if cookiecutter.use_sentry == "y" %}
@@ -26,6 +43,8 @@ PACKAGE_DIR: str = "{{cookiecutter.package_dir}}"
 SETTINGS_DIR: Path = Path.home() / f".{APP_NAME}"
 CONFIG_FILE: Path = SETTINGS_DIR / f"{APP_NAME}.toml"
 LOG_FILE: Path = SETTINGS_DIR / f"{APP_NAME}.log"
+# Parsed config file, see load_config()
+CONFIG_CACHE: Path = SETTINGS_DIR / f".{APP_NAME}.cache"
 
 # -----------------------------------------------------------------------------
 # Configuration File Setup
@@ -56,26 +75,110 @@ def ensure_config_file() -> None:
 # -----------------------------------------------------------------------------
 
 
+# Always present; [pools.*] tables configure them or add more
+DEFAULT_POOLS: dict[str, PoolConfig] = {
+    "commands": PoolConfig(size=4, max_queued=64),
+    "io": PoolConfig(size=2, max_queued=32),
+}
+
+
 class Settings(BaseModel):
     """Application configuration loaded from TOML."""
 
     app: AppConfig
+{%- if cookiecutter.use_sentry == "y" %}
     sentry: SentryConfig
+{%- endif %}
     mqtt: MQTTConfig
+    heartbeat: HeartbeatConfig = HeartbeatConfig()
+    stats: StatsConfig = StatsConfig()
+    commands: CommandsConfig = CommandsConfig()
+    pools: dict[str, PoolConfig] = DEFAULT_POOLS
+    metrics: MetricsConfig = MetricsConfig()
+    health: HealthConfig = HealthConfig()
+    loop_monitor: LoopMonitorConfig = LoopMonitorConfig()
+    memory_monitor: MemoryMonitorConfig = MemoryMonitorConfig()
+    gateway: GatewayConfig = GatewayConfig()
+    workers: WorkersConfig = WorkersConfig()
+
+    @field_validator("pools")
+    def add_default_pools(cls, v):  # noqa: N805
+        return {**DEFAULT_POOLS, **v}
 
 # -----------------------------------------------------------------------------
 # Configuration Access
 # -----------------------------------------------------------------------------
 
 
-def load_config() -> Settings:
-    """Load and return the configuration instance."""
+def _read_cache() -> dict | None:
+    """Return the cached config entry, or None if missing or unusable."""
+    try:
+        entry = json.loads(CONFIG_CACHE.read_bytes())
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError):
+        logger.debug("Ignoring unreadable config cache %s", CONFIG_CACHE)
+        return None
+    if not isinstance(entry, dict) or entry.get("version") != __version__:
+        return None
+    return entry
+
+
+def _write_cache(entry: dict) -> None:
+    """Replace the cache atomically with a file only the owner can read."""
+    tmp = None
+    try:
+        # mkstemp creates the file with mode 0600
+        fd, name = tempfile.mkstemp(dir=CONFIG_CACHE.parent, prefix=CONFIG_CACHE.name)
+        tmp = Path(name)
+        with os.fdopen(fd, "w") as f:
+            json.dump(entry, f)
+        tmp.replace(CONFIG_CACHE)
+    except (OSError, TypeError, ValueError) as e:
+        # TypeError: TOML values JSON can't hold, e.g. dates
+        logger.debug("Could not write config cache %s: %s", CONFIG_CACHE, e)
+        if tmp is not None:
+            with suppress(OSError):
+                tmp.unlink()
+
+
+def load_config(*, use_cache: bool = True) -> Settings:
+    """
+    Load and return the configuration instance.
+
+    The parsed TOML is cached as JSON in CONFIG_CACHE (mode 0600), keyed
+    by the config file's mtime and size and, if those changed, the SHA-256
+    of its content. An unchanged config therefore skips TOML parsing, the
+    bulk of the cost, and is only validated. The cache holds nothing the
+    config file doesn't (the credentials stay encoded in "creds") and is
+    dropped when the package version changes.
+    """
     ensure_config_file()
 
     try:
-        with CONFIG_FILE.open("r") as f:
-            data = toml.load(f)
-        return Settings(**data)
+        stat = CONFIG_FILE.stat()
+        file_stat = (stat.st_mtime_ns, stat.st_size)
+        cached = _read_cache() if use_cache else None
+        if cached and cached.get("stat") == list(file_stat):
+            return Settings(**cached["config"])
+
+        content = CONFIG_FILE.read_bytes()
+        digest = hashlib.sha256(content).hexdigest()
+        if cached and cached.get("sha256") == digest:
+            data = cached["config"]  # touched but not changed
+        else:
+            data = tomllib.loads(content.decode())
+        settings = Settings(**data)
+        if use_cache:
+            _write_cache(
+                {
+                    "version": __version__,
+                    "stat": file_stat,
+                    "sha256": digest,
+                    "config": data,
+                }
+            )
+        return settings
     except ValidationError:
         logger.exception("Configuration validation failed")
         raise
@@ -0,0 +1,229 @@
+"""
+Memory-mapped binary snapshot of numeric stats and their history buffers.
+
+Layout (native byte order, checked on open)::
+
+    header   HEADER_SIZE bytes: magic, version, byte order, record size,
+             capacity, record count, resolution table
+    record   NAME_SIZE bytes of UTF-8 name, last value (float64), then the
+             RingBuffer buckets of every resolution back to back
+
+The file is sized for ``capacity`` records up front and every record has the
+same size, so a series always lives at the same offset. The TimeSeries handed
+out are backed directly by the memory map: recording a sample updates the
+file in place, saving is just a flush, and restoring involves no parsing.
+"""
+
+import logging
+import mmap
+import struct
+import sys
+from pathlib import Path
+
+from .timeseries import TimeSeries
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"STATSNAP"
+VERSION = 1
+HEADER_SIZE = 256
+NAME_SIZE = 120
+
+_HEADER = struct.Struct("<8sIB3xIIII")
+_RESOLUTION = struct.Struct("<dI4x")
+_VALUE = struct.Struct("d")
+_BYTE_ORDER = 0 if sys.byteorder == "little" else 1
+_MAX_RESOLUTIONS = (HEADER_SIZE - _HEADER.size) // _RESOLUTION.size
+
+
+class StatsSnapshot:
+    """Fixed-layout memory-mapped store of ``name -> (value, TimeSeries)``."""
+
+    def __init__(self, path: str | Path, resolutions, capacity: int = 256):
+        """
+        :param path: snapshot file
+        :param resolutions: ``(bucket_seconds, bucket_count)`` pairs; a file
+            written with different resolutions is discarded
+        :param capacity: maximum number of series
+        """
+        self.path = Path(path)
+        self.resolutions = tuple(
+            (float(width), int(size)) for width, size in sorted(resolutions)
+        )
+        if len(self.resolutions) > _MAX_RESOLUTIONS:
+            msg = f"At most {_MAX_RESOLUTIONS} resolutions are supported"
+            raise ValueError(msg)
+        self.capacity = capacity
+        self.record_size = (
+            NAME_SIZE + _VALUE.size + TimeSeries.storage_bytes(self.resolutions)
+        )
+        self._file = None
+        self._mm: mmap.mmap | None = None
+        self._index: dict[str, int] = {}
+        self._series: dict[str, TimeSeries] = {}
+
+    @property
+    def file_size(self) -> int:
+        return HEADER_SIZE + self.capacity * self.record_size
+
+    # --------------------------------------------------------------------------
+    # File handling
+    # --------------------------------------------------------------------------
+
+    def _write_header(self) -> None:
+        header = _HEADER.pack(
+            MAGIC,
+            VERSION,
+            _BYTE_ORDER,
+            self.record_size,
+            self.capacity,
+            len(self._index),
+            len(self.resolutions),
+        )
+        for width, size in self.resolutions:
+            header += _RESOLUTION.pack(width, size)
+        self._mm[:HEADER_SIZE] = header.ljust(HEADER_SIZE, b"\0")
+
+    def _read_header(self) -> int | None:
+        """Return the record count of a compatible file, else None."""
+        magic, version, order, record_size, capacity, count, n_res = (
+            _HEADER.unpack_from(self._mm)
+        )
+        if (magic, version, order, record_size, capacity) != (
+            MAGIC,
+            VERSION,
+            _BYTE_ORDER,
+            self.record_size,
+            self.capacity,
+        ):
+            return None
+        resolutions = tuple(
+            _RESOLUTION.unpack_from(self._mm, _HEADER.size + i * _RESOLUTION.size)
+            for i in range(n_res)
+        )
+        if resolutions != self.resolutions or count > capacity:
+            return None
+        return count
+
+    def open(self) -> bool:
+        """
+        Map the snapshot file, creating it if needed.
+
+        Returns True if an existing compatible snapshot was found.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = self.path.open("r+b" if self.path.exists() else "w+b")
+        try:
+            restored = self._restore()
+            if not restored:
+                self._file.truncate(0)
+                self._file.truncate(self.file_size)
+                self._mm = mmap.mmap(self._file.fileno(), self.file_size)
+                self._write_header()
+        except BaseException:
+            self._release()
+            raise
+        return restored
+
+    def _restore(self) -> bool:
+        """Index an existing compatible file, discarding anything else."""
+        if self.path.stat().st_size != self.file_size:
+            return False
+        self._mm = mmap.mmap(self._file.fileno(), self.file_size)
+        count = self._read_header()
+        if count is not None:
+            try:
+                self._build_index(count)
+            except UnicodeDecodeError:
+                count = None
+        if count is None:
+            logger.warning("Discarding incompatible stats snapshot %s", self.path)
+            self._index = {}
+            self._mm.close()
+            self._mm = None
+            return False
+        return True
+
+    def flush(self) -> None:
+        """Write dirty pages to disk."""
+        if self._mm is not None:
+            self._mm.flush()
+
+    def close(self) -> None:
+        """Flush and unmap. Series handed out must not be used afterwards."""
+        if self._mm is not None:
+            self._mm.flush()
+        self._release()
+
+    def _release(self) -> None:
+        for series in self._series.values():
+            series.release()
+        self._series.clear()
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    # --------------------------------------------------------------------------
+    # Records
+    # --------------------------------------------------------------------------
+
+    def _offset(self, index: int) -> int:
+        return HEADER_SIZE + index * self.record_size
+
+    def _build_index(self, count: int) -> None:
+        self._index = {}
+        for index in range(count):
+            offset = self._offset(index)
+            raw = self._mm[offset : offset + NAME_SIZE]
+            self._index[raw.rstrip(b"\0").decode()] = index
+
+    def _storage(self, index: int) -> memoryview:
+        start = self._offset(index) + NAME_SIZE + _VALUE.size
+        return memoryview(self._mm)[start : self._offset(index + 1)]
+
+    def names(self) -> list[str]:
+        return list(self._index)
+
+    def series(self, name: str) -> TimeSeries | None:
+        """
+        Return the memory-mapped history of ``name``, allocating a record
+        for new names. Returns None when the snapshot is full.
+        """
+        series = self._series.get(name)
+        if series is not None:
+            return series
+
+        index = self._index.get(name)
+        if index is None:
+            encoded = name.encode()
+            if len(self._index) >= self.capacity or len(encoded) > NAME_SIZE:
+                return None
+            index = len(self._index)
+            offset = self._offset(index)
+            self._mm[offset : offset + NAME_SIZE] = encoded.ljust(NAME_SIZE, b"\0")
+            TimeSeries.clear_storage(self._storage(index), self.resolutions)
+            self._index[name] = index
+            self._write_header()
+
+        series = self._series[name] = TimeSeries(
+            self.resolutions, storage=self._storage(index)
+        )
+        return series
+
+    def get_value(self, name: str) -> float | None:
+        index = self._index.get(name)
+        if index is None:
+            return None
+        return _VALUE.unpack_from(self._mm, self._offset(index) + NAME_SIZE)[0]
+
+    def set_value(self, name: str, value: float) -> None:
+        index = self._index.get(name)
+        if index is not None:
+            _VALUE.pack_into(self._mm, self._offset(index) + NAME_SIZE, value)
+
+    def values(self) -> dict[str, float]:
+        """Return the last value of every stored series."""
+        return {name: self.get_value(name) for name in self._index}
@@ -1,37 +1,77 @@
 import asyncio
 import json
 import logging
+import time
 from collections.abc import Callable
 from datetime import UTC
 from datetime import datetime
 from pathlib import Path
 from typing import Any
 
-import aiofiles
+from .metrics import REGISTRY
+from .metrics import MetricsRegistry
+from .pools import ExecutorPool
+from .services.baseasync import BaseServiceAsync
+from .snapshot import StatsSnapshot
+from .timeseries import DEFAULT_RESOLUTIONS
+from .timeseries import SeriesSummary
+from .timeseries import TimeSeries
+from .tracing import trace
 
 logger = logging.getLogger(__name__)
 
 
-class StatsTracker:
+class StatsTracker(BaseServiceAsync):
     """
     Tracks and periodically persists stats collected from multiple sources.
     """
 
-    def __init__(
+    def __init__(  # noqa: PLR0913
         self,
         stats_file: str = "stats.json",
         save_interval: float = 10.0,
+        *,
+        sample_interval: float | None = None,
+        resolutions=DEFAULT_RESOLUTIONS,
+        max_series: int = 256,
+        metrics: MetricsRegistry | None = REGISTRY,
+        metrics_history: bool = False,
+        snapshot_file: str | Path | None = None,
+        executor: ExecutorPool | None = None,
     ):
         """
         :param stats_file: path to stats JSON file
         :param save_interval: seconds between periodic saves
+        :param sample_interval: seconds between collections into the history
+            buffers (defaults to ``save_interval``)
+        :param resolutions: ``(bucket_seconds, bucket_count)`` pairs kept for
+            every numeric metric
+        :param max_series: maximum number of metrics with history
+        :param metrics: registry whose metrics are collected with every
+            payload (``None`` to disable)
+        :param metrics_history: also keep history of the ``metrics`` payload;
+            off by default, as every histogram field becomes a series and
+            they would crowd out the sources' own
+        :param snapshot_file: optional memory-mapped binary snapshot the
+            history is kept in and restored from at startup; the last stats
+            themselves always come from the JSON file
+        :param executor: pool used for file I/O (defaults to the loop's
+            default executor)
         """
+        super().__init__()
         self.stats_file = Path(stats_file)
         self.save_interval = save_interval
+        self.sample_interval = sample_interval or save_interval
+        self.resolutions = resolutions
+        self.max_series = max_series
+        self.metrics = metrics
+        self.metrics_history = metrics_history
         self._sources: dict[str, Callable[[], Any]] = {}
-        self._task: asyncio.Task | None = None
-        self._shutdown = asyncio.Event()
         self._current_stats = {}  # the last collected stats
+        self._history: dict[str, TimeSeries] = {}
+        self.snapshot_file = Path(snapshot_file) if snapshot_file else None
+        self._snapshot: StatsSnapshot | None = None
+        self.executor = executor
 
     def register_source(self, name: str, source_func: Callable[[], Any]) -> None:
         """
@@ -80,28 +120,65 @@ class StatsTracker:
             if success and data is not None:
                 payload[source_name] = data
 
+        if self.metrics is not None:
+            payload["metrics"] = self.metrics.snapshot()
+
         return payload
 
+    async def _run_io(self, func: Callable, *args) -> Any:
+        """Run blocking file I/O off the event loop."""
+        if self.executor is not None:
+            return await self.executor.run(func, *args)
+        return await asyncio.to_thread(func, *args)
+
+    def _open_snapshot(self) -> bool:
+        """Map the binary snapshot and restore history from it."""
+        self._snapshot = StatsSnapshot(
+            self.snapshot_file, self.resolutions, capacity=self.max_series
+        )
+        if not self._snapshot.open():
+            return False
+
+        for name in self._snapshot.names():
+            self._history[name] = self._snapshot.series(name)
+        return True
+
     async def load(self):
-        """Load stats from JSON file."""
+        """Load stats from the JSON file and history from the snapshot."""
+        if self.snapshot_file:
+            try:
+                if await self._run_io(self._open_snapshot):
+                    logger.info(
+                        "Restored %d stats series from %s",
+                        len(self._history),
+                        self.snapshot_file,
+                    )
+            except Exception:
+                logger.exception("Failed to open stats snapshot")
+                if self._snapshot is not None:
+                    self._snapshot.close()
+                self._snapshot = None
+                self._history.clear()
+
         if not self.stats_file.exists():
             logger.info("Stats file %s not found, starting fresh.", self.stats_file)
             return
 
         try:
-            async with aiofiles.open(self.stats_file) as f:
-                content = await f.read()
-                self._current_stats = json.loads(content)
+            content = await self._run_io(self.stats_file.read_text)
+            self._current_stats = json.loads(content)
             logger.info("Loaded stats from %s", self.stats_file)
         except Exception:
             logger.exception("Failed to load stats")
 
     async def save(self):
-        """Persist current stats to JSON file."""
+        """Persist current stats to JSON file and flush the snapshot."""
         try:
-            async with aiofiles.open(self.stats_file, "w") as f:
+            with trace("stats.save", "stats save"):
                 content = json.dumps(self._current_stats, indent=2)
-                await f.write(content)
+                await self._run_io(self.stats_file.write_text, content)
+                if self._snapshot is not None:
+                    await self._run_io(self._snapshot.flush)
             # logger.debug("Saved stats to %s", self.stats_file)
         except Exception:
             logger.exception("Failed to save stats")
@@ -113,39 +190,97 @@ class StatsTracker:
     async def collect_now(self) -> dict:
         """Collect stats from all sources and update current stats."""
         self._current_stats = await self._compile_payload()
+        stats = self._current_stats
+        if not self.metrics_history:
+            stats = {k: v for k, v in stats.items() if k != "metrics"}
+        self._record_history(stats, time.time())
         return self._current_stats
 
-    async def _periodic_save(self):
-        """Periodic task that collects stats and saves them."""
-        while not self._shutdown.is_set():
-            try:
-                await asyncio.wait_for(
-                    self._shutdown.wait(), timeout=self.save_interval
-                )
-            except TimeoutError:
-                # Collect fresh stats and save them
-                await self.collect_now()
+    # --------------------------------------------------------------------------
+    # History
+    # --------------------------------------------------------------------------
+
+    def _record_history(self, data: dict, ts: float, prefix: str = "") -> None:
+        """Record every numeric value of a payload into its history buffer."""
+        for key, value in data.items():
+            name = f"{prefix}{key}"
+            if isinstance(value, dict):
+                self._record_history(value, ts, prefix=f"{name}.")
+            elif isinstance(value, int | float) and not isinstance(value, bool):
+                self.record(name, value, ts)
+
+    def record(self, name: str, value: float, ts: float | None = None) -> None:
+        """Add a sample to the history of metric ``name``."""
+        series = self._history.get(name)
+        if series is None:
+            if len(self._history) >= self.max_series:
+                logger.debug("Stats history full, not tracking '%s'", name)
+                return
+            if self._snapshot is not None:
+                series = self._snapshot.series(name)
+                if series is None:
+                    logger.debug("Stats snapshot full, not tracking '%s'", name)
+                    return
+            else:
+                series = TimeSeries(self.resolutions)
+            self._history[name] = series
+        series.add(value, ts)
+        if self._snapshot is not None:
+            self._snapshot.set_value(name, value)
+
+    def list_series(self) -> list[str]:
+        """Return names of metrics with history."""
+        return list(self._history.keys())
+
+    def history(self, name: str) -> TimeSeries | None:
+        """Return the history buffers of metric ``name``."""
+        return self._history.get(name)
+
+    def query(
+        self,
+        name: str,
+        start: float | None = None,
+        end: float | None = None,
+        *,
+        window: float | None = None,
+        resolution: float | None = None,
+    ) -> SeriesSummary | None:
+        """
+        Summarize the history of metric ``name`` (min/max/mean/rate).
+
+        Metric names are the dotted path into the collected stats,
+        e.g. ``"foo.messages"``.
+        """
+        series = self._history.get(name)
+        if series is None:
+            return None
+        return series.query(start, end, window=window, resolution=resolution)
+
+    # --------------------------------------------------------------------------
+    # Service
+    # --------------------------------------------------------------------------
+
+    async def setup(self):
+        """Load existing stats before the first collection."""
+        await self.load()
+
+    async def run(self):
+        """Collect stats every sample interval and save them when due."""
+        logger.info("Starting stats tracker periodic save task")
+        last_save = time.monotonic()
+        while not await self.wait_or_timeout(self.sample_interval):
+            await self.collect_now()
+            if time.monotonic() - last_save >= self.save_interval:
                 await self.save()
+                last_save = time.monotonic()
 
-        # Final collection and save on shutdown
+    async def cleanup(self):
+        """Collect and save one last time, then close the snapshot."""
+        logger.info("Stopping stats tracker periodic save task")
         await self.collect_now()
         await self.save()
 
-    async def start(self):
-        """Start periodic save task."""
-        if self._task is None:
-            # Load existing stats first
-            await self.load()
-            logger.info("Starting stats tracker periodic save task")
-            self._task = asyncio.create_task(
-                self._periodic_save(), name="stats_tracker"
-            )
-
-    async def stop(self):
-        """Stop periodic save task and save one last time."""
-        if self._task is not None:
-            logger.info("Stopping stats tracker periodic save task")
-            self._shutdown.set()
-            await self._task
-            self._task = None
-            self._shutdown.clear()
+        if self._snapshot is not None:
+            self._history.clear()
+            self._snapshot.close()
+            self._snapshot = None
@@ -0,0 +1,332 @@
+import math
+import time
+from array import array
+from dataclasses import dataclass
+
+# (bucket width in seconds, number of buckets) for each resolution:
+# 10 minutes at 1s, 24 hours at 1m and 7 days at 1h.
+DEFAULT_RESOLUTIONS: tuple[tuple[int, int], ...] = (
+    (1, 600),
+    (60, 1440),
+    (3600, 168),
+)
+
+# Array typecodes of the per-bucket fields, in storage order: bucket id,
+# count, sum, min, max, first, last, first timestamp, last timestamp.
+_FIELDS = ("q", "Q", "d", "d", "d", "d", "d", "d", "d")
+
+
+@dataclass(frozen=True, slots=True)
+class SeriesSummary:
+    """Aggregate of a time range of a series."""
+
+    count: int
+    min: float
+    max: float
+    mean: float
+    first: float
+    last: float
+    start: float
+    end: float
+
+    @property
+    def rate(self) -> float:
+        """Per-second change between the first and last sample in the range."""
+        elapsed = self.end - self.start
+        if elapsed <= 0:
+            return 0.0
+        return (self.last - self.first) / elapsed
+
+
+class RingBuffer:
+    """
+    Fixed-size ring of time buckets of a single resolution.
+
+    Every bucket keeps count/sum/min/max plus the first and last sample, so
+    samples are folded in as they arrive and no raw points are stored.
+    Memory is allocated once and never grows.
+    """
+
+    __slots__ = (
+        "_bucket",
+        "_count",
+        "_first",
+        "_first_ts",
+        "_last",
+        "_last_ts",
+        "_max",
+        "_min",
+        "_sum",
+        "size",
+        "width",
+    )
+
+    def __init__(self, width: float, size: int, storage: memoryview | None = None):
+        """
+        :param width: bucket width in seconds
+        :param size: number of buckets kept
+        :param storage: optional writable buffer of ``bucket_bytes(size)``
+            bytes to keep the buckets in (e.g. a slice of a memory map);
+            its current contents are used as-is
+        """
+        if width <= 0 or size <= 0:
+            msg = "width and size must be positive"
+            raise ValueError(msg)
+        self.width = width
+        self.size = size
+        if storage is None:
+            storage = memoryview(bytearray(self.bucket_bytes(size)))
+            self.clear_storage(storage, size)
+        (
+            self._bucket,
+            self._count,
+            self._sum,
+            self._min,
+            self._max,
+            self._first,
+            self._last,
+            self._first_ts,
+            self._last_ts,
+        ) = self._carve(storage, size)
+
+    @staticmethod
+    def _carve(storage: memoryview, size: int) -> list[memoryview]:
+        """Split ``storage`` into one typed view per bucket field."""
+        views = []
+        offset = 0
+        for typecode in _FIELDS:
+            length = array(typecode).itemsize * size
+            views.append(storage[offset : offset + length].cast(typecode))
+            offset += length
+        return views
+
+    @staticmethod
+    def bucket_bytes(size: int) -> int:
+        """Bytes of storage needed for ``size`` buckets."""
+        return sum(array(typecode).itemsize for typecode in _FIELDS) * size
+
+    @classmethod
+    def clear_storage(cls, storage: memoryview, size: int) -> None:
+        """Mark every bucket in ``storage`` as empty."""
+        storage[: cls.bucket_bytes(size)] = bytes(cls.bucket_bytes(size))
+        buckets = cls._carve(storage, size)[0]
+        buckets[:] = array("q", [-1]) * size
+
+    def release(self) -> None:
+        """Release the views onto the storage buffer."""
+        for view in (
+            self._bucket,
+            self._count,
+            self._sum,
+            self._min,
+            self._max,
+            self._first,
+            self._last,
+            self._first_ts,
+            self._last_ts,
+        ):
+            view.release()
+
+    @property
+    def retention(self) -> float:
+        """Seconds of history this buffer can hold."""
+        return self.width * self.size
+
+    def add(self, ts: float, value: float) -> None:
+        """Fold a sample into the bucket covering ``ts``."""
+        bucket = int(ts // self.width)
+        slot = bucket % self.size
+        if self._bucket[slot] != bucket:
+            if self._bucket[slot] > bucket:
+                # Older than anything this slot can still represent
+                return
+            self._bucket[slot] = bucket
+            self._count[slot] = 1
+            self._sum[slot] = value
+            self._min[slot] = value
+            self._max[slot] = value
+            self._first[slot] = value
+            self._first_ts[slot] = ts
+            self._last[slot] = value
+            self._last_ts[slot] = ts
+            return
+
+        self._count[slot] += 1
+        self._sum[slot] += value
+        self._min[slot] = min(self._min[slot], value)
+        self._max[slot] = max(self._max[slot], value)
+        if ts >= self._last_ts[slot]:
+            self._last[slot] = value
+            self._last_ts[slot] = ts
+
+    def _slots(self, start: float, end: float):
+        """Yield the slots holding buckets between ``start`` and ``end``."""
+        first = int(start // self.width)
+        last = int(end // self.width)
+        first = max(first, last - self.size + 1)
+        for bucket in range(first, last + 1):
+            slot = bucket % self.size
+            if self._bucket[slot] == bucket:
+                yield slot
+
+    def points(self, start: float, end: float) -> list[tuple[float, float]]:
+        """Return ``(bucket_start, mean)`` pairs between ``start`` and ``end``."""
+        return [
+            (self._bucket[slot] * self.width, self._sum[slot] / self._count[slot])
+            for slot in self._slots(start, end)
+        ]
+
+    def summary(self, start: float, end: float) -> SeriesSummary | None:
+        """Aggregate all buckets between ``start`` and ``end``."""
+        count = 0
+        total = 0.0
+        lo = math.inf
+        hi = -math.inf
+        first = last = 0.0
+        first_ts = last_ts = 0.0
+        for slot in self._slots(start, end):
+            if count == 0:
+                first = self._first[slot]
+                first_ts = self._first_ts[slot]
+            count += self._count[slot]
+            total += self._sum[slot]
+            lo = min(lo, self._min[slot])
+            hi = max(hi, self._max[slot])
+            last = self._last[slot]
+            last_ts = self._last_ts[slot]
+
+        if count == 0:
+            return None
+        return SeriesSummary(
+            count=count,
+            min=lo,
+            max=hi,
+            mean=total / count,
+            first=first,
+            last=last,
+            start=first_ts,
+            end=last_ts,
+        )
+
+
+class TimeSeries:
+    """
+    Multi-resolution history of one numeric metric.
+
+    Each sample updates the current bucket of every resolution, so the
+    downsampled views are always up to date without a separate rollup pass.
+    """
+
+    __slots__ = ("_buffers",)
+
+    def __init__(
+        self, resolutions=DEFAULT_RESOLUTIONS, storage: memoryview | None = None
+    ):
+        """
+        :param resolutions: iterable of ``(bucket_seconds, bucket_count)``
+        :param storage: optional buffer of ``storage_bytes(resolutions)`` bytes
+            holding the buckets of every resolution back to back
+        """
+        resolutions = sorted(resolutions)
+        if not resolutions:
+            msg = "At least one resolution is required"
+            raise ValueError(msg)
+
+        self._buffers = []
+        offset = 0
+        for width, size in resolutions:
+            view = None
+            if storage is not None:
+                length = RingBuffer.bucket_bytes(size)
+                view = storage[offset : offset + length]
+                offset += length
+            self._buffers.append(RingBuffer(width, size, view))
+
+    @staticmethod
+    def storage_bytes(resolutions) -> int:
+        """Bytes of storage needed for a series with ``resolutions``."""
+        return sum(RingBuffer.bucket_bytes(size) for _, size in resolutions)
+
+    @staticmethod
+    def clear_storage(storage: memoryview, resolutions) -> None:
+        """Initialize ``storage`` as an empty series with ``resolutions``."""
+        offset = 0
+        for _, size in sorted(resolutions):
+            length = RingBuffer.bucket_bytes(size)
+            RingBuffer.clear_storage(storage[offset : offset + length], size)
+            offset += length
+
+    def release(self) -> None:
+        """Release the views onto the storage buffer."""
+        for buffer in self._buffers:
+            buffer.release()
+
+    @property
+    def resolutions(self) -> list[float]:
+        """Bucket widths, finest first."""
+        return [b.width for b in self._buffers]
+
+    def add(self, value: float, ts: float | None = None) -> None:
+        """Record a sample (``ts`` defaults to now)."""
+        if ts is None:
+            ts = time.time()
+        value = float(value)
+        for buffer in self._buffers:
+            buffer.add(ts, value)
+
+    def _buffer_for(self, start: float, end: float, resolution: float | None):
+        """Pick the requested resolution, or the finest one covering the range."""
+        if resolution is not None:
+            for buffer in self._buffers:
+                if buffer.width == resolution:
+                    return buffer
+            msg = f"Unknown resolution: {resolution}"
+            raise ValueError(msg)
+
+        for buffer in self._buffers:
+            if end - start <= buffer.retention - buffer.width:
+                return buffer
+        return self._buffers[-1]
+
+    def _range(self, start: float | None, end: float | None, window: float | None):
+        end = time.time() if end is None else end
+        if start is None:
+            start = (
+                end - window
+                if window is not None
+                else end - self._buffers[-1].retention
+            )
+        return start, end
+
+    def query(
+        self,
+        start: float | None = None,
+        end: float | None = None,
+        *,
+        window: float | None = None,
+        resolution: float | None = None,
+    ) -> SeriesSummary | None:
+        """
+        Summarize a time range.
+
+        Args:
+            start: range start (epoch seconds); defaults to ``end - window``
+            end: range end (epoch seconds); defaults to now
+            window: range length in seconds when ``start`` is omitted
+            resolution: bucket width to read from; defaults to the finest
+                resolution that still covers the range
+        """
+        start, end = self._range(start, end, window)
+        return self._buffer_for(start, end, resolution).summary(start, end)
+
+    def points(
+        self,
+        start: float | None = None,
+        end: float | None = None,
+        *,
+        window: float | None = None,
+        resolution: float | None = None,
+    ) -> list[tuple[float, float]]:
+        """Return ``(bucket_start, mean)`` pairs for a time range."""
+        start, end = self._range(start, end, window)
+        return self._buffer_for(start, end, resolution).points(start, end)
@@ -0,0 +1,377 @@
+"""
+Multi-process worker mode.
+
+With ``[workers] count`` (or ``--workers N``) above 0 the process becomes
+the leader: it keeps the MQTT identity, status, heartbeat, config topic and
+LWT, and starts N worker processes. Each worker has its own connection
+without status or will, and subscribes to the command topic through a
+shared subscription (``$share/<group>/<base>/command``), so the broker
+hands every command to exactly one worker. Results are still published on
+``<base>/command/result``.
+
+The leader restarts crashed workers with a backoff and aggregates the
+counters each worker reports every ``report_interval`` seconds into its
+own stats and heartbeat.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from dataclasses import field
+from multiprocessing.process import BaseProcess
+
+import psutil
+
+from .app import MyApp
+from .metrics import REGISTRY
+from .metrics import MetricsRegistry
+from .services.baseasync import BaseServiceAsync
+
+logger = logging.getLogger(__name__)
+
+
+def shared_topic(topic: str, group: str) -> str:
+    """Return the shared subscription filter of ``topic`` for ``group``."""
+    return f"$share/{group}/{topic}"
+
+
+def _add(total: dict, report: dict) -> None:
+    """Add the numbers in ``report`` to ``total``, recursively."""
+    for key, value in report.items():
+        if isinstance(value, dict):
+            _add(total.setdefault(key, {}), value)
+        elif isinstance(value, int | float) and not isinstance(value, bool):
+            total[key] = total.get(key, 0) + value
+
+
+# ------------------------------------------------------------------------------
+# Leader side
+# ------------------------------------------------------------------------------
+
+
+@dataclass(slots=True)
+class _Worker:
+    index: int
+    process: BaseProcess | None = None
+    started: float = 0.0
+    restarts: int = 0
+    delay: float = 0.0
+    restart_at: float | None = None
+    report: dict = field(default_factory=dict)
+    reported: float | None = None
+
+
+class WorkerPool(BaseServiceAsync):
+    """
+    Starts ``count`` worker processes and keeps them running.
+
+    A worker that exits is restarted after ``restart_delay`` seconds; the
+    delay doubles (up to ``max_restart_delay``) while it keeps exiting
+    within ``max_restart_delay`` seconds of its start. Workers report with
+    ``(index, stats)`` tuples on the queue passed as their last argument.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        *,
+        count: int,
+        target: Callable,
+        args: tuple = (),
+        restart_delay: float = 1.0,
+        max_restart_delay: float = 60.0,
+        check_interval: float = 1.0,
+        stop_timeout: float = 10.0,
+        metrics: MetricsRegistry | None = None,
+    ):
+        """
+        :param target: ``target(index, *args, reports)`` run in each worker;
+            must be picklable (a module level function)
+        :param check_interval: seconds between liveness checks
+        :param stop_timeout: seconds workers get to exit after SIGTERM
+            before they are killed
+        """
+        super().__init__()
+        self.target = target
+        self.args = args
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.check_interval = check_interval
+        self.stop_timeout = stop_timeout
+        self.workers = [_Worker(index) for index in range(count)]
+        # spawn: forking a process with running threads (logging, executor
+        # pools) and an event loop is unsafe
+        self._context = multiprocessing.get_context("spawn")
+        self._reports = None
+
+        metrics = metrics or REGISTRY
+        self._m_alive = metrics.gauge("workers_alive", "Worker processes running")
+        self._m_restarts = metrics.counter(
+            "worker_restarts", "Worker processes restarted after exiting"
+        )
+
+    def stats(self) -> dict:
+        """Return worker states and the sum of their latest reports."""
+        now = time.monotonic()
+        totals: dict = {}
+        workers = {}
+        for worker in self.workers:
+            _add(totals, worker.report)
+            workers[str(worker.index)] = {
+                "pid": worker.process.pid if worker.process else None,
+                "alive": self._alive(worker),
+                "restarts": worker.restarts,
+                "report_age": round(now - worker.reported, 1)
+                if worker.reported is not None
+                else None,
+            }
+        return {
+            "count": len(self.workers),
+            "alive": sum(w["alive"] for w in workers.values()),
+            "restarts": sum(worker.restarts for worker in self.workers),
+            "totals": totals,
+            "workers": workers,
+        }
+
+    @staticmethod
+    def _alive(worker: _Worker) -> bool:
+        return worker.process is not None and worker.process.is_alive()
+
+    def _start(self, worker: _Worker) -> None:
+        worker.process = self._context.Process(
+            target=self.target,
+            args=(worker.index, *self.args, self._reports),
+            name=f"worker-{worker.index}",
+        )
+        worker.process.start()
+        worker.started = time.monotonic()
+        worker.restart_at = None
+        logger.info("Started worker %d (pid %d)", worker.index, worker.process.pid)
+
+    def collect(self) -> None:
+        """Take the pending worker reports off the queue."""
+        while True:
+            try:
+                index, report = self._reports.get_nowait()
+            except queue.Empty:
+                return
+            worker = self.workers[index]
+            worker.report = report
+            worker.reported = time.monotonic()
+
+    def check(self) -> None:
+        """Schedule restarts of exited workers and start the ones due."""
+        now = time.monotonic()
+        for worker in self.workers:
+            if self._alive(worker):
+                continue
+            if worker.restart_at is None:
+                if now - worker.started >= self.max_restart_delay:
+                    worker.delay = self.restart_delay
+                else:
+                    worker.delay = min(
+                        max(worker.delay * 2, self.restart_delay),
+                        self.max_restart_delay,
+                    )
+                worker.restart_at = now + worker.delay
+                logger.warning(
+                    "Worker %d exited with code %s, restarting in %.0fs",
+                    worker.index,
+                    worker.process.exitcode,
+                    worker.delay,
+                )
+            elif now >= worker.restart_at:
+                worker.restarts += 1
+                self._m_restarts.inc()
+                self._start(worker)
+        self._m_alive.set(sum(self._alive(worker) for worker in self.workers))
+
+    def _join(self) -> None:
+        deadline = time.monotonic() + self.stop_timeout
+        for worker in self.workers:
+            if worker.process is not None:
+                worker.process.join(max(deadline - time.monotonic(), 0))
+        for worker in self.workers:
+            if self._alive(worker):
+                logger.warning("Worker %d did not stop, killing it", worker.index)
+                worker.process.kill()
+                worker.process.join()
+
+    async def setup(self):
+        self._reports = self._context.Queue()
+        for worker in self.workers:
+            self._start(worker)
+
+    async def cleanup(self):
+        # SIGTERM lets the workers drain their commands and disconnect
+        for worker in self.workers:
+            if self._alive(worker):
+                worker.process.terminate()
+        await asyncio.to_thread(self._join)
+        self.collect()
+        self._reports.close()
+        self._m_alive.set(0)
+        logger.info("All workers stopped")
+
+    async def run(self):
+        logger.info(
+            "%s started with %d workers", self.__class__.__name__, len(self.workers)
+        )
+        while not self.is_shutdown():
+            self.collect()
+            self.check()
+            if await self.wait_or_timeout(self.check_interval):
+                break
+
+
+class LeaderApp(MyApp):
+    """MyApp that leaves the command topic to worker processes."""
+
+    def __init__(self, config, *, log_level: str = "INFO"):
+        super().__init__(config)
+        workers = config.workers
+        self._workers = WorkerPool(
+            count=workers.count,
+            target=run_worker,
+            args=(config, log_level),
+            restart_delay=workers.restart_delay,
+            max_restart_delay=workers.max_restart_delay,
+            stop_timeout=config.app.shutdown_timeout / 2,
+        )
+
+    async def setup_mqtt(self) -> None:
+        await super().setup_mqtt()
+        command_topic = self._mqtt.build_topic("command")
+        await self._mqtt.remove_subscriptions([command_topic])
+        self._mqtt.remove_message_handlers([command_topic])
+
+    async def start_background_tasks(self) -> None:
+        await super().start_background_tasks()
+        self._supervisor.add("workers", self._workers)
+        self._heartbeat.register_source("workers", self._workers.stats)
+        self._stats.register_source("workers", self._workers.stats)
+
+
+# ------------------------------------------------------------------------------
+# Worker side
+# ------------------------------------------------------------------------------
+
+
+class StatsReporter(BaseServiceAsync):
+    """Sends ``(index, source())`` to the leader every ``interval`` seconds."""
+
+    def __init__(
+        self, *, index: int, reports, source: Callable[[], dict], interval=5.0
+    ):
+        super().__init__()
+        self.index = index
+        self.reports = reports
+        self.source = source
+        self.interval = interval
+
+    def report(self) -> None:
+        try:
+            self.reports.put_nowait((self.index, self.source()))
+        except Exception:
+            logger.exception("Error reporting worker stats")
+
+    async def setup(self):
+        pass
+
+    async def cleanup(self):
+        # Final counters, so the leader's totals don't lose the last interval
+        self.report()
+
+    async def run(self):
+        while not await self.wait_or_timeout(self.interval):
+            self.report()
+
+
+class WorkerApp(MyApp):
+    """
+    MyApp in a worker process: consumes the shared command subscription and
+    reports to the leader instead of publishing a heartbeat or saving stats.
+    """
+
+    def __init__(self, config, *, index: int, reports):
+        super().__init__(config)
+        self.index = index
+        self._reports = reports
+        self._process = psutil.Process()
+
+    async def setup_mqtt(self) -> None:
+        await super().setup_mqtt()
+        mqtt = self._mqtt
+        mqtt.identifier = f"{self.config.mqtt.device_id}-worker{self.index}"
+        mqtt.announce = False
+        # Only the leader publishes handler stats on the 'metrics' topic
+        self._mqtt_service.metrics_interval = 0
+
+        config_topic = mqtt.build_topic("config")
+        command_topic = mqtt.build_topic("command")
+        await mqtt.remove_subscriptions([config_topic, command_topic])
+        mqtt.remove_message_handlers([config_topic])
+        # Messages arrive on the plain topic, where the handler stays
+        group = self.config.workers.group or self.config.mqtt.device_id
+        await mqtt.add_subscriptions([(shared_topic(command_topic, group), 1)])
+
+    def worker_stats(self) -> dict:
+        """Counters the leader sums across workers."""
+        handlers = {
+            topic: {
+                name: {"calls": stats["calls"], "errors": stats["errors"]}
+                for name, stats in by_handler.items()
+            }
+            for topic, by_handler in self._mqtt.handler_stats()["handlers"].items()
+        }
+        return {
+            "handlers": handlers,
+            "commands": {
+                "queued": self._commands.queued,
+                "running": self._commands.running,
+            },
+            "rss_mb": round(self._process.memory_info().rss / 1024 / 1024, 1),
+        }
+
+    async def setup_stats(self) -> None:
+        """The leader keeps the stats, see worker_stats()."""
+
+    async def start_background_tasks(self) -> None:
+        self._supervisor.add(
+            "reporter",
+            StatsReporter(
+                index=self.index,
+                reports=self._reports,
+                source=self.worker_stats,
+                interval=self.config.workers.report_interval,
+            ),
+        )
+
+
+def run_worker(index: int, config, log_level: str, reports) -> None:
+    """Entry point of a worker process."""
+    from . import settings  # noqa: PLC0415
+    from .entrypoint import run  # noqa: PLC0415
+    from .logging_config import setup_logger  # noqa: PLC0415
+    from .logging_config import stop_logging  # noqa: PLC0415
+    from .tracing import init_sentry  # noqa: PLC0415
+
+    log_file = settings.LOG_FILE
+    setup_logger(
+        name=settings.APP_NAME,
+        log_file=log_file.with_name(f"{log_file.stem}.worker{index}{log_file.suffix}"),
+        console_level=log_level,
+    )
+    init_sentry(config)
+    logger.info("Worker %d running (pid %d)", index, os.getpid())
+    try:
+        run(
+            config,
+            app_factory=lambda config: WorkerApp(config, index=index, reports=reports),
+        )
+    finally:
+        stop_logging()
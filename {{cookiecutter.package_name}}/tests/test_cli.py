@@ -0,0 +1,22 @@
+import os
+import subprocess
+import sys
+
+HEAVY = ("sentry_sdk", "rich", "pydantic", "aiomqtt", "psutil")
+
+
+def test_import_does_not_load_heavy_dependencies():
+    code = (
+        "import sys, {{cookiecutter.package_dir}}.cli; "
+        f"print([m for m in {HEAVY!r} if m in sys.modules])"
+    )
+    # pytest's pythonpath setting (src/) only applies in-process
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+    proc = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=env,
+    )
+    assert proc.stdout.strip() == "[]"
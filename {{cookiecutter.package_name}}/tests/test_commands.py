@@ -0,0 +1,330 @@
+import asyncio
+
+import pytest
+
+from {{cookiecutter.package_dir}}.commands import CommandExecutor
+from {{cookiecutter.package_dir}}.commands import CommandRejected
+from {{cookiecutter.package_dir}}.metrics import MetricsRegistry
+from {{cookiecutter.package_dir}}.result_cache import ResultCache
+
+
+def make_executor(**kwargs):
+    results = []
+
+    async def on_result(result):
+        results.append(result)
+
+    options = {
+        "max_concurrent": 1,
+        "metrics": MetricsRegistry(),
+        "on_result": on_result,
+    }
+    options.update(kwargs)
+    return CommandExecutor(**options), results
+
+
+async def sleep_and_return(value, seconds=0.01):
+    await asyncio.sleep(seconds)
+    return value
+
+
+async def running(executor):
+    task = asyncio.create_task(executor.start())
+    await executor.wait_started()
+    return task
+
+
+def test_runs_in_priority_order():
+    async def main():
+        executor, results = make_executor(priorities={"urgent": 1})
+        order = []
+
+        async def record(name):
+            order.append(name)
+
+        for action in ("low", "normal", "urgent"):
+            executor.submit(action, lambda a=action: record(a))
+        task = await running(executor)
+        await executor.drain(1.0)
+        await executor.stop()
+        await task
+        return order, results
+
+    order, results = asyncio.run(main())
+    assert order == ["urgent", "low", "normal"]
+    assert [r["status"] for r in results] == ["ok", "ok", "ok"]
+
+
+def test_same_action_is_single_flight():
+    async def main():
+        executor, _ = make_executor()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            return await sleep_and_return("done")
+
+        first = executor.submit("foo", work)
+        second = executor.submit("foo", work)
+        task = await running(executor)
+        result = await second.future
+        await executor.stop()
+        await task
+        return first is second, calls, result
+
+    same, calls, result = asyncio.run(main())
+    assert same
+    assert calls == [1]
+    assert result["result"] == "done"
+
+
+def test_rejects_when_queue_full():
+    async def main():
+        executor, results = make_executor(max_queued=1)
+        executor.submit("a", lambda: sleep_and_return(1))
+        with pytest.raises(CommandRejected):
+            executor.submit("b", lambda: sleep_and_return(2))
+        await asyncio.sleep(0)
+        return results
+
+    results = asyncio.run(main())
+    assert results[0]["status"] == "rejected"
+    assert results[0]["action"] == "b"
+
+
+def test_rejects_invalid_priority():
+    async def main():
+        executor, results = make_executor()
+        order = []
+
+        async def record(name):
+            order.append(name)
+
+        executor.submit("a", lambda: record("a"))
+        with pytest.raises(CommandRejected):
+            executor.submit("c", lambda: record("c"), priority="high")
+        executor.submit("b", lambda: record("b"), priority="1")
+        assert executor.get("c") is None
+        task = await running(executor)
+        await executor.drain(1.0)
+        await executor.stop()
+        await task
+        return order, results
+
+    order, results = asyncio.run(main())
+    assert order == ["b", "a"]
+    assert results[0]["status"] == "rejected"
+    assert results[0]["action"] == "c"
+
+
+def test_stop_waits_for_result_publishing():
+    async def main():
+        published = []
+
+        async def on_result(result):
+            await asyncio.sleep(0.01)
+            published.append(result["status"])
+
+        executor, _ = make_executor(on_result=on_result)
+        executor.submit("slow", lambda: sleep_and_return(1, seconds=10))
+        task = await running(executor)
+        await asyncio.sleep(0)
+        await executor.stop()
+        await task
+        return published, executor._publishing
+
+    published, publishing = asyncio.run(main())
+    assert published == ["cancelled"]
+    assert not publishing
+
+
+def test_cancel_running_and_queued():
+    async def main():
+        executor, results = make_executor()
+        executor.submit("slow", lambda: sleep_and_return(1, seconds=10), command_id="1")
+        executor.submit("next", lambda: sleep_and_return(2), command_id="2")
+        task = await running(executor)
+        await asyncio.sleep(0.01)
+        executor.cancel("next")
+        executor.cancel("1")
+        await executor.drain(1.0)
+        await executor.stop()
+        await task
+        return results
+
+    results = asyncio.run(main())
+    assert {r["id"]: r["status"] for r in results} == {
+        "1": "cancelled",
+        "2": "cancelled",
+    }
+
+
+def test_errors_are_reported():
+    async def main():
+        executor, results = make_executor()
+
+        async def fail():
+            msg = "boom"
+            raise RuntimeError(msg)
+
+        executor.submit("fail", fail)
+        task = await running(executor)
+        await executor.drain(1.0)
+        await executor.stop()
+        await task
+        return results
+
+    results = asyncio.run(main())
+    assert results[0]["status"] == "error"
+    assert results[0]["error"] == "boom"
+
+
+def test_drain_cancels_after_deadline():
+    metrics = MetricsRegistry()
+
+    async def main():
+        executor, _ = make_executor(metrics=metrics)
+        executor.submit("slow", lambda: sleep_and_return(1, seconds=10), command_id="1")
+        executor.submit("queued", lambda: sleep_and_return(2), command_id="2")
+        task = await running(executor)
+        await asyncio.sleep(0.01)
+        dropped = await executor.drain(0.05)
+        await executor.stop()
+        await task
+        return dropped
+
+    assert sorted(asyncio.run(main())) == ["1", "2"]
+    snapshot = metrics.snapshot()
+    assert snapshot['commands_cancelled{action="slow"}'] == 1
+    assert snapshot['commands_executed{action="slow"}'] == 0
+
+
+def test_drain_never_waits_past_deadline():
+    async def stubborn():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            await asyncio.sleep(10)
+
+    async def main():
+        executor, _ = make_executor()
+        executor.submit("stubborn", stubborn, command_id="1")
+        task = await running(executor)
+        await asyncio.sleep(0.01)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        dropped = await executor.drain(0.1)
+        elapsed = loop.time() - started
+        await executor.stop()
+        await task
+        return dropped, elapsed
+
+    dropped, elapsed = asyncio.run(main())
+    assert dropped == ["1"]
+    assert elapsed < 0.2
+
+
+def test_repeated_request_id_uses_cache():
+    async def main():
+        executor, results = make_executor(results=ResultCache())
+        calls = []
+
+        async def work():
+            calls.append(1)
+            return await sleep_and_return(len(calls))
+
+        task = await running(executor)
+        first = executor.submit("foo", work, command_id="req-1")
+        attached = executor.submit("foo", work, command_id="req-1")
+        await first.future
+        repeat = executor.submit("foo", work, command_id="req-1")
+        result = await repeat.future
+        await asyncio.sleep(0)
+        await executor.stop()
+        await task
+        return first is attached, calls, result, results
+
+    attached, calls, result, results = asyncio.run(main())
+    assert attached
+    assert calls == [1]
+    assert result == {**result, "status": "ok", "result": 1, "cached": True}
+    assert len(results) == 2
+
+
+def test_same_action_answers_every_request_id():
+    async def main():
+        cache = ResultCache()
+        executor, results = make_executor(results=cache)
+        calls = []
+
+        async def work():
+            calls.append(1)
+            return await sleep_and_return("done")
+
+        task = await running(executor)
+        first = executor.submit("foo", work, command_id="req-1")
+        second = executor.submit("foo", work, command_id="req-2")
+        await first.future
+        await asyncio.sleep(0)
+        repeat = executor.submit("foo", work, command_id="req-2")
+        await executor.stop()
+        await task
+        return first is second, calls, results, cache, repeat.future.result()
+
+    same, calls, results, cache, repeat = asyncio.run(main())
+    assert same
+    assert calls == [1]
+    assert sorted(r["id"] for r in results) == ["req-1", "req-2", "req-2"]
+    assert cache.get("req-1")["result"] == cache.get("req-2")["result"] == "done"
+    assert repeat == {**repeat, "id": "req-2", "cached": True}
+
+
+def test_failed_request_id_runs_again():
+    async def main():
+        executor, _ = make_executor(results=ResultCache())
+        calls = []
+
+        async def flaky():
+            calls.append(1)
+            if len(calls) == 1:
+                msg = "transient"
+                raise RuntimeError(msg)
+            return "done"
+
+        task = await running(executor)
+        first = await executor.submit("foo", flaky, command_id="req-1").future
+        retry = await executor.submit("foo", flaky, command_id="req-1").future
+        await executor.stop()
+        await task
+        return first, retry
+
+    first, retry = asyncio.run(main())
+    assert first["status"] == "error"
+    assert retry["status"] == "ok"
+    assert "cached" not in retry
+
+
+def test_scopes_are_isolated():
+    async def main():
+        executor, results = make_executor(max_concurrent=2, results=ResultCache())
+
+        async def work(value):
+            return await sleep_and_return(value)
+
+        a = executor.submit("foo", lambda: work("a"), command_id="req-1", scope="a")
+        b = executor.submit("foo", lambda: work("b"), command_id="req-1", scope="b")
+        cancelled = executor.cancel("foo", scope="c")
+        task = await running(executor)
+        await asyncio.gather(a.future, b.future)
+        await asyncio.sleep(0)
+        await executor.stop()
+        await task
+        return a is b, cancelled, results
+
+    same, cancelled, results = asyncio.run(main())
+    assert not same
+    assert cancelled is None
+    assert sorted((r["scope"], r["result"]) for r in results) == [
+        ("a", "a"),
+        ("b", "b"),
+    ]
@@ -0,0 +1,169 @@
+import asyncio
+
+import pytest
+
+from {{cookiecutter.package_dir}}.app import MyApp
+from {{cookiecutter.package_dir}}.metrics import REGISTRY
+from {{cookiecutter.package_dir}}.metrics import MetricsRegistry
+from {{cookiecutter.package_dir}}.services.config_watcher import ConfigWatcher
+from {{cookiecutter.package_dir}}.services.heartbeat import HeartbeatService
+from {{cookiecutter.package_dir}}.settings import Settings
+
+
+class FakeMqtt:
+    def __init__(self):
+        self.messages = []
+        self.reconnects = []
+        self.error_limit = None
+
+    async def send_message(self, message, extra=None, error=False):
+        self.messages.append((message, extra, error))
+
+    async def reconnect(self, **params):
+        self.reconnects.append(params)
+
+    def set_error_limit(self, limit, period):
+        self.error_limit = (limit, period)
+
+
+class FakeService:
+    metrics_interval = 0
+
+
+@pytest.fixture
+def app(monkeypatch):
+    # Keep the metrics MyApp registers out of the shared registry
+    monkeypatch.setattr(REGISTRY, "_metrics", dict(REGISTRY._metrics))
+    app = MyApp(Settings(app={}, sentry={}, mqtt={}))
+    app._mqtt = FakeMqtt()
+    app._mqtt_service = FakeService()
+    app._heartbeat = HeartbeatService(mqtt=app._mqtt, metrics=MetricsRegistry())
+    yield app
+    app._pools.shutdown()
+
+
+def changed(config, **sections):
+    data = config.model_dump(exclude_unset=True)
+    for section, fields in sections.items():
+        data[section] = {**data.get(section, {}), **fields}
+    return Settings.model_validate(data)
+
+
+def test_applies_heartbeat_in_place_and_flags_restart(app):
+    config = changed(
+        app.config,
+        heartbeat={"interval": 3.0},
+        app={"foo": "baz", "shutdown_timeout": 1.0},
+    )
+    result = asyncio.run(app.apply_config(config, source="test"))
+
+    assert result["applied"] == ["heartbeat"]
+    assert result["restart_required"] == ["app"]
+    # The app section is not in effect yet, so none of it is switched
+    assert app.config.heartbeat == config.heartbeat
+    assert app.config.app.foo is None
+    assert app.config.app.shutdown_timeout == 20.0
+    assert app._heartbeat.interval == 3.0
+    assert app._heartbeat.current_interval == 3.0
+    assert app._mqtt.reconnects == []
+    assert app._mqtt.messages[-1][0] == "Config reloaded"
+
+
+def test_applies_settings_read_on_use(app):
+    config = changed(
+        app.config, app={"shutdown_timeout": 1.0}, health={"max_tick_age": 2.0}
+    )
+    result = asyncio.run(app.apply_config(config, source="test"))
+
+    assert result["applied"] == ["app", "health"]
+    assert result["restart_required"] == []
+    assert app.config.app.shutdown_timeout == 1.0
+    assert app.config.health.max_tick_age == 2.0
+
+
+def test_reconnects_only_when_connection_changes(app):
+    async def main():
+        config = changed(app.config, mqtt={"error_limit": 1})
+        await app.apply_config(config, source="test")
+        assert app._mqtt.reconnects == []
+        assert app._mqtt.error_limit == (1, 60.0)
+
+        config = changed(app.config, mqtt={"host": "broker.local"})
+        result = await app.apply_config(config, source="test")
+        await asyncio.sleep(0)
+        return result
+
+    result = asyncio.run(main())
+    assert result["applied"] == ["mqtt"]
+    assert app._mqtt.reconnects[0]["hostname"] == "broker.local"
+
+
+def test_mqtt_config_topic_is_off_by_default(app):
+    asyncio.run(app.handle_config({"commands": {"priorities": {"bar": 1}}}, "t"))
+    assert app._commands.priorities == {}
+
+
+def test_mqtt_config_topic_cannot_change_connection(app):
+    app.config = changed(app.config, app={"remote_config": True})
+    payload = {"mqtt": {"host": "attacker", "error_limit": 1}}
+    asyncio.run(app.handle_config(payload, "t"))
+    assert app.config.mqtt.host != "attacker"
+    assert app._mqtt.error_limit is None
+    assert app._mqtt.messages[-1] == (
+        "Rejected config: mqtt.host can't be changed over MQTT",
+        None,
+        True,
+    )
+
+
+def test_mqtt_config_topic_merges_partial_config(app):
+    app.config = changed(app.config, app={"remote_config": True})
+    asyncio.run(app.handle_config({"commands": {"priorities": {"bar": 1}}}, "t"))
+    assert app._commands.priorities == {"bar": 1}
+    assert app.config.commands.max_concurrent == 4
+
+    asyncio.run(app.handle_config({"heartbeat": {"interval": "soon"}}, "t"))
+    assert app._mqtt.messages[-1][2] is True
+    assert app._heartbeat.interval == 10
+
+
+def test_rejects_unknown_pool(app):
+    config = changed(app.config, commands={"pool": "missing"})
+    assert asyncio.run(app.apply_config(config, source="test")) == {}
+    assert app.config.commands.pool == "commands"
+
+
+def test_rejects_process_pool_for_commands(app):
+    config = changed(app.config, pools={"commands": {"kind": "process"}})
+    assert asyncio.run(app.apply_config(config, source="test")) == {}
+    assert app.config.pools["commands"].kind == "thread"
+
+
+def test_configured_pools_keep_the_defaults(monkeypatch):
+    monkeypatch.setattr(REGISTRY, "_metrics", dict(REGISTRY._metrics))
+    config = Settings(app={}, sentry={}, mqtt={}, pools={"gpu": {"size": 1}})
+    assert sorted(config.pools) == ["commands", "gpu", "io"]
+    app = MyApp(config)
+    assert app._pools.get("gpu").size == 1
+    app._pools.shutdown()
+
+
+def test_watcher_reloads_changed_file(tmp_path):
+    path = tmp_path / "config.toml"
+    path.write_text("a")
+    seen = []
+
+    async def on_change(config):
+        seen.append(config)
+
+    watcher = ConfigWatcher(path, loader=path.read_text, on_change=on_change)
+
+    async def main():
+        await watcher.setup()
+        assert not await watcher.check()
+        path.write_text("bb")
+        assert await watcher.check()
+        assert not await watcher.check()
+
+    asyncio.run(main())
+    assert seen == ["bb"]
@@ -0,0 +1,13 @@
+import sys
+
+from {{cookiecutter.package_dir}}.entrypoint import get_loop_factory
+
+
+def test_stock_loop_unless_requested():
+    assert get_loop_factory(use_uvloop=False) is None
+
+
+def test_falls_back_when_uvloop_missing(monkeypatch):
+    # A None entry makes "import uvloop" raise ImportError
+    monkeypatch.setitem(sys.modules, "uvloop", None)
+    assert get_loop_factory(use_uvloop=True) is None
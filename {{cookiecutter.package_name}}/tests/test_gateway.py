@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from {{cookiecutter.package_dir}}.gateway import GatewayApp
+from {{cookiecutter.package_dir}}.gateway import GatewayHeartbeat
+from {{cookiecutter.package_dir}}.metrics import REGISTRY
+from {{cookiecutter.package_dir}}.settings import Settings
+
+
+@pytest.fixture
+def app(monkeypatch):
+    # Keep the metrics the app registers out of the shared registry
+    monkeypatch.setattr(REGISTRY, "_metrics", dict(REGISTRY._metrics))
+    app = GatewayApp(
+        Settings(app={}, sentry={}, mqtt={}, gateway={"devices": ["a", "b", "a"]})
+    )
+    asyncio.run(app.setup_mqtt())
+
+    published = []
+
+    async def publish_json(topic, payload=None, qos=0, retain=False):
+        published.append((topic, payload))
+
+    app._mqtt.publish_json = publish_json
+    app._mqtt.connected_event.set()
+    app.published = published
+    yield app
+    app._pools.shutdown()
+
+
+def test_subscribes_each_device_once(app):
+    topics = [topic for topic, _ in app._mqtt.get_subscriptions()]
+    assert "project/app/a/command" in topics
+    assert "project/app/b/command" in topics
+    assert list(app.devices) == ["a", "b"]
+
+
+def test_topic_label_collapses_device():
+    assert GatewayApp.topic_label("project/app/a/command") == "project/app/+/command"
+    assert GatewayApp.topic_label("other/topic") == "other/topic"
+
+
+def test_commands_are_routed_per_device(app):
+    async def work(data):
+        await asyncio.sleep(0.01)
+        return data["device_id"]
+
+    app._command_handlers["work"] = work
+
+    async def main():
+        task = asyncio.create_task(app._commands.start())
+        await app._commands.wait_started()
+        # Same action and id on both devices: neither dedupes the other
+        for device_id in ("a", "b"):
+            await app._mqtt._handle_message(
+                f"project/app/{device_id}/command", b'{"action": "work", "id": "1"}'
+            )
+        await app._commands.drain(1.0)
+        await asyncio.sleep(0)
+        await app._commands.stop()
+        await task
+
+    asyncio.run(main())
+    results = {
+        topic: payload["result"]
+        for topic, payload in app.published
+        if topic.endswith("/command/result")
+    }
+    assert results == {
+        "project/app/a/command/result": "a",
+        "project/app/b/command/result": "b",
+    }
+    assert app.gateway_stats() == {
+        "devices": 2,
+        "commands": 2,
+        "results": {"ok": 2},
+    }
+
+
+def test_heartbeat_publishes_every_device(app):
+    heartbeat = GatewayHeartbeat(mqtt=app._mqtt, devices=app.devices, interval=0.02)
+
+    async def main():
+        task = asyncio.create_task(heartbeat.start())
+        await asyncio.sleep(0.03)
+        await heartbeat.stop()
+        await task
+
+    asyncio.run(main())
+    topics = [topic for topic, _ in app.published]
+    assert topics.count("project/app/a/heartbeat") >= 1
+    assert topics.count("project/app/b/heartbeat") >= 1
+    assert topics[-2:] == ["project/app/a/status", "project/app/b/status"]
+    assert app.published[-1][1] == {"state": "offline"}
@@ -0,0 +1,92 @@
+import asyncio
+import socket
+
+from {{cookiecutter.package_dir}}.services.health import HealthServer
+from {{cookiecutter.package_dir}}.services.health import SystemdNotifier
+from {{cookiecutter.package_dir}}.services.health import read_health
+
+
+def test_health_server_answers_on_connect(tmp_path):
+    path = tmp_path / "health.sock"
+    calls = []
+
+    def source():
+        calls.append(1)
+        return {"live": True, "services": {"mqtt": "running"}}
+
+    async def main():
+        server = HealthServer(socket_path=path, source=source)
+        task = asyncio.create_task(server.start())
+        await server.wait_started()
+        first = await asyncio.to_thread(read_health, path)
+        second = await asyncio.to_thread(read_health, path)
+        await server.stop()
+        await task
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert first == second == {"live": True, "services": {"mqtt": "running"}}
+    assert len(calls) == 2
+    assert not path.exists()
+
+
+def notify_socket(tmp_path):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    sock.bind(str(tmp_path / "notify.sock"))
+    sock.settimeout(1)
+    return sock
+
+
+def received(sock) -> list[str]:
+    messages = []
+    sock.settimeout(0)
+    while True:
+        try:
+            messages.append(sock.recv(1024).decode())
+        except BlockingIOError:
+            return messages
+
+
+def test_systemd_notifier_pings_only_while_live(tmp_path):
+    live = [True]
+    environ = {
+        "NOTIFY_SOCKET": str(tmp_path / "notify.sock"),
+        "WATCHDOG_USEC": "40000",
+    }
+
+    async def main(sock):
+        notifier = SystemdNotifier(live=lambda: live[0], environ=environ)
+        assert notifier.watchdog_interval == 0.02
+        task = asyncio.create_task(notifier.start())
+        await notifier.wait_started()
+        notifier.ready()
+        await asyncio.sleep(0.1)
+        pinged = received(sock)
+        live[0] = False
+        await asyncio.sleep(0.1)
+        withheld = received(sock)
+        await notifier.stop()
+        await task
+        return pinged, withheld, notifier.missed
+
+    with notify_socket(tmp_path) as sock:
+        pinged, withheld, missed = asyncio.run(main(sock))
+        stopping = received(sock)
+    assert pinged[0] == "READY=1"
+    assert "WATCHDOG=1" in pinged[1:]
+    assert withheld in ([], ["WATCHDOG=1"])
+    assert missed >= 2
+    assert stopping == ["STOPPING=1"]
+
+
+def test_systemd_notifier_without_systemd():
+    async def main():
+        notifier = SystemdNotifier(live=lambda: True, environ={})
+        task = asyncio.create_task(notifier.start())
+        await notifier.wait_started()
+        sent = notifier.notify("READY=1")
+        await notifier.stop()
+        await task
+        return sent
+
+    assert not asyncio.run(main())
@@ -0,0 +1,88 @@
+import asyncio
+
+from {{cookiecutter.package_dir}}.metrics import MetricsRegistry
+from {{cookiecutter.package_dir}}.services.heartbeat import HeartbeatService
+
+
+class FakeMqtt:
+    def __init__(self, publish_delay=0.0):
+        self.connected_event = asyncio.Event()
+        self.connected_event.set()
+        self.published = []
+        self.publish_delay = publish_delay
+
+    def build_topic(self, topic):
+        return f"test/{topic}"
+
+    async def publish_json(self, topic, payload=None, qos=0, retain=False):
+        await asyncio.sleep(self.publish_delay)
+        self.published.append(payload)
+
+
+def make_service(mqtt, **kwargs):
+    options = {
+        "interval": 0.05,
+        "adaptive": True,
+        "min_interval": 0.01,
+        "max_interval": 1.0,
+        "metrics": MetricsRegistry(),
+    }
+    options.update(kwargs)
+    return HeartbeatService(mqtt=mqtt, **options)
+
+
+async def run_for(service, seconds, during=None):
+    task = asyncio.create_task(service.run())
+    if during:
+        await during()
+    await asyncio.sleep(seconds)
+    await service.stop()
+    await task
+
+
+def test_publishes_immediately_on_significant_change():
+    mqtt = FakeMqtt()
+    state = {"temp": 20.0}
+    service = make_service(mqtt, interval=10)
+    service.register_source("sensor", lambda: dict(state), threshold=1.0)
+
+    async def change():
+        await asyncio.sleep(0.03)
+        state["temp"] = 20.5  # below threshold
+        await asyncio.sleep(0.03)
+        state["temp"] = 25.0
+
+    asyncio.run(run_for(service, 0.05, during=change))
+    temps = [p["sensor"]["temp"] for p in mqtt.published]
+    assert temps == [20.0, 25.0]
+
+
+def test_interval_stretches_when_idle():
+    mqtt = FakeMqtt()
+    service = make_service(mqtt, stretch_factor=2.0)
+    service.register_source("sensor", lambda: {"temp": 20.0}, threshold=1.0)
+
+    asyncio.run(run_for(service, 0.5))
+    assert service.current_interval > service.interval
+    assert service.current_interval <= service.max_interval
+
+
+def test_backs_off_on_slow_publish():
+    mqtt = FakeMqtt(publish_delay=0.02)
+    service = make_service(mqtt, slow_publish=0.01, max_interval=0.2)
+    service.register_source("sensor", lambda: {"temp": 20.0})
+
+    asyncio.run(run_for(service, 0.3))
+    assert service.current_interval == service.max_interval
+
+
+def test_notify_forces_heartbeat():
+    mqtt = FakeMqtt()
+    service = make_service(mqtt, interval=10)
+
+    async def notify():
+        await asyncio.sleep(0.03)
+        service.notify()
+
+    asyncio.run(run_for(service, 0.03, during=notify))
+    assert len(mqtt.published) == 2
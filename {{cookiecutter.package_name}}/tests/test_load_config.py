@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+from {{cookiecutter.package_dir}} import settings
+
+CONFIG = """
+[app]
+[sentry]
+[mqtt]
+device_id = "dev-1"
+creds = "dXNlcnxwYXNz"
+"""
+
+
+@pytest.fixture
+def config_file(tmp_path, monkeypatch):
+    path = tmp_path / "config.toml"
+    path.write_text(CONFIG)
+    monkeypatch.setattr(settings, "CONFIG_FILE", path)
+    monkeypatch.setattr(settings, "CONFIG_CACHE", tmp_path / "config.cache")
+    return path
+
+
+def test_unchanged_config_skips_parsing(config_file, monkeypatch):
+    first = settings.load_config()
+    assert first.mqtt.username == "user"
+    assert settings.CONFIG_CACHE.exists()
+
+    def fail(*args, **kwargs):
+        raise AssertionError
+
+    monkeypatch.setattr(settings.tomllib, "loads", fail)
+    second = settings.load_config()
+    assert second == first
+    assert second is not first
+
+    # Touched but unchanged: matched by content hash
+    stat = config_file.stat()
+    os.utime(config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert settings.load_config() == first
+
+
+def test_changed_config_is_reloaded(config_file):
+    settings.load_config()
+    config_file.write_text(CONFIG.replace("dev-1", "dev-2"))
+    assert settings.load_config().mqtt.device_id == "dev-2"
+
+
+def test_corrupt_cache_is_ignored(config_file):
+    settings.CONFIG_CACHE.write_bytes(b"not a pickle")
+    assert settings.load_config().mqtt.device_id == "dev-1"
+
+
+def test_cache_is_private_and_has_no_decoded_creds(config_file):
+    settings.CONFIG_CACHE.write_bytes(b"old cache")
+    settings.CONFIG_CACHE.chmod(0o644)
+    settings.load_config()
+    assert b"pass" not in settings.CONFIG_CACHE.read_bytes()
+    assert settings.CONFIG_CACHE.stat().st_mode & 0o777 == 0o600
+    # No temporary files left behind
+    names = sorted(path.name for path in config_file.parent.iterdir())
+    assert names == ["config.cache", "config.toml"]
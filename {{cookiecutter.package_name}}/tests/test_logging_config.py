@@ -0,0 +1,146 @@
+import logging
+import queue
+import time
+
+import pytest
+
+from {{cookiecutter.package_dir}}.logging_config import BoundedQueueHandler
+from {{cookiecutter.package_dir}}.logging_config import RateLimitFilter
+from {{cookiecutter.package_dir}}.logging_config import _LogListener
+from {{cookiecutter.package_dir}}.logging_config import logging_stats
+from {{cookiecutter.package_dir}}.logging_config import setup_logger
+from {{cookiecutter.package_dir}}.logging_config import stop_logging
+from {{cookiecutter.package_dir}}.metrics import MetricsRegistry
+
+
+def make_record(msg, *args):
+    return logging.makeLogRecord({"msg": msg, "args": args, "levelname": "INFO"})
+
+
+@pytest.fixture
+def root_logger():
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    yield root
+    stop_logging()
+    root.handlers[:] = handlers
+    root.setLevel(level)
+
+
+def test_drop_new_keeps_queued_records():
+    handler = BoundedQueueHandler(
+        queue.Queue(maxsize=2), overflow="drop_new", metrics=MetricsRegistry()
+    )
+    for i in range(5):
+        handler.handle(make_record("record %d", i))
+    assert [handler.queue.get_nowait().msg for _ in range(2)] == [
+        "record 0",
+        "record 1",
+    ]
+    assert handler.dropped == {"INFO": 3}
+
+
+def test_drop_oldest_keeps_latest_records():
+    metrics = MetricsRegistry()
+    handler = BoundedQueueHandler(
+        queue.Queue(maxsize=2), overflow="drop_oldest", metrics=metrics
+    )
+    for i in range(5):
+        handler.handle(make_record("record %d", i))
+    assert [handler.queue.get_nowait().msg for _ in range(2)] == [
+        "record 3",
+        "record 4",
+    ]
+    assert handler.dropped == {"INFO": 3}
+    assert metrics.counter("log_records_dropped", level="INFO").value == 3
+
+
+def fail():
+    msg = "boom"
+    raise ValueError(msg)
+
+
+def test_prepare_merges_args_and_keeps_exc_info():
+    handler = BoundedQueueHandler(queue.Queue())
+    logger = logging.getLogger("test")
+    values = [1]
+    logger.addHandler(handler)
+    try:
+        fail()
+    except ValueError:
+        logger.exception("values %r", values)
+    finally:
+        logger.removeHandler(handler)
+    values.append(2)
+    record = handler.queue.get_nowait()
+    assert record.getMessage() == "values [1]"
+    assert record.exc_info[0] is ValueError
+
+
+def test_listener_writes_file_and_flushes_on_stop(root_logger, tmp_path):
+    log_file = tmp_path / "logs" / "app.log"
+    setup_logger("test", log_file, console_level="CRITICAL")
+    assert any(isinstance(h, BoundedQueueHandler) for h in root_logger.handlers)
+
+    for i in range(100):
+        logging.getLogger("test").info("line %d", i)
+    stop_logging()
+
+    lines = log_file.read_text().splitlines()
+    assert len(lines) == 100
+    assert lines[-1].endswith("line 99")
+    assert logging_stats() == {}
+
+
+def test_rate_limit_filter_only_limits_keyed_records():
+    handler = BoundedQueueHandler(queue.Queue())
+    handler.addFilter(RateLimitFilter(limit=2, period=60))
+    logger = logging.getLogger("test.ratelimit")
+    logger.addHandler(handler)
+    try:
+        for i in range(5):
+            logger.warning("Invalid JSON: %d", i, extra={"rate_limit": "json"})
+            logger.warning("other %d", i)
+    finally:
+        logger.removeHandler(handler)
+
+    messages = [handler.queue.get_nowait().msg for _ in range(handler.queue.qsize())]
+    assert messages.count("other 0") == 1
+    assert sum(m.startswith("other") for m in messages) == 5
+    assert [m for m in messages if m.startswith("Invalid")] == [
+        "Invalid JSON: 0",
+        "Invalid JSON: 1",
+    ]
+
+
+def test_listener_reports_ended_bursts():
+    class ListHandler(logging.Handler):
+        def __init__(self):
+            super().__init__()
+            self.messages = []
+
+        def emit(self, record):
+            self.messages.append(record.getMessage())
+
+    rate_filter = RateLimitFilter(limit=1, period=0.05)
+    handler = BoundedQueueHandler(queue.Queue())
+    handler.addFilter(rate_filter)
+    target = ListHandler()
+    listener = _LogListener(
+        handler.queue, target, summaries=rate_filter.summaries, flush_interval=0.01
+    )
+    logger = logging.getLogger("test.ratelimit")
+    logger.addHandler(handler)
+    listener.start()
+    try:
+        for i in range(4):
+            logger.warning("Invalid JSON: %d", i, extra={"rate_limit": "json"})
+        time.sleep(0.2)
+    finally:
+        listener.stop()
+        logger.removeHandler(handler)
+
+    assert target.messages == [
+        "Invalid JSON: 0",
+        "Suppressed 3 similar: Invalid JSON: 3",
+    ]
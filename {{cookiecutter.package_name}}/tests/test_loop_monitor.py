@@ -0,0 +1,42 @@
+import asyncio
+import time
+
+from {{cookiecutter.package_dir}}.metrics import MetricsRegistry
+from {{cookiecutter.package_dir}}.services.loop_monitor import LoopLagMonitor
+
+
+def blocking_handler():
+    time.sleep(0.2)
+
+
+def test_reports_blocking_call_with_stack():
+    monitor = LoopLagMonitor(interval=0.02, threshold=0.05, metrics=MetricsRegistry())
+
+    async def main():
+        task = asyncio.create_task(monitor.start())
+        await monitor.wait_started()
+        await asyncio.sleep(0.05)
+        blocking_handler()
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+        await task
+
+    asyncio.run(main())
+    stats = monitor.stats()
+    assert stats["stalls"] == 1
+    assert stats["lag_max_ms"] >= 100
+    assert "blocking_handler" in monitor.last_stall["stack"]
+
+
+def test_no_stalls_when_idle():
+    monitor = LoopLagMonitor(interval=0.01, threshold=0.1, metrics=MetricsRegistry())
+
+    async def main():
+        task = asyncio.create_task(monitor.start())
+        await asyncio.sleep(0.1)
+        await monitor.stop()
+        await task
+
+    asyncio.run(main())
+    assert monitor.stats()["stalls"] == 0
+    assert monitor.last_stall is None
@@ -0,0 +1,76 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from {{cookiecutter.package_dir}}.app import MyApp
+from {{cookiecutter.package_dir}}.metrics import MetricsRegistry
+from {{cookiecutter.package_dir}}.services.memory_monitor import MB
+from {{cookiecutter.package_dir}}.services.memory_monitor import MemoryMonitor
+
+_leak = []
+
+
+def leaky():
+    _leak.append(bytearray(2 * MB))
+
+
+class FakeProcess:
+    def __init__(self):
+        self.rss = 100 * MB
+
+    def memory_info(self):
+        return SimpleNamespace(rss=self.rss)
+
+
+def test_alerts_once_per_threshold_of_growth():
+    alerts = []
+
+    async def on_alert(alert):
+        alerts.append(alert)
+
+    monitor = MemoryMonitor(
+        threshold_mb=10, on_alert=on_alert, metrics=MetricsRegistry()
+    )
+    monitor._process = process = FakeProcess()
+
+    async def main():
+        for rss in (100, 105, 111, 115, 122):
+            process.rss = rss * MB
+            await monitor.sample()
+
+    asyncio.run(main())
+    assert [a["rss_mb"] for a in alerts] == [111.0, 122.0]
+    assert monitor.stats()["growth_mb"] == 22.0
+
+
+def test_diff_snapshots_finds_allocating_line():
+    import tracemalloc  # noqa: PLC0415
+
+    monitor = MemoryMonitor(metrics=MetricsRegistry())
+
+    async def main():
+        task = asyncio.create_task(monitor.diff_snapshots(0.05, limit=3))
+        await asyncio.sleep(0.01)
+        leaky()
+        return await task
+
+    top = asyncio.run(main())
+    assert top[0]["line"].startswith("test_memory_monitor.py:")
+    assert top[0]["size_diff_kb"] >= 2048
+    assert not tracemalloc.is_tracing()
+
+
+@pytest.mark.parametrize("data", [{"seconds": -5}, {"seconds": "x"}, {"top": 1000}])
+def test_memsnapshot_command_rejects_bad_parameters(data):
+    class FakeMqtt:
+        messages = []
+
+        async def send_message(self, message, extra=None, error=False):
+            self.messages.append((message, error))
+
+    monitor = MemoryMonitor(metrics=MetricsRegistry())
+    app = SimpleNamespace(_mqtt=FakeMqtt(), _memory_monitor=monitor)
+    with pytest.raises(ValueError, match="must be a number from"):
+        asyncio.run(MyApp.command_memsnapshot(app, data))
+    assert app._mqtt.messages[0][1] is True
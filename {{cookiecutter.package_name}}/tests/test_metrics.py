@@ -0,0 +1,65 @@
+import pytest
+
+from {{cookiecutter.package_dir}}.metrics import MetricsRegistry
+
+
+def test_counter_snapshot_and_reset():
+    registry = MetricsRegistry()
+    counter = registry.counter("events")
+    counter.inc()
+    counter.inc(2)
+
+    assert registry.snapshot() == {"events": 3}
+    assert registry.snapshot(reset=True) == {"events": 3}
+    assert registry.snapshot() == {"events": 0}
+
+
+def test_gauge_is_not_reset():
+    registry = MetricsRegistry()
+    gauge = registry.gauge("queue_depth")
+    gauge.set(5)
+    gauge.dec()
+
+    assert registry.snapshot(reset=True) == {"queue_depth": 4}
+    assert registry.snapshot() == {"queue_depth": 4}
+
+
+def test_registry_returns_same_metric():
+    registry = MetricsRegistry()
+    assert registry.counter("a", action="x") is registry.counter("a", action="x")
+    assert registry.counter("a", action="x") is not registry.counter("a", action="y")
+    assert 'a{action="x"}' in registry.snapshot()
+
+
+def test_registry_rejects_kind_mismatch():
+    registry = MetricsRegistry()
+    registry.counter("a")
+    with pytest.raises(TypeError):
+        registry.gauge("a")
+
+
+def test_histogram_percentiles_within_precision():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency")
+    for i in range(1, 1001):
+        histogram.observe(i / 1000)
+
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 1000
+    assert snapshot["min"] == pytest.approx(0.001)
+    assert snapshot["max"] == pytest.approx(1.0)
+    assert snapshot["p50"] == pytest.approx(0.5, rel=1 / 8)
+    assert snapshot["p99"] == pytest.approx(0.99, rel=1 / 8)
+
+
+def test_histogram_out_of_range_values():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("h", buckets={"lowest": 1, "highest": 100})
+    histogram.observe(0)
+    histogram.observe(1e9)
+
+    assert histogram.count == 2
+    assert histogram.percentile(100) == 1e9
+
+    histogram.reset()
+    assert histogram.snapshot() == {"count": 0, "sum": 0.0}
@@ -0,0 +1,152 @@
+import asyncio
+from types import SimpleNamespace
+
+from {{cookiecutter.package_dir}}.metrics import MetricsRegistry
+from {{cookiecutter.package_dir}}.mqtt.client import AsyncMqttClient
+from {{cookiecutter.package_dir}}.ratelimit import RateLimiter
+
+
+class FakeClient:
+    def __init__(self, queue):
+        self.queue = queue
+
+    @property
+    async def messages(self):
+        while True:
+            yield await self.queue.get()
+
+
+def message(topic, payload="{}"):
+    return SimpleNamespace(topic=topic, payload=payload.encode())
+
+
+def test_drain_waits_for_inflight_handlers_and_drops_new_messages():
+    async def main():
+        handled = []
+        queue = asyncio.Queue()
+        mqtt = AsyncMqttClient(base_topic="test", metrics=MetricsRegistry())
+        mqtt._client = FakeClient(queue)
+
+        async def slow_handler(payload, topic):
+            await asyncio.sleep(0.05)
+            handled.append(payload)
+
+        mqtt.add_message_handler("test/command", slow_handler)
+        listener = asyncio.create_task(mqtt._message_loop())
+        await queue.put(message("test/command", '{"n": 1}'))
+        await asyncio.sleep(0.01)
+
+        mqtt.stop_accepting()
+        await queue.put(message("test/command", '{"n": 2}'))
+        assert mqtt.inflight == 1
+        assert await mqtt.drain(1.0)
+        await asyncio.sleep(0.01)
+        listener.cancel()
+        return handled, mqtt.dropped
+
+    handled, dropped = asyncio.run(main())
+    assert handled == [{"n": 1}]
+    assert dropped == 1
+
+
+def test_drain_times_out():
+    async def main():
+        mqtt = AsyncMqttClient(base_topic="test", metrics=MetricsRegistry())
+        mqtt._begin()
+        return await mqtt.drain(0.01)
+
+    assert asyncio.run(main()) is False
+
+
+def test_per_handler_instrumentation():
+    async def main():
+        queue = asyncio.Queue()
+        mqtt = AsyncMqttClient(base_topic="test", metrics=MetricsRegistry())
+        mqtt._client = FakeClient(queue)
+
+        async def ok_handler(payload, topic):
+            pass
+
+        async def bad_handler(payload, topic):
+            msg = "boom"
+            raise ValueError(msg)
+
+        async def send_message(message, extra=None, error=False):
+            pass
+
+        mqtt.send_message = send_message
+        mqtt.add_message_handler("test/a", ok_handler)
+        mqtt.add_message_handler("test/b", bad_handler)
+        listener = asyncio.create_task(mqtt._message_loop())
+        for topic in ("test/a", "test/a", "test/b"):
+            await queue.put(message(topic, '{"n": 1}'))
+        await asyncio.sleep(0.01)
+        listener.cancel()
+        return mqtt.handler_stats()
+
+    stats = asyncio.run(main())
+    a = stats["handlers"]["test/a"]
+    (a_name,) = a
+    assert a_name.endswith("ok_handler")
+    assert a[a_name]["calls"] == 2
+    assert a[a_name]["errors"] == 0
+    assert a[a_name]["seconds"]["count"] == 2
+    (b,) = stats["handlers"]["test/b"].values()
+    assert b["errors"] == 1
+    assert stats["received_bytes"]["test/a"]["max"] == len('{"n": 1}')
+
+
+def test_handler_error_echoes_are_rate_limited():
+    async def main():
+        queue = asyncio.Queue()
+        metrics = MetricsRegistry()
+        mqtt = AsyncMqttClient(
+            base_topic="test", error_limit=2, error_period=60, metrics=metrics
+        )
+        mqtt._client = FakeClient(queue)
+        sent = []
+
+        async def bad_handler(payload, topic):
+            msg = "boom"
+            raise ValueError(msg)
+
+        async def send_message(message, extra=None, error=False):
+            sent.append(message)
+
+        mqtt.send_message = send_message
+        mqtt.add_message_handler("test/b", bad_handler)
+        listener = asyncio.create_task(mqtt._message_loop())
+        for _ in range(10):
+            await queue.put(message("test/b"))
+        await asyncio.sleep(0.01)
+        listener.cancel()
+        return sent, metrics.counter("mqtt_error_messages_suppressed").value
+
+    sent, suppressed = asyncio.run(main())
+    assert sent == ["boom", "boom"]
+    assert suppressed == 8
+
+
+def test_suppressed_error_echoes_are_summarized():
+    now = [0.0]
+    mqtt = AsyncMqttClient(base_topic="test", metrics=MetricsRegistry())
+    mqtt._error_limiter = RateLimiter(1, 10, clock=lambda: now[0])
+    sent = []
+
+    async def send_message(message, extra=None, error=False):
+        sent.append((message, extra))
+
+    async def main():
+        mqtt.send_message = send_message
+        for i in range(3):
+            await mqtt._echo_error("handler", f"boom {i}")
+        await mqtt.publish_error_summaries()
+        now[0] = 10
+        await mqtt.publish_error_summaries()
+        await mqtt.publish_error_summaries()
+
+    asyncio.run(main())
+    assert sent == [
+        ("boom 0", None),
+        ("Suppressed 2 similar: boom 2", {"suppressed": 2}),
+    ]
@@ -0,0 +1,65 @@
+import asyncio
+
+from {{cookiecutter.package_dir}}.metrics import MetricsRegistry
+from {{cookiecutter.package_dir}}.openmetrics import OpenMetricsRenderer
+from {{cookiecutter.package_dir}}.services.metrics_server import MetricsServer
+
+
+def test_render_registry_and_stats():
+    registry = MetricsRegistry()
+    registry.counter("requests", "Requests handled", route="/a").inc(3)
+    registry.gauge("temperature").set(21.5)
+    registry.histogram("latency").observe(0.25)
+
+    stats = {"timestamp": "2024-01-01T00:00:00", "foo": {"count": 7, "ok": True}}
+    text = OpenMetricsRenderer(registry, lambda: stats, namespace="app").render()
+
+    assert "# TYPE requests counter" in text
+    assert 'requests_total{route="/a"} 3' in text
+    assert "temperature 21.5" in text
+    assert 'latency{quantile="0.5"}' in text
+    assert "latency_count 1" in text
+    assert "app_foo_count 7" in text
+    assert "app_foo_ok" not in text
+    assert text.endswith("# EOF\n")
+
+
+def test_render_is_cached():
+    registry = MetricsRegistry()
+    counter = registry.counter("events")
+    renderer = OpenMetricsRenderer(registry, cache_ttl=60)
+
+    first = renderer.render()
+    counter.inc()
+    assert renderer.render() is first
+
+    renderer.cache_ttl = 0
+    assert "events_total 1" in renderer.render()
+
+
+def test_metrics_server_over_unix_socket(tmp_path):
+    registry = MetricsRegistry()
+    registry.counter("events").inc()
+    socket_path = tmp_path / "metrics.sock"
+
+    async def scrape(target):
+        server = MetricsServer(
+            renderer=OpenMetricsRenderer(registry), socket_path=socket_path
+        )
+        await server.setup()
+        try:
+            reader, writer = await asyncio.open_unix_connection(socket_path)
+            writer.write(f"GET {target} HTTP/1.1\r\nHost: x\r\n\r\n".encode())
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+            return response.decode()
+        finally:
+            await server.cleanup()
+
+    response = asyncio.run(scrape("/metrics"))
+    assert response.startswith("HTTP/1.1 200 OK")
+    assert "application/openmetrics-text" in response
+    assert "events_total 1" in response
+
+    assert asyncio.run(scrape("/other")).startswith("HTTP/1.1 404")
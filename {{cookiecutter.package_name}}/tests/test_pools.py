@@ -0,0 +1,87 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from {{cookiecutter.package_dir}}.metrics import MetricsRegistry
+from {{cookiecutter.package_dir}}.pools import ExecutorPool
+from {{cookiecutter.package_dir}}.pools import ExecutorPools
+from {{cookiecutter.package_dir}}.pools import PoolFull
+
+
+def test_runs_in_named_threads_and_records_metrics():
+    metrics = MetricsRegistry()
+    pool = ExecutorPool("io", size=1, metrics=metrics)
+
+    async def main():
+        return await asyncio.gather(
+            pool.run(lambda: threading.current_thread().name),
+            pool.run(time.sleep, 0.02),
+        )
+
+    name, _ = asyncio.run(main())
+    pool.shutdown()
+    assert name.startswith("pool-io")
+    snapshot = metrics.snapshot()
+    assert snapshot['pool_run_seconds{pool="io"}']["count"] == 2
+    # The second call waited for the single worker
+    assert snapshot['pool_queue_wait_seconds{pool="io"}']["max"] > 0
+
+
+def test_rejects_beyond_queue_bound():
+    pool = ExecutorPool("busy", size=1, max_queued=1, metrics=MetricsRegistry())
+
+    async def main():
+        first = asyncio.ensure_future(pool.run(time.sleep, 0.05))
+        second = asyncio.ensure_future(pool.run(time.sleep, 0.01))
+        await asyncio.sleep(0)
+        with pytest.raises(PoolFull):
+            await pool.run(time.sleep, 0.01)
+        await asyncio.gather(first, second)
+
+    asyncio.run(main())
+    pool.shutdown()
+
+
+def test_cancelled_call_holds_its_slot_until_done():
+    pool = ExecutorPool("cancel", size=1, max_queued=0, metrics=MetricsRegistry())
+    release = threading.Event()
+
+    async def main():
+        call = asyncio.ensure_future(pool.run(release.wait))
+        await asyncio.sleep(0.01)
+        call.cancel()
+        await asyncio.sleep(0.01)
+        # The thread is still busy, so the pool is still full
+        pending = pool._pending
+        with pytest.raises(PoolFull):
+            await pool.run(time.sleep, 0)
+        release.set()
+        await asyncio.sleep(0.05)
+        return pending, pool._pending
+
+    assert asyncio.run(main()) == (1, 0)
+    pool.shutdown()
+
+
+def test_errors_propagate():
+    pool = ExecutorPool("errors", size=1, metrics=MetricsRegistry())
+
+    async def main():
+        await pool.run(int, "not a number")
+
+    with pytest.raises(ValueError, match="invalid literal"):
+        asyncio.run(main())
+    pool.shutdown()
+
+
+def test_registry_rejects_unknown_pools():
+    pools = ExecutorPools(metrics=MetricsRegistry())
+    pools.add("io", size=1)
+    assert pools.get("io").size == 1
+    with pytest.raises(ValueError, match="Unknown executor pool"):
+        pools.get("cpu")
+    with pytest.raises(ValueError, match="Unknown pool kind"):
+        pools.add("gpu", kind="gpu")
+    pools.shutdown()
@@ -0,0 +1,70 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from {{cookiecutter.package_dir}}.app import MyApp
+from {{cookiecutter.package_dir}}.profiler import ProfilerBusy
+from {{cookiecutter.package_dir}}.profiler import SamplingProfiler
+
+
+def busy_loop(seconds):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        pass
+
+
+def test_profile_writes_collapsed_stacks(tmp_path):
+    profiler = SamplingProfiler(tmp_path, interval=0.001)
+
+    async def main():
+        task = asyncio.create_task(profiler.profile(0.1))
+        await asyncio.sleep(0)
+        busy_loop(0.3)  # outlasts the run, so the loop never idles
+        return await task
+
+    result = asyncio.run(main())
+    assert result.samples > 0
+    lines = result.path.read_text().splitlines()
+    assert any("MainThread;" in line and "busy_loop" in line for line in lines)
+    _, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert result.top_frames(1)[0]["frame"].endswith(":busy_loop")
+
+
+def test_runs_in_the_same_second_keep_their_profiles(tmp_path):
+    profiler = SamplingProfiler(tmp_path, interval=0.001)
+    paths = {profiler.run(0.001).path for _ in range(3)}
+    assert len(paths) == 3
+    assert all(path.exists() for path in paths)
+
+
+def test_refuses_overlapping_runs(tmp_path):
+    profiler = SamplingProfiler(tmp_path)
+
+    async def main():
+        first = asyncio.create_task(profiler.profile(0.05))
+        await asyncio.sleep(0.01)
+        with pytest.raises(ProfilerBusy):
+            await profiler.profile(0.05)
+        await first
+
+    asyncio.run(main())
+
+
+@pytest.mark.parametrize(
+    "data", [{"seconds": -1}, {"seconds": 0}, {"seconds": "abc"}, {"top": 0}]
+)
+def test_profile_command_rejects_bad_parameters(tmp_path, data):
+    class FakeMqtt:
+        messages = []
+
+        async def send_message(self, message, extra=None, error=False):
+            self.messages.append((message, error))
+
+    app = SimpleNamespace(_mqtt=FakeMqtt(), _profiler=SamplingProfiler(tmp_path))
+    with pytest.raises(ValueError, match="must be a number from"):
+        asyncio.run(MyApp.command_profile(app, data))
+    assert app._mqtt.messages[0][1] is True
+    assert not list(tmp_path.iterdir())
@@ -0,0 +1,49 @@
+from {{cookiecutter.package_dir}}.ratelimit import RateLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_limits_per_key_and_reports_suppressed():
+    clock = FakeClock()
+    limiter = RateLimiter(limit=2, period=10, clock=clock)
+
+    assert [limiter.hit("a") for _ in range(5)] == [0, 0, None, None, None]
+    assert limiter.hit("b") == 0
+    assert limiter.pending() == {"a": 3}
+
+    clock.now = 10
+    assert limiter.hit("a") == 3
+    assert limiter.hit("a") == 0
+    assert limiter.pending() == {}
+
+
+def test_evicts_oldest_keys_when_full():
+    clock = FakeClock()
+    limiter = RateLimiter(limit=1, period=10, max_keys=2, clock=clock)
+    limiter.hit("a")
+    limiter.hit("a")
+    limiter.hit("b")
+    limiter.hit("c")
+    assert limiter.pending() == {}
+    assert limiter.hit("c") is None
+
+
+def test_flush_reports_ended_floods_once():
+    clock = FakeClock()
+    limiter = RateLimiter(limit=1, period=10, clock=clock)
+    for i in range(4):
+        limiter.hit("a", sample=i)
+    limiter.hit("b")
+    assert limiter.flush() == {}
+
+    clock.now = 10
+    assert limiter.flush() == {"a": (3, 3)}
+    assert limiter.flush() == {}
+    # Already reported, the next window starts clean
+    assert limiter.hit("a") == 0
@@ -0,0 +1,36 @@
+import asyncio
+import time
+
+from {{cookiecutter.package_dir}}.result_cache import ResultCache
+
+
+def test_bounded_and_expiring(monkeypatch):
+    cache = ResultCache(max_entries=2, ttl=10)
+    cache.put("a", {"status": "ok"})
+    cache.put("b", {"status": "ok"})
+    cache.put("c", {"status": "ok"})
+    assert "a" not in cache
+    assert len(cache) == 2
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 11)
+    assert cache.get("b") is None
+    assert cache.expire() == 1
+    assert len(cache) == 0
+
+
+def test_persists_across_instances(tmp_path):
+    path = tmp_path / "results.json"
+
+    async def main():
+        cache = ResultCache(path=path)
+        cache.put("req-1", {"id": "req-1", "status": "ok", "result": 42})
+        await cache.save()
+
+        restored = ResultCache(path=path)
+        await restored.load()
+        return restored.get("req-1")
+
+    assert asyncio.run(main())["result"] == 42
+    # Written through a temporary file that replaced it
+    assert [p.name for p in tmp_path.iterdir()] == ["results.json"]
@@ -0,0 +1,96 @@
+import asyncio
+
+from {{cookiecutter.package_dir}}.snapshot import StatsSnapshot
+from {{cookiecutter.package_dir}}.stats import StatsTracker
+
+RESOLUTIONS = ((1, 60), (60, 10))
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = tmp_path / "stats.snap"
+    snapshot = StatsSnapshot(path, RESOLUTIONS, capacity=4)
+    assert snapshot.open() is False
+
+    series = snapshot.series("foo.count")
+    for i in range(30):
+        series.add(i, ts=1000 + i)
+    snapshot.set_value("foo.count", 29)
+    snapshot.close()
+
+    restored = StatsSnapshot(path, RESOLUTIONS, capacity=4)
+    assert restored.open() is True
+    assert restored.names() == ["foo.count"]
+    assert restored.values() == {"foo.count": 29}
+    summary = restored.series("foo.count").query(1000, 1029)
+    assert summary.count == 30
+    assert summary.max == 29
+    restored.close()
+
+
+def test_snapshot_capacity(tmp_path):
+    snapshot = StatsSnapshot(tmp_path / "stats.snap", RESOLUTIONS, capacity=1)
+    snapshot.open()
+    assert snapshot.series("a") is not None
+    assert snapshot.series("b") is None
+    snapshot.close()
+
+
+def test_snapshot_discards_incompatible_file(tmp_path):
+    path = tmp_path / "stats.snap"
+    snapshot = StatsSnapshot(path, RESOLUTIONS, capacity=2)
+    snapshot.open()
+    snapshot.series("a").add(1.0, ts=0)
+    snapshot.close()
+
+    other = StatsSnapshot(path, ((1, 30),), capacity=2)
+    assert other.open() is False
+    assert other.names() == []
+    other.close()
+
+
+def test_snapshot_discards_corrupt_names(tmp_path):
+    path = tmp_path / "stats.snap"
+    snapshot = StatsSnapshot(path, RESOLUTIONS, capacity=2)
+    snapshot.open()
+    snapshot.series("a").add(1.0, ts=0)
+    offset = snapshot._offset(0)
+    snapshot.close()
+
+    with path.open("r+b") as f:
+        f.seek(offset)
+        f.write(b"\xff\xfe")
+
+    restored = StatsSnapshot(path, RESOLUTIONS, capacity=2)
+    assert restored.open() is False
+    assert restored.names() == []
+    assert restored.series("b") is not None
+    restored.close()
+
+
+def test_stats_tracker_restores_from_snapshot(tmp_path):
+    stats = {"mode": "auto", "count": 5, "ok": True, "rpm": {"motor.1": 5}}
+
+    def make_tracker():
+        return StatsTracker(
+            stats_file=tmp_path / "stats.json",
+            snapshot_file=tmp_path / "stats.snap",
+            resolutions=RESOLUTIONS,
+            metrics=None,
+        )
+
+    async def first_run():
+        tracker = make_tracker()
+        tracker.register_source("foo", lambda: stats)
+        await tracker.setup()
+        await tracker.cleanup()
+
+    async def second_run():
+        tracker = make_tracker()
+        await tracker.load()
+        return tracker
+
+    asyncio.run(first_run())
+    tracker = asyncio.run(second_run())
+    # Stats come back as saved, only the history from the snapshot
+    assert tracker.all()["foo"] == stats
+    assert tracker.query("foo.count", window=60).last == 5
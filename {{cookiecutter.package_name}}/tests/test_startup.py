@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from {{cookiecutter.package_dir}}.app import MyApp
+from {{cookiecutter.package_dir}}.metrics import REGISTRY
+from {{cookiecutter.package_dir}}.services.health import read_health
+from {{cookiecutter.package_dir}}.settings import Settings
+
+
+@pytest.fixture
+def app(monkeypatch, tmp_path):
+    # Keep the metrics MyApp registers out of the shared registry
+    monkeypatch.setattr(REGISTRY, "_metrics", dict(REGISTRY._metrics))
+    # Nothing listens on port 1, every connection attempt is refused
+    app = MyApp(
+        Settings(
+            app={"config_poll_interval": 0},
+            sentry={},
+            mqtt={"device_id": "dev", "port": 1},
+            memory_monitor={"enabled": False},
+            health={"socket": str(tmp_path / "health.sock")},
+        )
+    )
+    app._stats.stats_file = tmp_path / "stats.json"
+    app._stats.snapshot_file = tmp_path / "stats.snap"
+    return app
+
+
+def test_starts_services_while_broker_is_unreachable(app):
+    async def main():
+        await asyncio.wait_for(app.startup(), 5)
+        status = app._supervisor.status()
+        health = await asyncio.to_thread(read_health, app.config.health.socket)
+        await app.cleanup()
+        return status, health
+
+    status, health = asyncio.run(main())
+    assert health["live"]
+    assert not health["ready"]
+    assert not health["mqtt_connected"]
+    assert health["services"]["health"] == "running"
+    assert health["loop"]["tick_age"] < 1
+    assert {name: s["state"] for name, s in status.items()} == {
+        "mqtt": "running",
+        "commands": "running",
+        "stats": "running",
+        "heartbeat": "running",
+        "loop_monitor": "running",
+        "health": "running",
+    }
+    assert set(app._startup) == {
+        "setup_mqtt",
+        "setup_stats",
+        "register_services",
+        "start_services",
+        "restore_stats",
+        "total",
+    }
+    assert app._startup["total"] < 5
@@ -0,0 +1,176 @@
+import asyncio
+
+import pytest
+
+from {{cookiecutter.package_dir}}.metrics import MetricsRegistry
+from {{cookiecutter.package_dir}}.services.baseasync import BaseServiceAsync
+from {{cookiecutter.package_dir}}.services.supervisor import RestartPolicy
+from {{cookiecutter.package_dir}}.services.supervisor import ServiceSupervisor
+
+
+class FakeService(BaseServiceAsync):
+    def __init__(self, name, events, setup_delay=0.0, fail_times=0):
+        super().__init__()
+        self.name = name
+        self.events = events
+        self.setup_delay = setup_delay
+        self.fail_times = fail_times
+        self.runs = 0
+
+    async def setup(self):
+        await asyncio.sleep(self.setup_delay)
+        self.events.append(f"start:{self.name}")
+
+    async def run(self):
+        self.runs += 1
+        if self.runs <= self.fail_times:
+            msg = "boom"
+            raise RuntimeError(msg)
+        await self._shutdown_event.wait()
+
+    async def cleanup(self):
+        self.events.append(f"stop:{self.name}")
+
+
+def test_levels_follow_dependencies():
+    supervisor = ServiceSupervisor(metrics=MetricsRegistry())
+    events = []
+    supervisor.add("heartbeat", FakeService("heartbeat", events), depends_on=("mqtt",))
+    supervisor.add("mqtt", FakeService("mqtt", events))
+    supervisor.add("stats", FakeService("stats", events))
+    assert supervisor.levels() == [["mqtt", "stats"], ["heartbeat"]]
+
+
+def test_levels_reject_cycles_and_unknown_dependencies():
+    supervisor = ServiceSupervisor(metrics=MetricsRegistry())
+    supervisor.add("a", FakeService("a", []), depends_on=("b",))
+    supervisor.add("b", FakeService("b", []), depends_on=("a",))
+    with pytest.raises(ValueError, match="cycle"):
+        supervisor.levels()
+
+    supervisor = ServiceSupervisor(metrics=MetricsRegistry())
+    supervisor.add("a", FakeService("a", []), depends_on=("missing",))
+    with pytest.raises(ValueError, match="unknown"):
+        supervisor.levels()
+
+
+def test_start_and_stop_in_dependency_order():
+    events = []
+    metrics = MetricsRegistry()
+    supervisor = ServiceSupervisor(metrics=metrics)
+    supervisor.add("mqtt", FakeService("mqtt", events, setup_delay=0.02))
+    supervisor.add("stats", FakeService("stats", events))
+    supervisor.add("heartbeat", FakeService("heartbeat", events), depends_on=("mqtt",))
+
+    async def main():
+        await supervisor.start()
+        status = supervisor.status()
+        await supervisor.stop()
+        return status
+
+    status = asyncio.run(main())
+    # stats has no dependencies, so it does not wait for the slow mqtt setup
+    assert events[:3] == ["start:stats", "start:mqtt", "start:heartbeat"]
+    assert events.index("stop:heartbeat") < events.index("stop:mqtt")
+    assert status["mqtt"]["state"] == "running"
+    assert status["mqtt"]["startup_seconds"] >= 0.02
+    assert supervisor.status()["heartbeat"]["state"] == "stopped"
+    snapshot = metrics.snapshot()
+    assert 'service_start_seconds{service="mqtt"}' in snapshot
+    assert 'service_stop_seconds{service="heartbeat"}' in snapshot
+
+
+def test_restarts_with_backoff_until_limit():
+    events = []
+    flaky = FakeService("flaky", events, fail_times=10)
+    supervisor = ServiceSupervisor(metrics=MetricsRegistry())
+    supervisor.add(
+        "flaky",
+        flaky,
+        restart=RestartPolicy(max_restarts=2, backoff_initial=0.01),
+    )
+
+    async def main():
+        await supervisor.start()
+        await asyncio.sleep(0.1)
+        status = supervisor.status()["flaky"]
+        await supervisor.stop()
+        return status
+
+    status = asyncio.run(main())
+    assert flaky.runs == 3
+    assert status == {**status, "state": "failed", "restarts": 2}
+
+
+def test_recovers_after_restart():
+    flaky = FakeService("flaky", [], fail_times=1)
+    supervisor = ServiceSupervisor(metrics=MetricsRegistry())
+    supervisor.add("flaky", flaky, restart=RestartPolicy(backoff_initial=0.01))
+
+    async def main():
+        await supervisor.start()
+        await asyncio.sleep(0.05)
+        status = supervisor.status()["flaky"]
+        await supervisor.stop()
+        return status
+
+    status = asyncio.run(main())
+    assert status["state"] == "running"
+    assert status["restarts"] == 1
+
+
+class BrokenSetupService(FakeService):
+    async def setup(self):
+        msg = "no broker"
+        raise RuntimeError(msg)
+
+
+def test_start_does_not_wait_for_crashing_setup():
+    events = []
+    supervisor = ServiceSupervisor(metrics=MetricsRegistry())
+    supervisor.add(
+        "broken",
+        BrokenSetupService("broken", events),
+        restart=RestartPolicy(backoff_initial=10),
+        start_timeout=5,
+    )
+    supervisor.add("stats", FakeService("stats", events), depends_on=("broken",))
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await supervisor.start()
+        elapsed = loop.time() - started
+        status = supervisor.status()
+        await supervisor.stop()
+        return elapsed, status
+
+    elapsed, status = asyncio.run(main())
+    assert elapsed < 1
+    assert status["broken"]["state"] == "backoff"
+    assert status["stats"]["state"] == "running"
+
+
+class StuckService(FakeService):
+    async def cleanup(self):
+        await asyncio.sleep(10)
+
+
+def test_stop_cancels_services_past_deadline():
+    events = []
+    supervisor = ServiceSupervisor(metrics=MetricsRegistry())
+    supervisor.add("mqtt", FakeService("mqtt", events))
+    supervisor.add("stuck", StuckService("stuck", events), depends_on=("mqtt",))
+
+    async def main():
+        await supervisor.start()
+        cancelled = await supervisor.stop(timeout=0.05, names=["stuck"])
+        status = supervisor.status()
+        await supervisor.stop(timeout=0.05)
+        return cancelled, status
+
+    cancelled, status = asyncio.run(main())
+    assert cancelled == ["stuck"]
+    assert status["stuck"]["state"] == "cancelled"
+    assert status["mqtt"]["state"] == "running"
+    assert events[-1] == "stop:mqtt"
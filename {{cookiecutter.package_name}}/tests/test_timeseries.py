@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from {{cookiecutter.package_dir}}.metrics import MetricsRegistry
+from {{cookiecutter.package_dir}}.stats import StatsTracker
+from {{cookiecutter.package_dir}}.timeseries import RingBuffer
+from {{cookiecutter.package_dir}}.timeseries import TimeSeries
+
+
+def test_ring_buffer_aggregates_bucket():
+    ring = RingBuffer(width=10, size=4)
+    for ts, value in [(100, 1.0), (103, 5.0), (109, 3.0)]:
+        ring.add(ts, value)
+
+    summary = ring.summary(100, 109)
+    assert summary.count == 3
+    assert summary.min == 1.0
+    assert summary.max == 5.0
+    assert summary.mean == pytest.approx(3.0)
+    assert summary.first == 1.0
+    assert summary.last == 3.0
+
+
+def test_ring_buffer_memory_is_fixed():
+    ring = RingBuffer(width=1, size=5)
+    for ts in range(1000):
+        ring.add(ts, ts)
+
+    points = ring.points(0, 999)
+    assert [ts for ts, _ in points] == [995, 996, 997, 998, 999]
+
+
+def test_ring_buffer_ignores_expired_samples():
+    ring = RingBuffer(width=1, size=2)
+    ring.add(10, 1.0)
+    ring.add(11, 1.0)
+    ring.add(8, 100.0)
+    assert ring.summary(0, 11).max == 1.0
+
+
+def test_time_series_downsamples_every_resolution():
+    series = TimeSeries(resolutions=((1, 60), (60, 10)))
+    for i in range(120):
+        series.add(i, ts=1000 + i)
+
+    fine = series.query(1000 + 110, 1000 + 119, resolution=1)
+    assert fine.count == 10
+    assert fine.mean == pytest.approx(114.5)
+
+    coarse = series.points(960, 1119, resolution=60)
+    assert len(coarse) == 3
+
+
+def test_time_series_rate():
+    series = TimeSeries(resolutions=((1, 600),))
+    for i in range(61):
+        series.add(i * 2, ts=5000 + i)
+
+    summary = series.query(5000, 5060)
+    assert summary.rate == pytest.approx(2.0)
+
+
+def test_time_series_picks_covering_resolution():
+    series = TimeSeries(resolutions=((1, 10), (60, 10)))
+    series.add(1.0, ts=0)
+    series.add(2.0, ts=500)
+    assert series.query(0, 500).count == 2
+
+
+def test_stats_tracker_records_numeric_history(tmp_path):
+    async def collect():
+        tracker = StatsTracker(stats_file=tmp_path / "stats.json")
+        tracker.register_source("foo", lambda: {"count": 3, "ok": True, "name": "x"})
+        await tracker.collect_now()
+        return tracker
+
+    tracker = asyncio.run(collect())
+    assert tracker.list_series() == ["foo.count"]
+    assert tracker.query("foo.count", window=60).last == 3
+
+
+def test_stats_tracker_skips_metrics_history_by_default(tmp_path):
+    registry = MetricsRegistry()
+    registry.histogram("handler_seconds", "Handler time").observe(0.1)
+
+    async def collect(**options):
+        tracker = StatsTracker(
+            stats_file=tmp_path / "stats.json", metrics=registry, **options
+        )
+        tracker.register_source("foo", lambda: {"count": 3})
+        stats = await tracker.collect_now()
+        return tracker, stats
+
+    tracker, stats = asyncio.run(collect())
+    assert "handler_seconds" in stats["metrics"]
+    assert tracker.list_series() == ["foo.count"]
+
+    tracker, _ = asyncio.run(collect(metrics_history=True))
+    assert "metrics.handler_seconds.count" in tracker.list_series()
@@ -0,0 +1,69 @@
+from types import SimpleNamespace
+
+import pytest
+
+from {{cookiecutter.package_dir}} import tracing
+
+
+def sentry_config(dsn="http://key@localhost/1", rate=0.0, rules=()):
+    return SimpleNamespace(
+        sentry=SimpleNamespace(
+            dsn=dsn,
+            environment="test",
+            traces_sample_rate=rate,
+            sample_rules=[SimpleNamespace(match=m, rate=r) for m, r in rules],
+        )
+    )
+
+
+def context(name, parent_sampled=None):
+    return {"transaction_context": {"name": name}, "parent_sampled": parent_sampled}
+
+
+def test_sampler_uses_first_matching_rule():
+    sampler = tracing.make_sampler(
+        tracing.make_rate(
+            0.1,
+            [("command profile", 1.0), ("command *", 0.5), ("mqtt */heartbeat", 0)],
+        )
+    )
+    assert sampler(context("command profile")) == 1.0
+    assert sampler(context("command foo")) == 0.5
+    assert sampler(context("mqtt project/app/+/heartbeat")) == 0
+    assert sampler(context("stats save")) == 0.1
+    assert sampler(context("command foo", parent_sampled=False)) == 0.0
+
+
+def test_trace_is_a_no_op_without_sentry():
+    assert not tracing.init_sentry(SimpleNamespace())
+    assert not tracing.init_sentry(sentry_config(dsn=""))
+    with tracing.trace("command", "command foo") as span:
+        assert span is None
+
+
+def test_traces_sampled_transactions_with_child_spans(monkeypatch):
+    sentry_sdk = pytest.importorskip("sentry_sdk")
+    monkeypatch.setattr(tracing, "_sdk", None)
+    monkeypatch.setattr(tracing, "_rate_for", None)
+    sent = []
+
+    class Transport(sentry_sdk.transport.Transport):
+        def capture_envelope(self, envelope):
+            sent.append(envelope.get_transaction_event())
+
+    config = sentry_config(rules=[("command foo", 1.0)])
+    assert tracing.init_sentry(config, transport=Transport, default_integrations=False)
+    try:
+        with (
+            tracing.trace("command", "command foo"),
+            tracing.trace("stats.save", "stats save"),
+        ):
+            pass
+        with tracing.trace("command", "command bar"):
+            pass
+        sentry_sdk.flush()
+    finally:
+        sentry_sdk.init()
+
+    assert [event["transaction"] for event in sent] == ["command foo"]
+    assert [span["op"] for span in sent[0]["spans"]] == ["stats.save"]
@@ -0,0 +1,87 @@
+import asyncio
+import sys
+
+import pytest
+
+from {{cookiecutter.package_dir}}.entrypoint import create_app
+from {{cookiecutter.package_dir}}.metrics import REGISTRY
+from {{cookiecutter.package_dir}}.metrics import MetricsRegistry
+from {{cookiecutter.package_dir}}.settings import Settings
+from {{cookiecutter.package_dir}}.workers import LeaderApp
+from {{cookiecutter.package_dir}}.workers import WorkerApp
+from {{cookiecutter.package_dir}}.workers import WorkerPool
+
+
+def report_and_exit(index, reports):
+    reports.put((index, {"handlers": {"t": {"h": {"calls": index + 1}}}}))
+    reports.close()
+    reports.join_thread()
+    sys.exit(1)
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    # Keep the metrics the apps register out of the shared registry
+    monkeypatch.setattr(REGISTRY, "_metrics", dict(REGISTRY._metrics))
+    return Settings(app={}, sentry={}, mqtt={"device_id": "dev"}, workers={"count": 2})
+
+
+def subscriptions(app):
+    asyncio.run(app.setup_mqtt())
+    topics = [topic for topic, _ in app._mqtt.get_subscriptions()]
+    app._pools.shutdown()
+    return topics
+
+
+def test_leader_leaves_commands_to_workers(settings):
+    app = create_app(settings)
+    assert isinstance(app, LeaderApp)
+    assert subscriptions(app) == ["project/app/dev/config"]
+    assert app._mqtt.announce
+
+
+def test_worker_uses_shared_subscription(settings):
+    app = WorkerApp(settings, index=1, reports=None)
+    assert subscriptions(app) == ["$share/dev/project/app/dev/command"]
+    assert app._mqtt.identifier == "dev-worker1"
+    assert not app._mqtt.announce
+    assert "project/app/dev/command" in app._mqtt.get_message_handlers()
+
+
+def test_gateway_and_workers_are_exclusive(settings):
+    settings.gateway.devices = ["a"]
+    with pytest.raises(ValueError, match="gateway"):
+        create_app(settings)
+
+
+def test_persisted_results_and_workers_are_exclusive(settings):
+    settings.commands.persist_results = True
+    with pytest.raises(ValueError, match="persist_results"):
+        create_app(settings)
+
+
+def test_pool_restarts_workers_and_sums_reports():
+    pool = WorkerPool(
+        count=2,
+        target=report_and_exit,
+        restart_delay=0.05,
+        check_interval=0.05,
+        metrics=MetricsRegistry(),
+    )
+
+    async def main():
+        task = asyncio.create_task(pool.start())
+        for _ in range(200):
+            await asyncio.sleep(0.05)
+            if all(worker.restarts for worker in pool.workers):
+                break
+        pool.collect()
+        stats = pool.stats()
+        await pool.stop()
+        await task
+        return stats
+
+    stats = asyncio.run(main())
+    assert stats["count"] == 2
+    assert stats["restarts"] >= 2
+    assert stats["totals"] == {"handlers": {"t": {"h": {"calls": 3}}}}